@@ -0,0 +1,192 @@
+"""
+Benchmark ponta a ponta da extração contra a API Vista simulada (benchmarks.mock_vista).
+
+Sobe o servidor em outro processo, aponta VISTA_API_URL para ele e roda
+get_vista_data_async (dict-of-dicts e paginação "meta"), extract_negocios e
+extract_activities de verdade. Reporta vazão, latência p50/p99 por requisição
+(medida no cliente), retries/429 e pico de memória (tracemalloc, em uma segunda passada
+para não distorcer o tempo). A carga no Supabase é substituída por no-op só aqui.
+
+Uso:
+    python -m benchmarks.bench_e2e [--records 10000] [--deals 2000] [--latency-ms 20]
+        [--latency-distribution lognormal] [--rate-429 0.01] [--rate-500 0.01] [--no-memory]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import aiohttp
+
+from benchmarks.mock_vista import add_arguments, config_from_args, config_to_argv
+
+LIST_FIELDS = ["Codigo", "Nome", "Email", "Celular", "Cidade", "ValorVenda", "DataCadastro", "Corretor"]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def mock_server(config):
+    """Servidor simulado em processo próprio (não disputa o event loop nem o tracemalloc)."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_vista", "--port", str(port)] + config_to_argv(config),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+async def wait_ready(url, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{url}/__stats") as response:
+                    return await response.json()
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Mock Vista não respondeu em {url}")
+                await asyncio.sleep(0.1)
+
+
+def latency_tracer(samples):
+    """TraceConfig que registra a latência de cada requisição (do envio ao fim da resposta)."""
+    trace = aiohttp.TraceConfig()
+
+    async def on_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_end(session, context, params):
+        samples.append(time.perf_counter() - context.started)
+
+    trace.on_request_start.append(on_start)
+    trace.on_request_end.append(on_end)
+    return trace
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def scenarios():
+    # Importados só depois de VISTA_API_URL apontar para o mock
+    from src.utils.async_api_client import get_vista_data_async
+    from src.extractors import negocios
+    from src.extractors.atividades import extract_activities
+
+    # Benchmark da extração: a carga e o sync_state no Supabase viram no-op
+    negocios.save_to_supabase = lambda *args, **kwargs: None
+    negocios.update_last_run_in_supabase = lambda *args, **kwargs: None
+
+    state = {}
+
+    async def listar(session):
+        return await get_vista_data_async(session, "imoveis/listar", LIST_FIELDS)
+
+    async def meta(session):
+        return await get_vista_data_async(session, "corretores", LIST_FIELDS)
+
+    async def deals(session):
+        state["deals"] = await negocios.extract_negocios(session)
+        return state["deals"]
+
+    async def activities(session):
+        return await extract_activities(session, state.get("deals") or [])
+
+    return (
+        ("get_vista_data_async (dict-of-dicts)", listar),
+        ("get_vista_data_async (meta)", meta),
+        ("extract_negocios (+ detalhes)", deals),
+        ("extract_activities (colunar)", activities),
+    )
+
+
+async def run_scenario(func, trace_memory):
+    samples = []
+    async with aiohttp.ClientSession(trace_configs=[latency_tracer(samples)]) as session:
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = await func(session)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+        if trace_memory:
+            tracemalloc.stop()
+    return len(result or []), elapsed, samples, peak
+
+
+async def run(url, measure_memory):
+    from src.utils.metrics import REGISTRY, HTTP_RETRIES
+
+    await wait_ready(url)
+    print(f"{'cenário':<38} {'registros':>9} {'tempo':>8} {'reg/s':>9} {'req/s':>7} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'retries':>7} {'pico MB':>8}")
+    for name, func in scenarios():
+        REGISTRY.reset()
+        count, elapsed, samples, _ = await run_scenario(func, trace_memory=False)
+        retries = sum(HTTP_RETRIES.summary().values())
+        peak = "-"
+        if measure_memory:
+            # Segunda passada só para memória (tracemalloc deixa a execução mais lenta)
+            peak = f"{(await run_scenario(func, trace_memory=True))[3] / 2 ** 20:8.1f}"
+        print(f"{name:<38} {count:>9} {elapsed:>7.2f}s {count / elapsed:>9.0f} {len(samples) / elapsed:>7.0f} "
+              f"{percentile(samples, 0.5) * 1000:>7.1f} {percentile(samples, 0.99) * 1000:>7.1f} "
+              f"{retries:>7.0f} {peak:>8}")
+
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/__stats") as response:
+            stats = await response.json()
+    injected = {key: value for key, value in stats.items() if not key.endswith(" 200")}
+    if injected:
+        print("Respostas não-200 do servidor:", ", ".join(f"{k}={v}" for k, v in sorted(injected.items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--no-memory", action="store_true", help="Não mede o pico de memória (uma passada só)")
+    parser.add_argument("--verbose", action="store_true", help="Mantém os logs INFO/WARNING do ETL")
+    args = parser.parse_args()
+    config = config_from_args(args)
+
+    with mock_server(config) as url:
+        os.environ["VISTA_API_URL"] = url
+        os.environ.setdefault("VISTA_API_KEY", "bench")
+        os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+        os.environ.setdefault("SUPABASE_KEY", "bench")
+        os.environ["ENABLE_AUDIT_LOGGING"] = "False"
+        if not args.verbose:
+            logging.disable(logging.WARNING)
+
+        print(f"Mock Vista: {config.records} registros/endpoint, {config.deals} negócios em {config.pipes} pipes, "
+              f"~{config.activities_per_deal:g} atividades/negócio, latência {config.latency_ms:g} ms "
+              f"({config.latency_distribution}), 429={config.rate_429:g}, 500={config.rate_500:g}, "
+              f"página <= {config.page_size_limit}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            from src.config import validate
+            validate()  # imprime o resumo da configuração
+        asyncio.run(run(url, measure_memory=not args.no_memory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Microbenchmark do SecureLogger: custo por mensagem da sanitização (seis re.sub
+sequenciais versus uma alternação pré-compilada), de chamadas em nível desabilitado e
+tempo bloqueado em quem loga quando a saída é lenta (StreamHandler direto versus fila).
+
+Uso:
+    python -m benchmarks.bench_logging [--messages 100000]
+"""
+
+import argparse
+import logging
+import re
+import time
+
+
+from src.utils import secure_logger
+from src.utils.secure_logger import SecureLogger, get_queue_handler, shutdown_logging
+
+MESSAGES = [
+    "negocios: Página 12 processada. Total páginas: 340",
+    "Lote 7 processado (1000 registros)",
+    "Erro API (Tentativa 2): Cliente joao@example.com CPF 123.456.789-00",
+    "Rate limit (429) em clientes/listar. Esperando 1.50s",
+]
+
+
+def legacy_sanitize(message):
+    for pattern, replacement in SecureLogger.SENSITIVE_PATTERNS:
+        message = re.sub(pattern, replacement, message, flags=re.IGNORECASE)
+    return message
+
+
+def per_message(func, n):
+    start = time.perf_counter()
+    for i in range(n):
+        func(i)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+class SlowStream:
+    """Saída que leva 1 ms por escrita (stdout de CI congestionado)."""
+
+    def write(self, text):
+        time.sleep(0.001)
+
+    def flush(self):
+        pass
+
+
+def blocked_time(handler, n):
+    logger = logging.getLogger(f"bench_slow_{id(handler)}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    start = time.perf_counter()
+    for i in range(n):
+        logger.info("Lote %d processado", i)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.messages
+
+    logger = SecureLogger("bench_logging")
+    logger.logger.handlers = [logging.NullHandler()]
+    logger.logger.propagate = False
+
+    rows = (
+        ("sanitize (6x re.sub)", lambda i: legacy_sanitize(MESSAGES[i % 4])),
+        ("sanitize (combinada)", lambda i: SecureLogger.sanitize(MESSAGES[i % 4])),
+        ("info f-string (legado)", lambda i: logger.logger.info(legacy_sanitize(f"Lote {i} processado ({i * 2} registros)"))),
+        ("info lazy % (só quem loga)", lambda i: logger.info("Lote %d processado (%d registros)", i, i * 2)),
+        ("debug desabilitado f-string", lambda i: logger.debug(f"Lote {i} processado ({i * 2} registros)")),
+        ("debug desabilitado lazy %", lambda i: logger.debug("Lote %d processado (%d registros)", i, i * 2)),
+    )
+    print(f"{n} mensagens por cenário (µs por mensagem)")
+    for name, func in rows:
+        print(f"  {name:<30} {per_message(func, n):6.2f} µs")
+
+    slow = 500
+    direct = logging.StreamHandler(SlowStream())
+    secure_logger._log_handler.setStream(SlowStream())
+    queued = get_queue_handler()
+    print(f"{slow} logs com saída lenta (tempo bloqueado em quem loga)")
+    print(f"  {'StreamHandler direto':<30} {blocked_time(direct, slow):6.3f} s")
+    print(f"  {'fila + QueueListener':<30} {blocked_time(queued, slow):6.3f} s")
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark do pool de processos: validação de clientes e preparação de lotes
+(dict + limpezas/coerções) no próprio processo versus em N workers.
+
+Uso:
+    python -m benchmarks.bench_parallel [--rows 200000] [--workers 4]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import os
+import time
+
+from benchmarks.bench_validators import make_rows
+from src.utils.parallel import imap_ordered, shutdown_process_pool
+from src.utils.transformers import transform_batch
+from src.utils.validators import validate_batch, validate_cliente
+
+
+def run_validation(rows, workers):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return validate_batch(rows, validate_cliente, workers=workers)
+
+
+def run_transform(rows, workers):
+    batches = (("clientes", rows[i:i + 1000]) for i in range(0, len(rows), 1000))
+    return [batch for batch, _ in imap_ordered(transform_batch, batches, workers=workers)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows} clientes, {os.cpu_count()} CPUs")
+    for stage, func in (("validação", run_validation), ("transformação", run_transform)):
+        baseline = None
+        for workers in (1, args.workers):
+            data = copy.deepcopy(rows)
+            start = time.perf_counter()
+            func(data, workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"  {stage:<14} workers={workers:<3} {elapsed:7.3f}s  ({baseline / elapsed:4.2f}x)")
+    shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    main()
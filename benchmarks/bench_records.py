@@ -0,0 +1,104 @@
+"""
+Benchmark de memória (tracemalloc): atividades e negócios como dicionários
+versus registros compactos com slots e strings internadas.
+
+Uso:
+    python -m benchmarks.bench_records [--deals 20000] [--activities-per-deal 10]
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from src.utils.records import ACTIVITY_API_FIELDS, DEAL_FIELDS, DealRecord, activities_from_columns, as_dicts
+
+BROKERS = [f"Corretor {i}" for i in range(40)]
+TYPES = ["Visita", "Ligação", "Proposta", "E-mail", "WhatsApp"]
+
+
+def fresh(text):
+    """Cria uma string nova (como o json.loads faz para cada valor da resposta)."""
+    return "".join(list(text))
+
+
+def make_payload(deal_id, n_activities):
+    """Resposta colunar do endpoint negocios/atividades."""
+    payload = {}
+    for field in ACTIVITY_API_FIELDS:
+        if field == "NomeCorretor" or field == "FotoCorretor":
+            values = [fresh(f"https://cdn.vista/{BROKERS[(deal_id + i) % 40]}.jpg") for i in range(n_activities)]
+        elif field == "TipoAtividade":
+            values = [fresh(TYPES[i % len(TYPES)]) for i in range(n_activities)]
+        else:
+            values = [fresh(f"{field}-{deal_id}-{i}") for i in range(n_activities)]
+        payload[field] = values
+    return payload
+
+
+def make_deal(deal_id):
+    deal = {field: fresh(f"{field}-{deal_id}") for field in DEAL_FIELDS}
+    deal["NomeCorretor"] = fresh(BROKERS[deal_id % 40])
+    return deal
+
+
+def legacy_crawl(n_deals, per_deal):
+    """Implementação anterior: dicionários brutos + processados e uma dict por atividade."""
+    all_negocios, processed_negocios, all_activities = [], [], []
+    for deal_id in range(n_deals):
+        raw = make_deal(deal_id)
+        raw["CorretoresNegocio"] = [{"CorretorNegocio": "1", "NomeCorretor": raw["NomeCorretor"]}]
+        all_negocios.append(raw)
+        processed_negocios.append({field: raw.get(field) for field in DEAL_FIELDS})
+    for deal in all_negocios:
+        data = make_payload(int(deal["Codigo"].rsplit("-", 1)[1]), per_deal)
+        for i in range(per_deal):
+            flat = {"CodigoNegocio": deal["Codigo"]}
+            for field in ACTIVITY_API_FIELDS:
+                flat[field] = data[field][i] if len(data[field]) > i else ""
+            flat["Data"] = flat.pop("AtividadeCreatedAt")
+            if not flat.get("NomeCorretor") and deal.get("NomeCorretor"):
+                flat["NomeCorretor"] = deal.get("NomeCorretor")
+            all_activities.append(flat)
+    return all_negocios, processed_negocios, all_activities
+
+
+def compact_crawl(n_deals, per_deal):
+    """Implementação atual: apenas DealRecord/ActivityRecord."""
+    deals, activities = [], []
+    for deal_id in range(n_deals):
+        deals.append(DealRecord.from_mapping(make_deal(deal_id)))
+    for deal in deals:
+        data = make_payload(int(deal.Codigo.rsplit("-", 1)[1]), per_deal)
+        activities.extend(activities_from_columns(deal, data))
+    # Serialização acontece lote a lote no loader
+    for i in range(0, len(activities), 1000):
+        as_dicts(activities[i:i + 1000])
+    return deals, activities
+
+
+def measure(func, *args):
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deals", type=int, default=20_000)
+    parser.add_argument("--activities-per-deal", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{args.deals} negócios x {args.activities_per_deal} atividades")
+    baseline = None
+    for name, func in (("dicionários (legado)", legacy_crawl), ("registros compactos", compact_crawl)):
+        current, peak = measure(func, args.deals, args.activities_per_deal)
+        baseline = baseline or peak
+        print(f"  {name:<22} retido {current / 2**20:8.1f} MiB   pico {peak / 2**20:8.1f} MiB  ({peak / baseline:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Microbenchmark: sanitização célula a célula (loop legado do save_to_supabase)
+versus o transformador compilado por tabela.
+
+Uso:
+    python -m benchmarks.bench_transformers [--rows 100000]
+"""
+
+import argparse
+import time
+
+from src.utils.transformers import get_transformer
+
+
+def legacy_sanitize(batch):
+    """Loop original do save_to_supabase + limpeza de CorretorNome do extrator de imóveis."""
+    for item in batch:
+        for key, value in item.items():
+            if value == "":
+                item[key] = None
+            elif isinstance(value, str) and (value.startswith("0000-00-00") or value == "0000-00-00 00:00:00"):
+                item[key] = None
+    for imovel in batch:
+        if "CorretorNome" in imovel and imovel["CorretorNome"] and ":" in imovel["CorretorNome"]:
+            parts = imovel["CorretorNome"].split(":", 1)
+            if len(parts) > 1:
+                imovel["CorretorNome"] = parts[1].strip()
+
+
+def make_rows(n_rows, n_columns=40):
+    columns = [f"Campo{i}" for i in range(n_columns - 1)] + ["CorretorNome"]
+    samples = ["", "0000-00-00 00:00:00", "Centro", "123456.00", "2024-05-01 10:00:00", "Sim", "42: Fulano de Tal"]
+    return [
+        {column: samples[(i + j) % len(samples)] for j, column in enumerate(columns)}
+        for i in range(n_rows)
+    ]
+
+
+def timed(func, payload):
+    start = time.perf_counter()
+    func(payload)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    transformer = get_transformer("imoveis")
+    results = {
+        "legado (célula a célula)": timed(legacy_sanitize, make_rows(args.rows)),
+        "transform_rows": timed(transformer.transform_rows, make_rows(args.rows)),
+    }
+
+    rows = make_rows(args.rows)
+    columns = {key: [row[key] for row in rows] for key in rows[0]}
+    results["transform_columns"] = timed(transformer.transform_columns, columns)
+
+    try:
+        import pandas as pd
+    except ImportError:
+        pd = None
+    if pd is not None:
+        frame = pd.DataFrame.from_records(make_rows(args.rows))
+        results["transform_frame (pandas)"] = timed(transformer.transform_frame, frame)
+
+    baseline = results["legado (célula a célula)"]
+    print(f"{args.rows} linhas x {len(rows[0])} colunas")
+    for name, seconds in results.items():
+        print(f"  {name:<28} {seconds * 1000:9.1f} ms  ({baseline / seconds:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
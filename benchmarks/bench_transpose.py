@@ -0,0 +1,73 @@
+"""
+Microbenchmark de CPU: transposição colunar -> linhas das respostas de negocios/atividades.
+Compara o laço aninhado anterior (checagens por campo e por linha) com activities_from_columns.
+
+Uso:
+    python -m benchmarks.bench_transpose [--deals 5000] [--activities-per-deal 20]
+"""
+
+import argparse
+import time
+
+from src.utils.records import ACTIVITY_API_FIELDS, activities_from_columns
+
+
+def legacy_transpose(deal, data, fields_atividades):
+    """Laço original de fetch_deal_activities."""
+    deal_id = deal.get("Codigo")
+    deal_activities = []
+    for i in range(len(data["CodigoAtividade"])):
+        flat_activity = {"CodigoNegocio": deal_id}
+        for field in fields_atividades:
+            if field in data and isinstance(data[field], list) and len(data[field]) > i:
+                flat_activity[field] = data[field][i]
+            else:
+                flat_activity[field] = ""
+        if "AtividadeCreatedAt" in flat_activity:
+            flat_activity["Data"] = flat_activity.pop("AtividadeCreatedAt")
+        if not flat_activity.get("CodigoCliente") and deal.get("CodigoCliente"):
+            flat_activity["CodigoCliente"] = deal.get("CodigoCliente")
+        if not flat_activity.get("CodigoCorretor") and deal.get("CodigoCorretor"):
+            flat_activity["CodigoCorretor"] = deal.get("CodigoCorretor")
+        if not flat_activity.get("NomeCliente") and deal.get("NomeCliente"):
+            flat_activity["NomeCliente"] = deal.get("NomeCliente")
+        if not flat_activity.get("NomeCorretor") and deal.get("NomeCorretor"):
+            flat_activity["NomeCorretor"] = deal.get("NomeCorretor")
+        deal_activities.append(flat_activity)
+    return deal_activities
+
+
+def make_payload(n_activities):
+    # Alguns campos ausentes e colunas curtas, como o Vista às vezes devolve
+    fields = [f for f in ACTIVITY_API_FIELDS if f not in ("Icone", "Duracao")]
+    payload = {field: [f"{field}{i}" for i in range(n_activities)] for field in fields}
+    payload["CodigoCliente"] = [""] * n_activities
+    payload["Texto"] = payload["Texto"][:-1]
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--deals", type=int, default=5_000)
+    parser.add_argument("--activities-per-deal", type=int, default=20)
+    args = parser.parse_args()
+
+    deal = {"Codigo": "1", "CodigoCliente": "C1", "CodigoCorretor": "B1", "NomeCliente": "Ana", "NomeCorretor": "Bia"}
+    payloads = [make_payload(args.activities_per_deal) for _ in range(args.deals)]
+    fields = list(ACTIVITY_API_FIELDS)
+
+    results = {}
+    for name, func in (("laço aninhado (legado)", legacy_transpose), ("activities_from_columns", activities_from_columns)):
+        start = time.perf_counter()
+        for payload in payloads:
+            func(deal, payload, fields)
+        results[name] = time.perf_counter() - start
+
+    baseline = results["laço aninhado (legado)"]
+    print(f"{args.deals} negócios x {args.activities_per_deal} atividades")
+    for name, seconds in results.items():
+        print(f"  {name:<26} {seconds * 1000:9.1f} ms  ({baseline / seconds:4.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark dos caches de validação: clientes com documentos, telefones e datas
+repetidos (clientes compartilhados entre negócios) com cache frio e quente, e a
+coluna de CPF/CNPJ validada em lotes sucessivos (como no save em blocos) com e
+sem o cache de documentos entre os lotes.
+
+Uso:
+    python -m benchmarks.bench_validation_cache [--rows 100000] [--unique 5000] [--batch 10000]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import random
+import time
+
+from benchmarks.bench_validators import make_cpf, make_rows
+from src.utils.cache import cache_stats, clear_caches
+from src.utils.validators import ValidationError, validate_cliente, validate_cliente_batch, validate_cpf_cnpj_batch
+
+
+def per_record(rows):
+    for row in rows:
+        try:
+            validate_cliente(row)
+        except ValidationError:
+            pass
+
+
+def documents_in_batches(rows, unique, batch, keep_cache):
+    """Valida a coluna de documentos em lotes; sem keep_cache, cada lote começa com o cache vazio."""
+    rng = random.Random(7)
+    documents = [make_cpf(rng) for _ in range(unique)]
+    column = [documents[rng.randrange(unique)] for _ in range(rows)]
+    clear_caches()
+    start = time.perf_counter()
+    for i in range(0, rows, batch):
+        if not keep_cache:
+            clear_caches()
+        validate_cpf_cnpj_batch(column[i:i + batch])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--unique", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{args.rows} clientes")
+    for scenario, n_unique in (("todos distintos", args.rows), (f"{args.unique} distintos", args.unique)):
+        unique = make_rows(n_unique)
+        rows = [dict(unique[i % n_unique], Codigo=str(i)) for i in range(args.rows)]
+        for name, func in (("registro a registro", per_record), ("em lote (colunas)", validate_cliente_batch)):
+            clear_caches()
+            data = copy.deepcopy(rows)
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                func(data)
+                elapsed = time.perf_counter() - start
+            hit_rates = ", ".join(f"{cache} {stats['hit_rate']:.0%}" for cache, stats in cache_stats().items()
+                                  if stats["hits"] or stats["misses"])
+            print(f"  {scenario:<16} {name:<20} {elapsed:7.3f}s  [{hit_rates}]")
+
+    print(f"CPF/CNPJ em lotes de {args.batch} ({args.unique} documentos distintos)")
+    cold = documents_in_batches(args.rows, args.unique, args.batch, keep_cache=False)
+    warm = documents_in_batches(args.rows, args.unique, args.batch, keep_cache=True)
+    print(f"  {'sem cache entre lotes':<37} {cold:7.3f}s")
+    print(f"  {'cache de documentos':<37} {warm:7.3f}s  ({cold / warm:4.2f}x)")
+
+if __name__ == "__main__":
+    main()
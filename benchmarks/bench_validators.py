@@ -0,0 +1,80 @@
+"""
+Benchmark da validação de clientes: registro a registro (validate_cliente)
+versus em lote, coluna a coluna (validate_cliente_batch).
+
+Uso:
+    python -m benchmarks.bench_validators [--rows 100000]
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import random
+import time
+
+from src.utils import validators
+from src.utils.validators import ValidationError, validate_cliente, validate_cliente_batch
+
+
+def make_cpf(rng):
+    digits = [rng.randint(0, 9) for _ in range(9)]
+    for weights in (range(10, 1, -1), range(11, 1, -1)):
+        total = sum(d * w for d, w in zip(digits, weights))
+        digits.append(total * 10 % 11 % 10)
+    text = "".join(map(str, digits))
+    return f"{text[:3]}.{text[3:6]}.{text[6:9]}-{text[9:]}"
+
+
+def make_rows(n, seed=42):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "Codigo": str(i),
+            "Nome": f"Cliente <b>{i}</b>",
+            "CPFCNPJ": make_cpf(rng) if rng.random() < 0.9 else "123.456.789-00",
+            "EmailResidencial": f"cliente{i}@example.com" if rng.random() < 0.95 else "invalido",
+            "Celular": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+            "Observacoes": "Cliente desde 2020",
+            "DataCadastro": "2024-01-15 10:00:00",
+        })
+    return rows
+
+
+def per_record(rows):
+    validated = []
+    for row in rows:
+        try:
+            validated.append(validate_cliente(row))
+        except ValidationError:
+            pass
+    return validated
+
+
+def per_column(rows):
+    return validate_cliente_batch(rows)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows} clientes (NumPy {'disponível' if validators._numpy() else 'ausente'})")
+    baseline = None
+    results = []
+    for name, func in (("registro a registro", per_record), ("em lote (colunas)", per_column)):
+        data = copy.deepcopy(rows)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            results.append(func(data))
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"  {name:<20} {elapsed:7.3f}s  ({baseline / elapsed:4.2f}x)")
+    assert results[0] == results[1], "resultados divergentes"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+-- Papéis e funções que o Supabase provê e que schema.sql/migrations pressupõem,
+-- mais funções auxiliares do benchmark (apenas no banco local).
+
+CREATE ROLE anon NOLOGIN;
+CREATE ROLE service_role NOLOGIN BYPASSRLS;
+CREATE ROLE authenticator LOGIN NOINHERIT PASSWORD 'authenticator';
+GRANT anon, service_role TO authenticator;
+
+-- auth.role(): papel do JWT da requisição (como no Supabase)
+CREATE SCHEMA IF NOT EXISTS auth;
+CREATE OR REPLACE FUNCTION auth.role()
+RETURNS TEXT AS $$
+  SELECT coalesce(
+    nullif(current_setting('request.jwt.claim.role', true), ''),
+    (nullif(current_setting('request.jwt.claims', true), '')::jsonb ->> 'role')
+  )::TEXT;
+$$ LANGUAGE sql STABLE;
+
+GRANT USAGE ON SCHEMA auth TO anon, service_role;
+GRANT USAGE ON SCHEMA public TO anon, service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON TABLES TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT ALL ON SEQUENCES TO service_role;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT EXECUTE ON FUNCTIONS TO service_role;
+
+-- Estatísticas da tabela para medir inchaço (tuplas mortas e tamanho em disco)
+CREATE OR REPLACE FUNCTION bench_table_stats(p_table TEXT)
+RETURNS JSON AS $$
+  SELECT json_build_object(
+    'live_tuples', s.n_live_tup,
+    'dead_tuples', s.n_dead_tup,
+    'table_bytes', pg_table_size(s.relid),
+    'index_bytes', pg_indexes_size(s.relid),
+    'total_bytes', pg_total_relation_size(s.relid),
+    'autovacuum_count', s.autovacuum_count
+  )
+  FROM pg_stat_user_tables s
+  WHERE s.schemaname = 'public' AND s.relname = p_table;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+-- Esvazia a tabela entre cenários (CASCADE: atividades dependem de negocios)
+CREATE OR REPLACE FUNCTION bench_truncate(p_table TEXT)
+RETURNS VOID AS $$
+BEGIN
+  EXECUTE format('TRUNCATE TABLE public.%I CASCADE', p_table);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
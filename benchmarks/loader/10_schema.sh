@@ -0,0 +1,8 @@
+#!/bin/sh
+# Aplica schema.sql e as migrations em ordem (novas migrations entram automaticamente)
+set -e
+psql -v ON_ERROR_STOP=1 -U "$POSTGRES_USER" -d "$POSTGRES_DB" -f /schema/schema.sql
+for migration in $(ls /schema/migrations/*.sql | sort); do
+    echo "Aplicando $migration"
+    psql -v ON_ERROR_STOP=1 -U "$POSTGRES_USER" -d "$POSTGRES_DB" -f "$migration"
+done
@@ -0,0 +1,8 @@
+-- Colunas gravadas pelo ETL que não constam em schema.sql (criadas direto no Supabase),
+-- para que o upsert do benchmark envie exatamente o que a carga real envia.
+ALTER TABLE atividades ADD COLUMN IF NOT EXISTS "NomeCliente" TEXT;
+ALTER TABLE atividades ADD COLUMN IF NOT EXISTS "NomeCorretor" TEXT;
+
+GRANT ALL ON ALL TABLES IN SCHEMA public TO service_role;
+GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public TO service_role;
+NOTIFY pgrst, 'reload schema';
@@ -0,0 +1,320 @@
+"""
+Servidor local que imita a API Vista para benchmarks offline.
+
+Serve os formatos reais de resposta:
+- dict-of-dicts com "total"/"paginas"/"pagina"/"quantidade" (imoveis, clientes, pipes, negocios/listar...)
+- paginação "meta" com "items" e página na URL (corretores)
+- negocios/detalhes (um negócio com CorretoresNegocio)
+- negocios/atividades colunar ({"Campo": [v1, v2, ...]})
+
+Tamanho dos dados, distribuição de latência, injeção de 429/500 e limite de itens por
+página são configuráveis. Os registros são gerados deterministicamente a partir do índice,
+sem materializar o conjunto inteiro.
+
+Uso (servidor avulso, ex.: para apontar VISTA_API_URL e rodar o ETL inteiro):
+    python -m benchmarks.mock_vista [--port 8765] [--records 10000] [--latency-ms 50] [--rate-429 0.01]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+# Endpoints dict-of-dicts simples (o tamanho de cada um vem de MockVistaConfig.records)
+LIST_ENDPOINTS = (
+    "imoveis/listar", "clientes/listar", "usuarios/listar", "agencias/listar",
+    "proprietarios/listar", "agenda/listar",
+)
+META_ENDPOINTS = ("corretores",)
+
+STATUS = ("Aberto", "Ganho", "Perdido")
+ETAPAS = ("Contato", "Visita", "Proposta", "Fechamento")
+TIPOS_ATIVIDADE = ("Ligação", "Visita", "E-mail", "WhatsApp", "Proposta")
+
+
+class MockVistaConfig:
+    """Parâmetros do servidor simulado."""
+
+    def __init__(
+        self,
+        records: int = 10_000,
+        pipes: int = 4,
+        deals: int = 2_000,
+        activities_per_deal: float = 5.0,
+        page_size_limit: int = 50,
+        latency_ms: float = 0.0,
+        latency_distribution: str = "fixed",
+        rate_429: float = 0.0,
+        rate_500: float = 0.0,
+        seed: int = 42,
+    ):
+        """
+        Args:
+            records: Registros por endpoint de listagem (imoveis, clientes, corretores...)
+            pipes: Pipes (funis) retornados por pipes/listar
+            deals: Negócios no total, distribuídos entre os pipes
+            activities_per_deal: Média de atividades por negócio (0 a 2x a média)
+            page_size_limit: Máximo de itens por página (pedidos maiores são truncados, como na API)
+            latency_ms: Latência média por requisição
+            latency_distribution: fixed, uniform (0 a 2x) ou lognormal (cauda longa)
+            rate_429: Fração de requisições respondidas com 429
+            rate_500: Fração de requisições respondidas com 500
+            seed: Semente dos dados e da injeção de erros
+        """
+        self.records = records
+        self.pipes = pipes
+        self.deals = deals
+        self.activities_per_deal = activities_per_deal
+        self.page_size_limit = page_size_limit
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.seed = seed
+
+
+def _rng(seed: int, *key: Any) -> random.Random:
+    # Semente em str: estável entre processos (hash() de str varia com PYTHONHASHSEED)
+    return random.Random(":".join(map(str, (seed,) + key)))
+
+
+def _record(endpoint: str, index: int, seed: int) -> Dict[str, Any]:
+    rng = _rng(seed, endpoint, index)
+    return {
+        "Codigo": str(index + 1),
+        "Nome": f"Registro {index + 1}",
+        "Email": f"contato{index}@example.com",
+        "Celular": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+        "Cidade": rng.choice(("São Paulo", "Campinas", "Santos")),
+        "ValorVenda": str(rng.randint(100, 5000) * 1000),
+        "DataCadastro": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "Corretor": f"ID:{rng.randint(1, 40)} Corretor",
+    }
+
+
+def _deal(index: int, pipe: int, seed: int) -> Dict[str, Any]:
+    rng = _rng(seed, "negocio", index)
+    status = rng.choice(STATUS)
+    etapa = rng.randrange(len(ETAPAS))
+    return {
+        "Codigo": str(index + 1),
+        "NomePipe": f"Pipe {pipe}",
+        "UltimaAtualizacao": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00",
+        "NomeNegocio": f"Negócio {index + 1}",
+        "Status": status,
+        "DataInicial": "2024-01-02",
+        "DataFinal": "2024-06-30" if status != "Aberto" else "",
+        "ValorNegocio": str(rng.randint(100, 5000) * 1000),
+        "PrevisaoFechamento": "2024-12-31",
+        "VeiculoCaptacao": rng.choice(("Site", "Portal", "Indicação")),
+        "CodigoMotivoPerda": "3" if status == "Perdido" else "",
+        "MotivoPerda": "Preço" if status == "Perdido" else "",
+        "ObservacaoPerda": "",
+        "CodigoPipe": str(pipe),
+        "EtapaAtual": str(etapa + 1),
+        "NomeEtapa": ETAPAS[etapa],
+        "CodigoCliente": str(rng.randint(1, 50_000)),
+        "NomeCliente": f"Cliente {index}",
+        "FotoCliente": "",
+        "CodigoImovel": str(rng.randint(1, 20_000)),
+        "StatusAtividades": rng.choice(("Em dia", "Atrasada")),
+    }
+
+
+def _activity_columns(deal_id: int, config: MockVistaConfig, fields: List[str], limit: int) -> Dict[str, List[Any]]:
+    rng = _rng(config.seed, "atividades", deal_id)
+    count = min(rng.randint(0, int(round(2 * config.activities_per_deal))), limit)
+    columns: Dict[str, List[Any]] = {field: [] for field in fields}
+    for n in range(count):
+        row = {
+            "CodigoAtividade": str(deal_id * 1000 + n),
+            "Assunto": f"Atividade {n}",
+            "Texto": "Cliente pediu retorno na próxima semana",
+            "TipoAtividade": rng.choice(TIPOS_ATIVIDADE),
+            "Status": rng.choice(("Concluída", "Pendente")),
+            "AtividadeCreatedAt": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 09:30:00",
+            "CodigoCorretor": str(rng.randint(1, 40)),
+            "Concluido": rng.choice(("Sim", "Não")),
+            "Duracao": str(rng.choice((15, 30, 60))),
+        }
+        for field in fields:
+            columns[field].append(row.get(field, ""))
+    return columns
+
+
+def _sample_latency(rng: random.Random, config: MockVistaConfig) -> float:
+    mean = config.latency_ms / 1000
+    if mean <= 0:
+        return 0.0
+    if config.latency_distribution == "uniform":
+        return rng.uniform(0, 2 * mean)
+    if config.latency_distribution == "lognormal":
+        # sigma 0.8: p99 por volta de 4x a mediana; mu ajustado para manter a média
+        sigma = 0.8
+        return rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+    return mean
+
+
+def _page_request(request: web.Request, config: MockVistaConfig):
+    try:
+        pesquisa = json.loads(request.query.get("pesquisa", "{}"))
+    except json.JSONDecodeError:
+        pesquisa = {}
+    paginacao = pesquisa.get("paginacao") or {}
+    page = int(request.query.get("page") or paginacao.get("pagina") or 1)
+    quantity = min(int(paginacao.get("quantidade") or config.page_size_limit), config.page_size_limit)
+    return pesquisa, max(page, 1), max(quantity, 1)
+
+
+def _dict_of_dicts(items: List[Dict[str, Any]], total: int, page: int, quantity: int) -> Dict[str, Any]:
+    # Como na API: cada registro indexado pelo próprio Codigo
+    body: Dict[str, Any] = {item["Codigo"]: item for item in items}
+    body.update({"total": total, "paginas": max(math.ceil(total / quantity), 1), "pagina": page, "quantidade": quantity})
+    return body
+
+
+class MockVistaServer:
+    """Aplicação aiohttp que responde como a API Vista."""
+
+    def __init__(self, config: Optional[MockVistaConfig] = None):
+        self.config = config or MockVistaConfig()
+        self.stats: Counter = Counter()
+        self._rng = random.Random(self.config.seed)
+        self._pipe_sizes = self._split_deals()
+        self.app = web.Application(middlewares=[self._inject_faults])
+        self.app.router.add_get("/__stats", self._handle_stats)
+        self.app.router.add_get("/{endpoint:.+}", self._handle)
+
+    def _split_deals(self) -> List[int]:
+        pipes = max(self.config.pipes, 1)
+        base, extra = divmod(self.config.deals, pipes)
+        return [base + (1 if i < extra else 0) for i in range(pipes)]
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler):
+        if request.path == "/__stats":
+            return await handler(request)
+        endpoint = request.match_info.get("endpoint") or request.path.lstrip("/")
+        delay = _sample_latency(self._rng, self.config)
+        if delay:
+            await asyncio.sleep(delay)
+        draw = self._rng.random()
+        if draw < self.config.rate_429:
+            status = 429
+            response = web.json_response({"status": 429, "message": "Too Many Requests"}, status=429)
+        elif draw < self.config.rate_429 + self.config.rate_500:
+            status = 500
+            response = web.json_response({"status": 500, "message": "Internal Server Error"}, status=500)
+        else:
+            response = await handler(request)
+            status = response.status
+        self.stats[f"{endpoint} {status}"] += 1
+        return response
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(dict(self.stats))
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        endpoint = request.match_info["endpoint"].strip("/")
+        pesquisa, page, quantity = _page_request(request, self.config)
+        config = self.config
+
+        if endpoint == "pipes/listar":
+            pipes = [{"Codigo": str(i + 1), "Nome": f"Pipe {i + 1}"} for i in range(len(self._pipe_sizes))]
+            start = (page - 1) * quantity
+            return web.json_response(_dict_of_dicts(pipes[start:start + quantity], len(pipes), page, quantity))
+
+        if endpoint == "negocios/listar":
+            pipe = int(request.query.get("codigo_pipe") or 1)
+            if not 1 <= pipe <= len(self._pipe_sizes):
+                return web.json_response(_dict_of_dicts([], 0, page, quantity))
+            offset = sum(self._pipe_sizes[:pipe - 1])
+            total = self._pipe_sizes[pipe - 1]
+            start = (page - 1) * quantity
+            deals = [_deal(offset + i, pipe, config.seed) for i in range(start, min(start + quantity, total))]
+            return web.json_response(_dict_of_dicts(deals, total, page, quantity))
+
+        if endpoint == "negocios/detalhes":
+            deal_id = int(request.query.get("codigo_negocio") or 0)
+            rng = _rng(config.seed, "detalhes", deal_id)
+            broker = rng.randint(1, 40)
+            return web.json_response({
+                "Codigo": str(deal_id),
+                "EmailCliente": f"cliente{deal_id}@example.com",
+                "CelularCliente": f"(11) 9{rng.randint(1000, 9999)}-{rng.randint(1000, 9999)}",
+                "TelefoneCliente": "",
+                "TempoDasEtapasDoNegocio": [{"Etapa": "Contato", "Dias": rng.randint(1, 30)}],
+                "CorretoresNegocio": [{"CorretorNegocio": str(broker), "NomeCorretor": f"ID:{broker} Corretor {broker}"}],
+            })
+
+        if endpoint == "negocios/atividades":
+            deal_id = int(request.query.get("codigo_negocio") or 0)
+            fields = [f for f in pesquisa.get("fields", []) if isinstance(f, str)]
+            return web.json_response(_activity_columns(deal_id, config, fields, quantity))
+
+        start = (page - 1) * quantity
+        items = [_record(endpoint, i, config.seed) for i in range(start, min(start + quantity, config.records))]
+        if endpoint in META_ENDPOINTS:
+            return web.json_response({
+                "items": items,
+                "meta": {"totalItems": config.records, "totalPages": max(math.ceil(config.records / quantity), 1),
+                         "currentPage": page},
+            })
+        if endpoint in LIST_ENDPOINTS:
+            return web.json_response(_dict_of_dicts(items, config.records, page, quantity))
+        return web.json_response({"status": 404, "message": f"Endpoint desconhecido: {endpoint}"}, status=404)
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Opções de MockVistaConfig (compartilhadas com os benchmarks que sobem o servidor)."""
+    defaults = MockVistaConfig()
+    parser.add_argument("--records", type=int, default=defaults.records)
+    parser.add_argument("--pipes", type=int, default=defaults.pipes)
+    parser.add_argument("--deals", type=int, default=defaults.deals)
+    parser.add_argument("--activities-per-deal", type=float, default=defaults.activities_per_deal)
+    parser.add_argument("--page-size-limit", type=int, default=defaults.page_size_limit)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-distribution", choices=("fixed", "uniform", "lognormal"),
+                        default=defaults.latency_distribution)
+    parser.add_argument("--rate-429", type=float, default=defaults.rate_429)
+    parser.add_argument("--rate-500", type=float, default=defaults.rate_500)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> MockVistaConfig:
+    return MockVistaConfig(
+        records=args.records, pipes=args.pipes, deals=args.deals,
+        activities_per_deal=args.activities_per_deal, page_size_limit=args.page_size_limit,
+        latency_ms=args.latency_ms, latency_distribution=args.latency_distribution,
+        rate_429=args.rate_429, rate_500=args.rate_500, seed=args.seed,
+    )
+
+
+def config_to_argv(config: MockVistaConfig) -> List[str]:
+    """Linha de comando equivalente (para subir o servidor em outro processo)."""
+    return [
+        "--records", str(config.records), "--pipes", str(config.pipes), "--deals", str(config.deals),
+        "--activities-per-deal", str(config.activities_per_deal), "--page-size-limit", str(config.page_size_limit),
+        "--latency-ms", str(config.latency_ms), "--latency-distribution", config.latency_distribution,
+        "--rate-429", str(config.rate_429), "--rate-500", str(config.rate_500), "--seed", str(config.seed),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = MockVistaServer(config_from_args(args))
+    print(f"Mock Vista em http://{args.host}:{args.port}", flush=True)
+    web.run_app(server.app, host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
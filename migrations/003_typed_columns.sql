@@ -0,0 +1,208 @@
+-- Migration: Typed Columns
+-- Descrição: Converte colunas TEXT para tipos nativos (NUMERIC, INTEGER, DATE, TIMESTAMP, BOOLEAN)
+--            conforme a coerção tipada feita pelo ETL (src/utils/transformers.py -> TABLE_SPECS)
+-- Data: 2025-12-15
+-- IMPORTANTE: Execute em staging primeiro! Consultas do BI que comparam 'Sim'/'Nao' como texto
+--             devem passar a usar booleanos (ex: WHERE "Concluido" em vez de WHERE "Concluido" = 'Sim').
+
+-- ============================================
+-- FUNÇÕES DE CAST SEGURO (valor inválido -> NULL)
+-- ============================================
+
+-- Padrão pt-BR do Vista (igual a to_numeric): '1.234,56' -> 1234.56 e '1.234' -> 1234
+-- (ponto seguido de exatamente três dígitos é milhar); '1234.56' segue com ponto decimal
+CREATE OR REPLACE FUNCTION try_cast_numeric(value TEXT)
+RETURNS NUMERIC AS $$
+BEGIN
+  IF value IS NULL OR btrim(value) = '' THEN
+    RETURN NULL;
+  END IF;
+  value := btrim(value);
+  IF position(',' IN value) > 0 OR value ~ '^[+-]?[0-9]{1,3}(\.[0-9]{3})+$' THEN
+    value := replace(replace(value, '.', ''), ',', '.');
+  END IF;
+  RETURN value::NUMERIC;
+EXCEPTION WHEN OTHERS THEN
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Ponto sempre decimal (coordenadas, igual a to_decimal): '-23.550' -> -23.55
+CREATE OR REPLACE FUNCTION try_cast_decimal(value TEXT)
+RETURNS NUMERIC AS $$
+BEGIN
+  IF value IS NULL OR btrim(value) = '' THEN
+    RETURN NULL;
+  END IF;
+  IF position(',' IN value) > 0 THEN
+    value := replace(replace(value, '.', ''), ',', '.');
+  END IF;
+  RETURN btrim(value)::NUMERIC;
+EXCEPTION WHEN OTHERS THEN
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION try_cast_integer(value TEXT)
+RETURNS INTEGER AS $$
+DECLARE
+  number NUMERIC := try_cast_numeric(value);
+BEGIN
+  IF number IS NULL OR number <> trunc(number) THEN
+    RETURN NULL;
+  END IF;
+  RETURN number::INTEGER;
+EXCEPTION WHEN OTHERS THEN
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION try_cast_timestamp(value TEXT)
+RETURNS TIMESTAMP AS $$
+BEGIN
+  IF value IS NULL OR btrim(value) = '' OR value LIKE '0000-00-00%' THEN
+    RETURN NULL;
+  END IF;
+  RETURN value::TIMESTAMP;
+EXCEPTION WHEN OTHERS THEN
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION try_cast_date(value TEXT)
+RETURNS DATE AS $$
+BEGIN
+  RETURN try_cast_timestamp(value)::DATE;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION try_cast_boolean(value TEXT)
+RETURNS BOOLEAN AS $$
+BEGIN
+  CASE lower(btrim(coalesce(value, '')))
+    WHEN 'sim', 's', 'true', 't', '1', 'yes', 'y' THEN RETURN TRUE;
+    WHEN 'nao', 'não', 'n', 'false', 'f', '0', 'no' THEN RETURN FALSE;
+    ELSE RETURN NULL;
+  END CASE;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+-- Altera o tipo de uma coluna apenas se ela existir e ainda não tiver o tipo desejado
+CREATE OR REPLACE FUNCTION _set_column_type(p_table TEXT, p_column TEXT, p_type TEXT, p_cast TEXT)
+RETURNS VOID AS $$
+DECLARE
+  current_type TEXT;
+BEGIN
+  SELECT data_type INTO current_type
+  FROM information_schema.columns
+  WHERE table_schema = 'public' AND table_name = p_table AND column_name = p_column;
+
+  IF current_type IS NULL THEN
+    RAISE NOTICE 'Coluna %.% não existe, ignorando', p_table, p_column;
+    RETURN;
+  END IF;
+
+  IF upper(current_type) LIKE upper(p_type) || '%' THEN
+    RETURN;
+  END IF;
+
+  EXECUTE format(
+    'ALTER TABLE %I ALTER COLUMN %I TYPE %s USING %s(%I::TEXT)',
+    p_table, p_column, p_type, p_cast, p_column
+  );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- CONVERSÃO DAS COLUNAS
+-- ============================================
+
+DO $$
+DECLARE
+  col TEXT;
+BEGIN
+  -- Imóveis
+  FOREACH col IN ARRAY ARRAY['ValorVenda', 'ValorLocacao', 'AreaTotal', 'AreaPrivativa',
+                             'ValorCondominio', 'ValorIptu'] LOOP
+    PERFORM _set_column_type('imoveis', col, 'NUMERIC', 'try_cast_numeric');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['Latitude', 'Longitude'] LOOP
+    PERFORM _set_column_type('imoveis', col, 'NUMERIC', 'try_cast_decimal');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['Dormitorios', 'Suites', 'Vagas', 'AnoConstrucao'] LOOP
+    PERFORM _set_column_type('imoveis', col, 'INTEGER', 'try_cast_integer');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['DataCadastro', 'DataAtualizacao'] LOOP
+    PERFORM _set_column_type('imoveis', col, 'TIMESTAMP', 'try_cast_timestamp');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['AceitaPermuta', 'AceitaFinanciamento', 'Mobiliado', 'Piscina',
+                             'Churrasqueira', 'ArCondicionado', 'Lareira', 'Sacada', 'SuiteMaster',
+                             'Elevador', 'SalaoFestas', 'Portaria24Hrs', 'SalaFitness'] LOOP
+    PERFORM _set_column_type('imoveis', col, 'BOOLEAN', 'try_cast_boolean');
+  END LOOP;
+
+  -- Clientes
+  PERFORM _set_column_type('clientes', 'DataNascimento', 'DATE', 'try_cast_date');
+  FOREACH col IN ARRAY ARRAY['DataCadastro', 'DataAtualizacao'] LOOP
+    PERFORM _set_column_type('clientes', col, 'TIMESTAMP', 'try_cast_timestamp');
+  END LOOP;
+
+  -- Negócios
+  FOREACH col IN ARRAY ARRAY['ValorNegocio', 'ValorLocacao'] LOOP
+    PERFORM _set_column_type('negocios', col, 'NUMERIC', 'try_cast_numeric');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['DataInicial', 'UltimaAtualizacao', 'DataFinal', 'DataPerda', 'DataGanho'] LOOP
+    PERFORM _set_column_type('negocios', col, 'TIMESTAMP', 'try_cast_timestamp');
+  END LOOP;
+  PERFORM _set_column_type('negocios', 'PrevisaoFechamento', 'DATE', 'try_cast_date');
+
+  -- Atividades
+  PERFORM _set_column_type('atividades', 'ValorProposta', 'NUMERIC', 'try_cast_numeric');
+  FOREACH col IN ARRAY ARRAY['Data', 'AtividadeUpdatedAt', 'DataHora', 'DataAtualizacao', 'DataConclusao'] LOOP
+    PERFORM _set_column_type('atividades', col, 'TIMESTAMP', 'try_cast_timestamp');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['Automatico', 'Pendente', 'Privado', 'Excluido', 'Concluido', 'DiaInteiro'] LOOP
+    PERFORM _set_column_type('atividades', col, 'BOOLEAN', 'try_cast_boolean');
+  END LOOP;
+
+  -- Agenda
+  FOREACH col IN ARRAY ARRAY['DataHoraInicio', 'DataHoraFinal', 'DataHora', 'DataHoraAtualizacao'] LOOP
+    PERFORM _set_column_type('agenda', col, 'TIMESTAMP', 'try_cast_timestamp');
+  END LOOP;
+  FOREACH col IN ARRAY ARRAY['Concluido', 'DiaInteiro', 'Particular'] LOOP
+    PERFORM _set_column_type('agenda', col, 'BOOLEAN', 'try_cast_boolean');
+  END LOOP;
+END $$;
+
+-- ============================================
+-- ÍNDICES TIPADOS
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_imoveis_valor_venda ON imoveis("ValorVenda");
+CREATE INDEX IF NOT EXISTS idx_imoveis_data_atualizacao ON imoveis("DataAtualizacao");
+CREATE INDEX IF NOT EXISTS idx_atividades_concluido ON atividades("Concluido") WHERE "Concluido";
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.columns
+             WHERE table_schema = 'public' AND table_name = 'negocios' AND column_name = 'UltimaAtualizacao') THEN
+    CREATE INDEX IF NOT EXISTS idx_negocios_ultima_atualizacao ON negocios("UltimaAtualizacao");
+  END IF;
+END $$;
+
+-- ============================================
+-- COMENTÁRIOS
+-- ============================================
+
+COMMENT ON FUNCTION try_cast_numeric(TEXT) IS 'Cast seguro para NUMERIC no padrão pt-BR (1.234,56 e 1.234 = milhar) - inválido vira NULL';
+COMMENT ON FUNCTION try_cast_decimal(TEXT) IS 'Cast seguro para NUMERIC com ponto decimal (coordenadas) - inválido vira NULL';
+COMMENT ON FUNCTION try_cast_boolean(TEXT) IS 'Cast seguro de Sim/Nao para BOOLEAN - inválido vira NULL';
+
+-- ============================================
+-- VERIFICAÇÃO
+-- ============================================
+
+-- Para conferir os tipos:
+-- SELECT table_name, column_name, data_type FROM information_schema.columns
+--  WHERE table_schema = 'public' AND table_name IN ('imoveis', 'clientes', 'negocios', 'atividades', 'agenda')
+--  ORDER BY table_name, column_name;
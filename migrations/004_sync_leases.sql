@@ -0,0 +1,79 @@
+-- Migration: Sync Leases
+-- Descrição: Leases no sync_state para o crawler de atividades em shards (scripts/sync_activities.py
+--            --shards/--workers). Cada shard de uma execução é uma linha
+--            'atividades:<run_id>:<i>/<N>'; o worker que detém o lease renova antes de expirar e,
+--            ao terminar, marca a linha como 'done' com as contagens em "details".
+--            Lease expirado (worker morto) pode ser assumido por outro worker da mesma execução.
+-- Data: 2026-10-19
+
+ALTER TABLE sync_state ADD COLUMN IF NOT EXISTS "status" TEXT;
+ALTER TABLE sync_state ADD COLUMN IF NOT EXISTS "lease_owner" TEXT;
+ALTER TABLE sync_state ADD COLUMN IF NOT EXISTS "lease_expires_at" TIMESTAMPTZ;
+ALTER TABLE sync_state ADD COLUMN IF NOT EXISTS "details" JSONB;
+
+-- Relatório de uma execução: WHERE entity LIKE 'atividades:<run_id>:%'
+CREATE INDEX IF NOT EXISTS idx_sync_state_entity_pattern ON sync_state (entity text_pattern_ops);
+
+-- ============================================
+-- ADQUIRIR / RENOVAR LEASE
+-- ============================================
+-- Retorna TRUE se p_owner passou a deter (ou renovou) o lease. Falha se a linha já está 'done'
+-- ou se outro worker detém um lease ainda válido. Atômico (INSERT ... ON CONFLICT).
+
+CREATE OR REPLACE FUNCTION acquire_sync_lease(p_entity TEXT, p_owner TEXT, p_ttl_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+DECLARE
+  acquired TEXT;
+BEGIN
+  INSERT INTO sync_state (entity, status, lease_owner, lease_expires_at)
+  VALUES (p_entity, 'running', p_owner, now() + make_interval(secs => p_ttl_seconds))
+  ON CONFLICT (entity) DO UPDATE
+     SET status = 'running',
+         lease_owner = EXCLUDED.lease_owner,
+         lease_expires_at = EXCLUDED.lease_expires_at
+   WHERE sync_state.status IS DISTINCT FROM 'done'
+     AND (sync_state.lease_owner IS NULL
+          OR sync_state.lease_owner = p_owner
+          OR sync_state.lease_expires_at < now())
+  RETURNING entity INTO acquired;
+  RETURN acquired IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- CONCLUIR / LIBERAR LEASE
+-- ============================================
+-- Só o dono atual conclui ou libera; FALSE indica que o lease foi perdido (expirou e outro worker assumiu).
+
+CREATE OR REPLACE FUNCTION complete_sync_lease(p_entity TEXT, p_owner TEXT, p_details JSONB)
+RETURNS BOOLEAN AS $$
+DECLARE
+  completed TEXT;
+BEGIN
+  UPDATE sync_state
+     SET status = 'done',
+         details = p_details,
+         lease_owner = NULL,
+         lease_expires_at = NULL,
+         last_run = now()
+   WHERE entity = p_entity AND lease_owner = p_owner
+  RETURNING entity INTO completed;
+  RETURN completed IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION release_sync_lease(p_entity TEXT, p_owner TEXT, p_details JSONB)
+RETURNS BOOLEAN AS $$
+DECLARE
+  released TEXT;
+BEGIN
+  UPDATE sync_state
+     SET status = 'failed',
+         details = p_details,
+         lease_owner = NULL,
+         lease_expires_at = NULL
+   WHERE entity = p_entity AND lease_owner = p_owner
+  RETURNING entity INTO released;
+  RETURN released IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,85 @@
+-- Migration: Scoped Enrichment
+-- Descrição: Variantes por chave dos enriquecimentos pós-carga (enrich_imoveis_team,
+--            enrich_negocios_team, enrich_atividades_names). O ETL passa os códigos que acabou de
+--            gravar (em blocos) e só essas linhas são tocadas; linhas cujo valor já está correto não
+--            são reescritas (IS DISTINCT FROM), evitando versões mortas (bloat) a cada execução.
+--            As funções originais (sem argumentos) continuam disponíveis para um reprocessamento completo.
+-- Data: 2026-10-19
+-- DEPRECIADA: o enriquecimento passou a ser feito no ETL, antes da gravação (src/utils/enrichment.py),
+--             e nada mais chama as funções *_scoped abaixo; migrations/007_drop_scoped_enrichment.sql
+--             as remove. As colunas "EquipeCorretor" e os índices continuam em uso.
+
+ALTER TABLE imoveis ADD COLUMN IF NOT EXISTS "EquipeCorretor" TEXT;
+ALTER TABLE negocios ADD COLUMN IF NOT EXISTS "EquipeCorretor" TEXT;
+
+-- Junções dos enriquecimentos
+CREATE INDEX IF NOT EXISTS idx_imoveis_corretor ON imoveis ("CodigoCorretor");
+CREATE INDEX IF NOT EXISTS idx_negocios_corretor ON negocios ("CodigoCorretor");
+
+-- ============================================
+-- EQUIPE DO CORRETOR (imóveis e negócios)
+-- ============================================
+-- p_keys: valores de "Codigo" gravados na carga. Retorna o número de linhas atualizadas.
+
+CREATE OR REPLACE FUNCTION enrich_imoveis_team_scoped(p_keys TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  UPDATE imoveis i
+     SET "EquipeCorretor" = c."Equipe"
+    FROM corretores c
+   WHERE i."Codigo" = ANY(p_keys)
+     AND c."Codigo" = i."CodigoCorretor"
+     AND i."EquipeCorretor" IS DISTINCT FROM c."Equipe";
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION enrich_negocios_team_scoped(p_keys TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  UPDATE negocios n
+     SET "EquipeCorretor" = c."Equipe"
+    FROM corretores c
+   WHERE n."Codigo" = ANY(p_keys)
+     AND c."Codigo" = n."CodigoCorretor"
+     AND n."EquipeCorretor" IS DISTINCT FROM c."Equipe";
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- NOMES DE CORRETOR E CLIENTE (atividades)
+-- ============================================
+-- p_keys: códigos dos negócios cujas atividades foram gravadas (atividades têm chave composta;
+-- o crawl grava todas as atividades de cada negócio). Usa idx_atividades_negocio.
+
+CREATE OR REPLACE FUNCTION enrich_atividades_names_scoped(p_keys TEXT[])
+RETURNS INTEGER AS $$
+DECLARE
+  updated INTEGER;
+BEGIN
+  WITH names AS (
+    SELECT a."CodigoNegocio", a."CodigoAtividade", u."Nome" AS corretor, cl."Nome" AS cliente
+      FROM atividades a
+      LEFT JOIN usuarios u ON u."Codigo" = a."CodigoCorretor"
+      LEFT JOIN clientes cl ON cl."Codigo" = a."CodigoCliente"
+     WHERE a."CodigoNegocio" = ANY(p_keys)
+  )
+  UPDATE atividades a
+     SET "NomeCorretor" = COALESCE(n.corretor, a."NomeCorretor"),
+         "NomeCliente" = COALESCE(n.cliente, a."NomeCliente")
+    FROM names n
+   WHERE a."CodigoNegocio" = n."CodigoNegocio"
+     AND a."CodigoAtividade" = n."CodigoAtividade"
+     AND (a."NomeCorretor" IS DISTINCT FROM COALESCE(n.corretor, a."NomeCorretor")
+          OR a."NomeCliente" IS DISTINCT FROM COALESCE(n.cliente, a."NomeCliente"));
+  GET DIAGNOSTICS updated = ROW_COUNT;
+  RETURN updated;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,46 @@
+-- Migration: Lost Clients
+-- Descrição: Relatório de clientes com negócio perdido que teve visita ou proposta calculado no banco
+--            (query_lost_clients.py via supabase.rpc('get_lost_clients')), no lugar de trazer negócios
+--            e atividades para o Python. Mesma regra da consulta local lost_clients (src/analytics.py).
+--            A junção usa índices parciais: negócios perdidos e atividades de visita/proposta
+--            (expressão em minúsculas, sem depender de ILIKE '%...%' com varredura da tabela).
+-- Data: 2026-10-19
+
+-- Negócios perdidos: só a fração da tabela que entra no relatório, com as colunas lidas
+CREATE INDEX IF NOT EXISTS idx_negocios_perdidos ON negocios ("Codigo")
+  INCLUDE ("CodigoCliente", "NomeCliente")
+  WHERE "Status" = 'Perdido';
+
+-- Atividades de visita/proposta por negócio. O predicado do índice é repetido literalmente em
+-- get_lost_clients (o planner só usa índice parcial quando a consulta implica o predicado)
+CREATE INDEX IF NOT EXISTS idx_atividades_visita_proposta ON atividades ("CodigoNegocio")
+  WHERE lower(coalesce("EtapaAcao", '') || ' ' || coalesce("TipoAtividade", '')) ~ '(visita|proposta)';
+
+-- ============================================
+-- CLIENTES PERDIDOS COM VISITA/PROPOSTA
+-- ============================================
+-- Uma linha por cliente, ordenada por nome e código (paginação estável com p_limit/p_offset).
+-- "total" é o número de clientes do relatório inteiro (repetido em cada linha da página).
+
+CREATE OR REPLACE FUNCTION get_lost_clients(p_limit INTEGER DEFAULT 1000, p_offset INTEGER DEFAULT 0)
+RETURNS TABLE (
+  "CodigoCliente" TEXT,
+  "NomeCliente" TEXT,
+  negocios_perdidos BIGINT,
+  atividades BIGINT,
+  total BIGINT
+) AS $$
+  SELECT n."CodigoCliente",
+         max(n."NomeCliente") AS "NomeCliente",
+         count(DISTINCT n."Codigo") AS negocios_perdidos,
+         count(*) AS atividades,
+         count(*) OVER () AS total
+    FROM negocios n
+    JOIN atividades a ON a."CodigoNegocio" = n."Codigo"
+   WHERE n."Status" = 'Perdido'
+     AND n."CodigoCliente" IS NOT NULL
+     AND lower(coalesce(a."EtapaAcao", '') || ' ' || coalesce(a."TipoAtividade", '')) ~ '(visita|proposta)'
+   GROUP BY n."CodigoCliente"
+   ORDER BY 2, 1
+   LIMIT p_limit OFFSET p_offset;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,11 @@
+-- Migration: Drop Scoped Enrichment
+-- Descrição: Remove as funções de enriquecimento pós-carga de migrations/005_scoped_enrichment.sql.
+--            Equipe e nomes agora são preenchidos no ETL antes da primeira gravação
+--            (src/utils/enrichment.py) e nenhuma chamada RPC usa mais essas funções.
+--            As colunas "EquipeCorretor" e os índices idx_imoveis_corretor/idx_negocios_corretor
+--            da 005 são mantidos.
+-- Data: 2026-10-19
+
+DROP FUNCTION IF EXISTS enrich_imoveis_team_scoped(TEXT[]);
+DROP FUNCTION IF EXISTS enrich_negocios_team_scoped(TEXT[]);
+DROP FUNCTION IF EXISTS enrich_atividades_names_scoped(TEXT[]);
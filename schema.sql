@@ -120,7 +120,7 @@ CREATE TABLE IF NOT EXISTS clientes (
     "Nome" TEXT,
     "CPFCNPJ" TEXT,
     "RG" TEXT,
-    "DataNascimento" TEXT,
+    "DataNascimento" DATE,
     "Sexo" TEXT,
     "EstadoCivil" TEXT,
     "Profissao" TEXT,
@@ -138,8 +138,8 @@ CREATE TABLE IF NOT EXISTS clientes (
     "UFResidencial" TEXT,
     "CEPResidencial" TEXT,
     "Status" TEXT,
-    "DataCadastro" TEXT,
-    "DataAtualizacao" TEXT,
+    "DataCadastro" TIMESTAMP,
+    "DataAtualizacao" TIMESTAMP,
     "Observacoes" TEXT
 );
 
@@ -212,10 +212,10 @@ CREATE TABLE IF NOT EXISTS atividades (
     "EstadoProposta" TEXT,
     "TextoProposta" TEXT,
     "Aceitacao" TEXT,
-    "Automatico" TEXT,
+    "Automatico" BOOLEAN,
     "Numero" TEXT,
     "Texto" TEXT,
-    "Pendente" TEXT,
+    "Pendente" BOOLEAN,
     "Assunto" TEXT,
     "EtapaAcaoId" TEXT,
     "EtapaAcao" TEXT,
@@ -236,13 +236,13 @@ CREATE TABLE IF NOT EXISTS atividades (
     "Inicio" TEXT,
     "Final" TEXT,
     "Prioridade" TEXT,
-    "Privado" TEXT,
+    "Privado" BOOLEAN,
     "AlertaMinutos" TEXT,
-    "Excluido" TEXT,
-    "Concluido" TEXT,
+    "Excluido" BOOLEAN,
+    "Concluido" BOOLEAN,
     "Tarefa" TEXT,
     "DataConclusao" TIMESTAMP,
-    "DiaInteiro" TEXT,
+    "DiaInteiro" BOOLEAN,
     "TipoAgenda" TEXT,
     "CodigoDev" TEXT,
     "IdGoogleCalendar" TEXT,
@@ -261,6 +261,45 @@ CREATE TABLE IF NOT EXISTS sync_state (
     "updated_at" TIMESTAMP
 );
 
+-- Colunas tipadas de migrations/003_typed_columns.sql que as tabelas acima não declaram
+-- (mesmos tipos de uma base migrada; a coerção do ETL está em src/utils/transformers.py)
+ALTER TABLE imoveis
+    ADD COLUMN IF NOT EXISTS "ValorCondominio" NUMERIC,
+    ADD COLUMN IF NOT EXISTS "ValorIptu" NUMERIC,
+    ADD COLUMN IF NOT EXISTS "Latitude" NUMERIC,
+    ADD COLUMN IF NOT EXISTS "Longitude" NUMERIC,
+    ADD COLUMN IF NOT EXISTS "AnoConstrucao" INTEGER,
+    ADD COLUMN IF NOT EXISTS "AceitaPermuta" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "AceitaFinanciamento" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Mobiliado" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Piscina" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Churrasqueira" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "ArCondicionado" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Lareira" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Sacada" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "SuiteMaster" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Elevador" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "SalaoFestas" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Portaria24Hrs" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "SalaFitness" BOOLEAN;
+
+ALTER TABLE negocios
+    ADD COLUMN IF NOT EXISTS "ValorNegocio" NUMERIC,
+    ADD COLUMN IF NOT EXISTS "DataInicial" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "UltimaAtualizacao" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "DataFinal" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "PrevisaoFechamento" DATE;
+
+-- A tabela agenda não é criada aqui; se existir, recebe os mesmos tipos da migration
+ALTER TABLE IF EXISTS agenda
+    ADD COLUMN IF NOT EXISTS "DataHoraInicio" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "DataHoraFinal" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "DataHora" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "DataHoraAtualizacao" TIMESTAMP,
+    ADD COLUMN IF NOT EXISTS "Concluido" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "DiaInteiro" BOOLEAN,
+    ADD COLUMN IF NOT EXISTS "Particular" BOOLEAN;
+
 -- Índices para Performance
 CREATE INDEX IF NOT EXISTS idx_negocios_data_atualizacao ON negocios("DataAtualizacao");
 CREATE INDEX IF NOT EXISTS idx_negocios_cliente ON negocios("CodigoCliente");
@@ -277,3 +316,9 @@ CREATE INDEX IF NOT EXISTS idx_clientes_cpf ON clientes("CPFCNPJ");
 CREATE INDEX IF NOT EXISTS idx_imoveis_bairro ON imoveis("Bairro");
 CREATE INDEX IF NOT EXISTS idx_imoveis_cidade ON imoveis("Cidade");
 CREATE INDEX IF NOT EXISTS idx_imoveis_status ON imoveis("Status");
+
+-- Índices tipados (migrations/003_typed_columns.sql)
+CREATE INDEX IF NOT EXISTS idx_imoveis_valor_venda ON imoveis("ValorVenda");
+CREATE INDEX IF NOT EXISTS idx_imoveis_data_atualizacao ON imoveis("DataAtualizacao");
+CREATE INDEX IF NOT EXISTS idx_atividades_concluido ON atividades("Concluido") WHERE "Concluido";
+CREATE INDEX IF NOT EXISTS idx_negocios_ultima_atualizacao ON negocios("UltimaAtualizacao");
@@ -1,18 +1,70 @@
+import argparse
 import asyncio
+import functools
 import sys
+import time
 import os
 import aiohttp
-from dotenv import load_dotenv
 
 # Add parent directory to path to import src
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.utils.supabase_client import get_supabase_client, save_to_supabase
-from src.extractors.atividades import extract_activities, enrich_atividades_with_names
-from src.extractors.negocios import extract_negocios, enrich_negocios_with_team
+from src.config import validate
+from src.utils.supabase_client import get_supabase_client
+from src.extractors.atividades import crawl_activity_shards, load_activities_streaming
+from src.extractors.negocios import extract_negocios
+from src.utils.enrichment import load_enrichment_index, stop_enrichment
+from src.utils.secure_logger import allow_identifier, capture_stdout, shutdown_logging
+from src.utils.audit_logger import flush_audit_logs
+from src.utils.metrics import publish_run_metrics, stage
+from src.utils.profiling import add_profile_arguments, run_main
+from src.utils.memory import add_memory_arguments, configure_from_args, get_memory_monitor
+from src.utils.staging import (add_staging_arguments, configure_staging_from_args, get_staging_writer,
+                               stop_staging)
+from src.utils.sharding import (default_run_id, fetch_deals_for_activities, fetch_shard_rows,
+                                format_shard_report, summarize_shards)
 
-async def run_activities_sync():
-    load_dotenv()
+def shard_job_name(shard_index):
+    return "sync_activities" if shard_index is None else f"sync_activities_shard{shard_index + 1}"
+
+async def sync_deals(session):
+    # 1. Extrair e Salvar Negócios (Deals) da API Vista
+    # Isso garante que temos os negócios mais recentes antes de buscar atividades
+    print(">>> Etapa 1: Atualizando Negócios...")
+    with stage("negocios"):
+        return await extract_negocios(session)
+
+async def run_shard_workers(workers, run_id):
+    """
+    Dispara `workers` processos deste script, um por shard, e espera todos terminarem.
+    Cada processo tem o próprio event loop e conexões; os shards que sobrarem de um processo
+    que falhar são assumidos pelos demais (leases no sync_state).
+    """
+    # Com staging ligado, os workers gravam na mesma execução do staging que o processo pai
+    writer = get_staging_writer()
+    staging = ["--stage", "--stage-run-id", writer.run_id] if writer else []
+    processes = [
+        await asyncio.create_subprocess_exec(
+            sys.executable, os.path.abspath(__file__),
+            "--shards", str(workers), "--shard-index", str(index), "--run-id", run_id, *staging)
+        for index in range(workers)
+    ]
+    codes = [await process.wait() for process in processes]
+    failed = [index + 1 for index, code in enumerate(codes) if code != 0]
+    if failed:
+        raise RuntimeError(f"Workers de atividades falharam (shards {failed}) na execução {run_id}")
+
+async def run_activities_sync(shards=1, shard_index=None, run_id=None, workers=0, deals_only=False):
+    """
+    Sem opções: negócios e atividades neste processo. Com shard_index: worker de um shard das
+    atividades (negócios lidos do Supabase). Com workers: negócios aqui e atividades em `workers`
+    processos. Com deals_only: só os negócios (job que precede a matriz de shards).
+    """
+    validate()
+    # O id da execução (GITHUB_RUN_ID tem 11 dígitos, formato de CPF) precisa aparecer nos logs
+    # para o operador repetir um shard ou consultar o relatório
+    if run_id:
+        allow_identifier(run_id)
     
     supabase = get_supabase_client()
     if not supabase:
@@ -20,32 +72,103 @@ async def run_activities_sync():
         return
     
     print("--- Iniciando Sincronização de Negócios e Atividades (Agendada) ---")
+    job = shard_job_name(shard_index)
+    start_time = time.time()
+    status = "SUCCESS"
     
-    async with aiohttp.ClientSession() as session:
-        # 1. Extrair e Salvar Negócios (Deals) da API Vista
-        # Isso garante que temos os negócios mais recentes antes de buscar atividades
-        print(">>> Etapa 1: Atualizando Negócios...")
-        all_deals = await extract_negocios(session)
-        
-        if all_deals:
-            # Enriquecer negócios com equipe (SQL)
-            await enrich_negocios_with_team()
+    try:
+        # Equipe dos negócios e nomes das atividades preenchidos no save (índices lidos do Supabase)
+        with stage("indice_enriquecimento"):
+            await asyncio.to_thread(load_enrichment_index)
+        async with aiohttp.ClientSession() as session:
+            if shard_index is not None:
+                # Negócios já gravados pelo job/processo que extraiu os negócios desta execução
+                deals = await asyncio.to_thread(fetch_deals_for_activities, supabase)
+                print(f"\n>>> Shard {shard_index + 1}/{shards} da execução {run_id} ({len(deals)} negócios no total)...")
+                with stage("atividades"):
+                    summary = await crawl_activity_shards(session, deals, shards, run_id,
+                                                          preferred=shard_index, client=supabase)
+                print(format_shard_report(summary, shards, run_id))
+                return
+            
+            all_deals = await sync_deals(session)
+            if deals_only:
+                return
+            
+            if not all_deals:
+                print("Nenhum negócio encontrado na extração.")
+                return
+            
+            if workers > 1:
+                print(f"\n>>> Etapa 2: Atualizando Atividades em {workers} processos (execução {run_id})...")
+                del all_deals
+                with stage("atividades"):
+                    await run_shard_workers(workers, run_id)
+                rows = await asyncio.to_thread(fetch_shard_rows, supabase, run_id)
+                print(format_shard_report(summarize_shards(rows, workers, run_id), workers, run_id))
+                return
             
             # 2. Extrair atividades para esses negócios
+            # 3. Salvar Atividades no Supabase (em blocos, à medida que são extraídas)
             print(f"\n>>> Etapa 2: Atualizando Atividades para {len(all_deals)} negócios...")
-            activities = await extract_activities(session, all_deals)
+            with stage("atividades"):
+                total_activities = await load_activities_streaming(session, all_deals)
             
-            # 3. Salvar Atividades no Supabase
-            if activities:
-                print(f"Salvando {len(activities)} atividades no Supabase...")
-                save_to_supabase(activities, "atividades", unique_key="CodigoNegocio,CodigoAtividade")
-                
-                # 4. Enriquecer com nomes (SQL)
-                await enrich_atividades_with_names()
-            else:
+            if not total_activities:
                 print("Nenhuma atividade encontrada.")
-        else:
-            print("Nenhum negócio encontrado na extração.")
+    except Exception:
+        status = "ERROR"
+        raise
+    finally:
+        stop_enrichment()
+        # Textfile do Prometheus + resumo JSON; o resumo também vai para o audit log da execução
+        publish_run_metrics(job, time.time() - start_time, status)
+        get_memory_monitor().write_report(job)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sincronização de negócios e atividades")
+    sharding = parser.add_argument_group("shards de atividades")
+    sharding.add_argument("--shards", type=int, default=1,
+                          help="Total de shards das atividades (partição por hash do código do negócio)")
+    sharding.add_argument("--shard-index", type=int, default=None,
+                          help="Shard deste worker (0-based); só atividades, negócios lidos do Supabase")
+    sharding.add_argument("--run-id", default=None,
+                          help="Execução compartilhada pelos workers (padrão: GITHUB_RUN_ID ou a hora UTC)")
+    sharding.add_argument("--workers", type=int, default=0,
+                          help="Extrai os negócios e divide as atividades entre N processos locais")
+    sharding.add_argument("--deals-only", action="store_true",
+                          help="Só os negócios (job anterior à matriz de shards)")
+    add_profile_arguments(parser)
+    add_memory_arguments(parser)
+    add_staging_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.shards < 1 or args.workers < 0:
+        parser.error("--shards deve ser >= 1 e --workers >= 0")
+    if args.shard_index is not None and not 0 <= args.shard_index < args.shards:
+        parser.error(f"--shard-index deve estar entre 0 e {args.shards - 1}")
+    if args.shard_index is not None and (args.workers or args.deals_only):
+        parser.error("--shard-index não combina com --workers nem --deals-only")
+    if args.shards > 1 and args.shard_index is None:
+        parser.error("--shards requer --shard-index (ou use --workers N para processos locais)")
+    if not args.run_id:
+        args.run_id = default_run_id()
+        if args.workers > 1:
+            # Processos locais de um mesmo pai: execução própria mesmo se rodar de novo na mesma hora
+            args.run_id = f"{args.run_id}-p{os.getpid()}"
+    return args
 
 if __name__ == "__main__":
-    asyncio.run(run_activities_sync())
+    args = parse_args()
+    configure_from_args(args)
+    # Prints e logs saem por uma fila escrita em thread própria (não bloqueia o event loop)
+    capture_stdout()
+    try:
+        configure_staging_from_args(args, writer_id=None if args.shard_index is None else f"shard{args.shard_index + 1}")
+        run_main(functools.partial(run_activities_sync, args.shards, args.shard_index, args.run_id,
+                                   args.workers, args.deals_only),
+                 shard_job_name(args.shard_index), args)
+    finally:
+        stop_staging()
+        # Um único insert com os audit logs da execução, antes de esvaziar a fila de log
+        flush_audit_logs()
+        shutdown_logging()
@@ -0,0 +1,203 @@
+"""
+Consultas SQL locais (DuckDB) sobre o staging em Parquet, sem carregar o Supabase de produção
+nem trazer as tabelas para a memória do Python: o DuckDB lê as colunas direto dos arquivos.
+
+Cada entidade do staging vira uma view com a versão mais recente de cada registro (pela chave
+única do manifest, entre todas as execuções, na ordem do written_at dos manifests) ou, com --run,
+só com os registros daquela execução.
+As colunas são texto, como o Vista devolve; colunas gravadas em JSON no staging (listas, dicts)
+aparecem como texto JSON.
+
+Uso:
+    python -m src.analytics                      # relatório lost_clients
+    python -m src.analytics --list
+    python -m src.analytics --sql "SELECT \"Status\", count(*) FROM negocios GROUP BY 1"
+    python -m src.analytics --query lost_clients --format csv --output perdidos.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.config import get_settings
+from src.utils.staging import list_runs, partition_dir
+
+# Consultas prontas: nome -> (descrição, SQL). lost_clients segue a mesma regra de get_lost_clients
+# (migrations/006_lost_clients.sql), o relatório equivalente no Supabase
+QUERIES: Dict[str, Tuple[str, str]] = {
+    "lost_clients": (
+        "Clientes com negócio perdido que teve visita ou proposta",
+        """
+        SELECT n."CodigoCliente",
+               any_value(n."NomeCliente") AS "NomeCliente",
+               count(DISTINCT n."Codigo") AS negocios_perdidos,
+               count(*) AS atividades
+          FROM negocios n
+          JOIN atividades a ON a."CodigoNegocio" = n."Codigo"
+         WHERE n."Status" = 'Perdido'
+           AND n."CodigoCliente" IS NOT NULL
+           AND (a."EtapaAcao" ILIKE '%visita%' OR a."EtapaAcao" ILIKE '%proposta%'
+                OR a."TipoAtividade" ILIKE '%visita%' OR a."TipoAtividade" ILIKE '%proposta%')
+         GROUP BY n."CodigoCliente"
+         ORDER BY "NomeCliente", n."CodigoCliente"
+        """,
+    ),
+}
+
+_duckdb = None
+
+
+def _import_duckdb():
+    global _duckdb
+    if _duckdb is None:
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError("As consultas locais requerem duckdb (pip install duckdb)") from e
+        _duckdb = duckdb
+    return _duckdb
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def view_sql(entity: str, files: Sequence[str], unique_key: Optional[str], latest: bool,
+             run_order: Sequence[str] = ()) -> str:
+    """
+    SQL da view de uma entidade sobre os arquivos Parquet das execuções.
+
+    Args:
+        run_order: Execuções em ordem cronológica (a última vence); o run_id em si não é ordenável
+            (data/hora, GITHUB_RUN_ID numérico ou id escolhido pelo operador)
+    """
+    source = (f"read_parquet([{', '.join(_literal(path) for path in files)}], "
+              f"hive_partitioning = true, hive_types_autocast = false, union_by_name = true)")
+    if not latest or not unique_key:
+        return f"CREATE VIEW {_quote(entity)} AS SELECT * FROM {source}"
+    keys = ", ".join(_quote(key.strip()) for key in unique_key.split(","))
+    rank = " ".join(f"WHEN {_literal(run)} THEN {position}" for position, run in enumerate(run_order))
+    order = f"CASE run_id {rank} END" if rank else "run_id"
+    # Execuções incrementais só trazem o que mudou: vale a versão da execução mais recente
+    return (f"CREATE VIEW {_quote(entity)} AS SELECT * FROM {source} "
+            f"QUALIFY row_number() OVER (PARTITION BY {keys} ORDER BY {order} DESC) = 1")
+
+
+def connect(root: Optional[str] = None, run_id: Optional[str] = None, memory_limit: Optional[str] = None):
+    """
+    Conexão DuckDB em memória com uma view por entidade do staging.
+
+    Raises:
+        ValueError: Staging vazio ou execução inexistente
+    """
+    duckdb = _import_duckdb()
+    root = root or get_settings().STAGING_DIR
+    runs = list_runs(root)
+    if run_id is not None:
+        if run_id not in runs:
+            raise ValueError(f"Execução {run_id} não encontrada em {root}")
+        runs = {run_id: runs[run_id]}
+    if not runs:
+        raise ValueError(f"Nenhuma execução no staging ({root}); rode o ETL com --stage")
+
+    files: Dict[str, List[str]] = {}
+    unique_keys: Dict[str, Optional[str]] = {}
+    # list_runs já vem em ordem cronológica (written_at dos manifests)
+    run_order: Dict[str, List[str]] = {}
+    for run, manifests in runs.items():
+        for entity, manifest in manifests.items():
+            directory = partition_dir(root, entity, run)
+            files.setdefault(entity, []).extend(os.path.join(directory, part["file"]) for part in manifest["parts"])
+            unique_keys[entity] = manifest.get("unique_key")
+            run_order.setdefault(entity, []).append(run)
+
+    connection = duckdb.connect(":memory:")
+    if memory_limit:
+        connection.execute(f"SET memory_limit = {_literal(memory_limit)}")
+    for entity, paths in files.items():
+        if paths:
+            connection.execute(view_sql(entity, paths, unique_keys[entity], latest=run_id is None,
+                                        run_order=run_order[entity]))
+    return connection
+
+
+def run_query(connection, sql: str) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """Executa o SQL. Returns: (colunas, linhas)."""
+    cursor = connection.execute(sql)
+    columns = [column[0] for column in cursor.description]
+    return columns, cursor.fetchall()
+
+
+def format_table(columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    cells = [[("" if value is None else str(value)) for value in row] for row in rows]
+    widths = [max([len(column)] + [len(row[i]) for row in cells]) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths)).rstrip(),
+             "  ".join("-" * width for width in widths)]
+    lines += ["  ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in cells]
+    lines.append(f"({len(rows)} linhas)")
+    return "\n".join(lines)
+
+
+def write_output(columns, rows, output_format: str, stream):
+    if output_format == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    elif output_format == "json":
+        json.dump([dict(zip(columns, row)) for row in rows], stream, ensure_ascii=False, indent=2, default=str)
+        stream.write("\n")
+    else:
+        stream.write(format_table(columns, rows) + "\n")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Consultas SQL locais (DuckDB) sobre o staging em Parquet")
+    query = parser.add_mutually_exclusive_group()
+    query.add_argument("--query", choices=sorted(QUERIES), default="lost_clients", help="Consulta pronta")
+    query.add_argument("--sql", help="SQL ad hoc (views: uma por entidade do staging)")
+    query.add_argument("--list", action="store_true", help="Lista as consultas prontas e as views disponíveis")
+    parser.add_argument("--run", dest="run_id", default=None,
+                        help="Só os registros desta execução (padrão: versão mais recente de cada registro)")
+    parser.add_argument("--format", choices=("table", "csv", "json"), default="table")
+    parser.add_argument("--output", default=None, help="Arquivo de saída (padrão: stdout)")
+    parser.add_argument("--memory-limit", default=None, help="Limite de memória do DuckDB (ex.: 1GB)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        connection = connect(run_id=args.run_id, memory_limit=args.memory_limit)
+    except (ImportError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.list:
+        for name, (description, _) in sorted(QUERIES.items()):
+            print(f"{name}: {description}")
+        views = [row[0] for row in connection.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").fetchall()]
+        print(f"Views: {', '.join(sorted(views))}")
+        return 0
+    sql = args.sql or QUERIES[args.query][1]
+    try:
+        columns, rows = run_query(connection, sql)
+    except _import_duckdb().Error as e:
+        print(f"Erro na consulta: {e}", file=sys.stderr)
+        return 1
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as stream:
+            write_output(columns, rows, args.format, stream)
+        print(f"{len(rows)} linhas gravadas em {args.output}")
+    else:
+        write_output(columns, rows, args.format, sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
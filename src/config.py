@@ -1,27 +1,15 @@
-import os
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
-
-# API VISTA
-VISTA_API_URL = os.getenv("VISTA_API_URL")
-if VISTA_API_URL and not VISTA_API_URL.startswith("http"):
-    VISTA_API_URL = f"https://{VISTA_API_URL}"
+"""
+Configuração do ETL, lida do ambiente (.env) sob demanda.
 
-VISTA_API_KEY = os.getenv("VISTA_API_KEY")
+Importar este módulo não tem efeito colateral: o .env só é carregado no primeiro acesso a
+uma opção (`from src.config import X` ou get_settings()), nada é criado em disco (quem grava
+cria o próprio diretório) e as credenciais só são exigidas por validate(), chamado pelos
+pontos de entrada, e por require_vista()/require_supabase(), chamados pelos clientes da API.
+Assim testes, benchmarks e --help rodam sem segredos.
+"""
 
-# SUPABASE
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-# CONFIGURAÇÕES GERAIS
-SAVE_TO_CSV = os.getenv("SAVE_TO_CSV", "False").lower() == "true"
-CSV_OUTPUT_DIR = os.getenv("CSV_OUTPUT_DIR", "./data")
-
-# CONFIGURAÇÕES DE SEGURANÇA
-ENABLE_DATA_VALIDATION = os.getenv("ENABLE_DATA_VALIDATION", "True").lower() == "true"
-ENABLE_AUDIT_LOGGING = os.getenv("ENABLE_AUDIT_LOGGING", "True").lower() == "true"
+import os
+from typing import Mapping, Optional
 
 # CONSTANTES
 MAX_RETRIES = 5
@@ -29,26 +17,141 @@ REQUEST_DELAY = 0.5
 BACKOFF_FACTOR = 1.5
 REQUEST_TIMEOUT = 30  # segundos
 
-if not os.path.exists(CSV_OUTPUT_DIR):
-    os.makedirs(CSV_OUTPUT_DIR)
-
-# VALIDAÇÃO OBRIGATÓRIA DE CREDENCIAIS
-if not VISTA_API_KEY or not VISTA_API_URL:
-    raise ValueError(
-        "ERRO CRÍTICO: VISTA_API_KEY e VISTA_API_URL são obrigatórios. "
-        "Configure no arquivo .env"
-    )
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError(
-        "ERRO CRÍTICO: SUPABASE_URL e SUPABASE_KEY são obrigatórios. "
-        "Configure no arquivo .env"
-    )
-
-# AVISO: Service Role Key
-if SUPABASE_KEY and not SUPABASE_KEY.startswith("eyJ"):
-    print("AVISO: Certifique-se de estar usando a SERVICE_ROLE key, não a ANON key!")
-
-print("✓ Configuração carregada com sucesso")
-print(f"✓ Validação de dados: {'HABILITADA' if ENABLE_DATA_VALIDATION else 'DESABILITADA'}")
-print(f"✓ Audit logging: {'HABILITADO' if ENABLE_AUDIT_LOGGING else 'DESABILITADO'}")
+
+def _env_bool(env: Mapping[str, str], name: str, default: str) -> bool:
+    return env.get(name, default).lower() == "true"
+
+
+class Settings:
+    """Opções do ETL lidas de um ambiente (os.environ por padrão)."""
+
+    def __init__(self, env: Optional[Mapping[str, str]] = None):
+        env = os.environ if env is None else env
+
+        # API VISTA
+        self.VISTA_API_URL = env.get("VISTA_API_URL")
+        if self.VISTA_API_URL and not self.VISTA_API_URL.startswith("http"):
+            self.VISTA_API_URL = f"https://{self.VISTA_API_URL}"
+        self.VISTA_API_KEY = env.get("VISTA_API_KEY")
+
+        # SUPABASE
+        self.SUPABASE_URL = env.get("SUPABASE_URL")
+        self.SUPABASE_KEY = env.get("SUPABASE_KEY")
+
+        # CONFIGURAÇÕES GERAIS
+        self.SAVE_TO_CSV = _env_bool(env, "SAVE_TO_CSV", "False")
+        self.CSV_OUTPUT_DIR = env.get("CSV_OUTPUT_DIR", "./data")
+
+        # CONFIGURAÇÕES DE SEGURANÇA
+        self.ENABLE_DATA_VALIDATION = _env_bool(env, "ENABLE_DATA_VALIDATION", "True")
+        self.ENABLE_AUDIT_LOGGING = _env_bool(env, "ENABLE_AUDIT_LOGGING", "True")
+
+        # Carga de atividades em streaming: tamanho do bloco enviado ao Supabase e
+        # quantos blocos podem aguardar na fila antes de pausar a extração (backpressure)
+        self.ACTIVITIES_CHUNK_SIZE = int(env.get("ACTIVITIES_CHUNK_SIZE", "1000"))
+        self.ACTIVITIES_MAX_PENDING_CHUNKS = int(env.get("ACTIVITIES_MAX_PENDING_CHUNKS", "4"))
+
+        # Processos usados nas etapas CPU-bound (validação/transformação de lotes grandes); 0 ou 1 desliga
+        self.PARALLEL_WORKERS = int(env.get("PARALLEL_WORKERS", str(os.cpu_count() or 1)))
+
+        # Audit log em lote: registros acumulados antes de um insert e arquivo usado se o insert falhar
+        self.AUDIT_FLUSH_EVERY = int(env.get("AUDIT_FLUSH_EVERY", "100"))
+        self.AUDIT_FALLBACK_FILE = env.get("AUDIT_FALLBACK_FILE",
+                                           os.path.join(self.CSV_OUTPUT_DIR, "audit_logs_fallback.jsonl"))
+
+        # Intervalo (segundos) entre linhas de progresso nos laços longos (páginas, lotes, negócios)
+        self.PROGRESS_LOG_INTERVAL = float(env.get("PROGRESS_LOG_INTERVAL", "5"))
+
+        # Métricas da execução: <METRICS_DIR>/<job>.prom (textfile do Prometheus) e <job>.json
+        self.METRICS_DIR = env.get("METRICS_DIR", os.path.join(self.CSV_OUTPUT_DIR, "metrics"))
+
+        # Saída do modo --profile (pstats, pilhas "folded" para flamegraph e bloqueios do event loop)
+        self.PROFILE_DIR = env.get("PROFILE_DIR", os.path.join(self.CSV_OUTPUT_DIR, "profile"))
+
+        # Páginas e registros da última listagem completa de cada endpoint (estimativa do --dry-run)
+        self.PAGE_TOTALS_FILE = env.get("PAGE_TOTALS_FILE", os.path.join(self.CSV_OUTPUT_DIR, "page_totals.json"))
+
+        # Staging local em Parquet (src.utils.staging): cópia de cada página gravada, recarregável com
+        # python -m src.load. SAVE_TO_CSV=True (legado) também liga o staging.
+        self.STAGING_ENABLED = _env_bool(env, "STAGING_ENABLED", env.get("SAVE_TO_CSV", "False"))
+        self.STAGING_DIR = env.get("STAGING_DIR", os.path.join(self.CSV_OUTPUT_DIR, "staging"))
+
+        # Orçamento de memória (RSS, MB; 0 desliga): acima de 80% o pipeline grava em blocos/streaming,
+        # acima de 100% falha com relatório antes do OOM killer. MEMORY_TRACKING liga o tracemalloc por etapa.
+        self.MEMORY_BUDGET_MB = float(env.get("MEMORY_BUDGET_MB", "0"))
+        self.MEMORY_TRACKING = _env_bool(env, "MEMORY_TRACKING", "False")
+
+    def require_vista(self):
+        """
+        Raises:
+            ValueError: VISTA_API_KEY ou VISTA_API_URL ausentes
+        """
+        if not self.VISTA_API_KEY or not self.VISTA_API_URL:
+            raise ValueError(
+                "ERRO CRÍTICO: VISTA_API_KEY e VISTA_API_URL são obrigatórios. "
+                "Configure no arquivo .env"
+            )
+
+    def require_supabase(self):
+        """
+        Raises:
+            ValueError: SUPABASE_URL ou SUPABASE_KEY ausentes
+        """
+        if not self.SUPABASE_URL or not self.SUPABASE_KEY:
+            raise ValueError(
+                "ERRO CRÍTICO: SUPABASE_URL e SUPABASE_KEY são obrigatórios. "
+                "Configure no arquivo .env"
+            )
+
+
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Configuração da execução (carrega o .env no primeiro acesso)."""
+    global _settings
+    if _settings is None:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _settings = Settings()
+    return _settings
+
+
+def reload_settings() -> Settings:
+    """Relê o ambiente (ex.: benchmarks que apontam VISTA_API_URL para o mock depois de importar)."""
+    global _settings
+    _settings = None
+    return get_settings()
+
+
+def require_vista():
+    get_settings().require_vista()
+
+
+def require_supabase():
+    get_settings().require_supabase()
+
+
+def validate():
+    """Exige as quatro credenciais e imprime o resumo da configuração (início do ETL)."""
+    settings = get_settings()
+    settings.require_vista()
+    settings.require_supabase()
+
+    # AVISO: Service Role Key
+    if not settings.SUPABASE_KEY.startswith("eyJ"):
+        print("AVISO: Certifique-se de estar usando a SERVICE_ROLE key, não a ANON key!")
+
+    print("✓ Configuração carregada com sucesso")
+    print(f"✓ Validação de dados: {'HABILITADA' if settings.ENABLE_DATA_VALIDATION else 'DESABILITADA'}")
+    print(f"✓ Audit logging: {'HABILITADO' if settings.ENABLE_AUDIT_LOGGING else 'DESABILITADO'}")
+    return settings
+
+
+def __getattr__(name: str):
+    # `from src.config import X` / `config.X`: lido da configuração sob demanda (PEP 562)
+    if name.isupper():
+        settings = get_settings()
+        if name in vars(settings):
+            return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
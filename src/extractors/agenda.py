@@ -1,7 +1,12 @@
 from src.utils.async_api_client import get_vista_data_async
 from src.utils.supabase_client import get_last_run_from_supabase, update_last_run_in_supabase, save_to_supabase
+from src.utils.run_plan import WINDOW_FIELDS, filter_window
 
-async def extract_agenda(session):
+async def extract_agenda(session, since=None, until=None, update_state=True):
+    """
+    Extrai a agenda; com janela (since/until, "AAAA-MM-DD HH:MM:SS") só os itens atualizados nela.
+    update_state=False não avança o sync_state (execuções parciais).
+    """
     print("\n--- Extraindo Agenda (Async) ---")
     fields = [
         "Codigo", "Assunto", "DataHoraInicio", "DataHoraFinal", "DataHora", "DataHoraAtualizacao", 
@@ -12,11 +17,15 @@ async def extract_agenda(session):
     ]
     
     # Agenda endpoint usually supports pagination
-    agenda_items = await get_vista_data_async(session, "agenda/listar", fields)
+    date_field = WINDOW_FIELDS["agenda"]
+    agenda_items = await get_vista_data_async(session, "agenda/listar", fields,
+                                              primary_date_field=date_field, last_run_time=since)
+    agenda_items = filter_window(agenda_items, date_field, None, until)
     print(f"Total de itens de agenda extraídos: {len(agenda_items)}")
     
     if agenda_items:
         save_to_supabase(agenda_items, "agenda", unique_key="Codigo")
-        update_last_run_in_supabase("agenda")
+        if update_state:
+            update_last_run_in_supabase("agenda")
         
     return agenda_items
@@ -1,21 +1,24 @@
 import asyncio
+import time
 import json
 from src.utils.async_api_client import make_async_api_request
-from src.config import VISTA_API_KEY
+from src.utils.records import ACTIVITY_API_FIELDS, activities_from_columns
+from src.utils.supabase_client import save_to_supabase
+from src.utils.progress import ProgressReporter
+from src.utils.memory import check_budget, under_pressure
+from src.config import get_settings
 
 async def fetch_deal_activities(session, deal, fields_atividades):
     deal_id = deal.get("Codigo")
     if not deal_id:
         return []
-        
-    deal_activities = []
     
     try:
         # Passo 1: Buscar todas as atividades com todos os campos (paginado)
         # A maioria dos negócios tem poucas atividades, então 50 deve cobrir quase tudo.
         # Se precisar de mais, podemos aumentar ou implementar paginação completa aqui.
         params = {
-            "key": VISTA_API_KEY,
+            "key": get_settings().VISTA_API_KEY,
             "pesquisa": json.dumps({
                 "fields": fields_atividades, 
                 "paginacao": {"pagina": 1, "quantidade": 50}
@@ -28,106 +31,165 @@ async def fetch_deal_activities(session, deal, fields_atividades):
         if not data or not isinstance(data, dict):
             return []
             
-        # Verificar se temos dados (CodigoAtividade deve estar presente e ser uma lista)
-        if "CodigoAtividade" not in data or not isinstance(data["CodigoAtividade"], list):
-            return []
-            
-        num_activities = len(data["CodigoAtividade"])
-        if num_activities == 0:
-            return []
-            
-        # Transformar formato colunar em lista de objetos
-        # Ex: {"CampoA": [V1, V2], "CampoB": [V1, V2]} -> [{CampoA: V1, CampoB: V1}, {CampoA: V2, CampoB: V2}]
-        for i in range(num_activities):
-            flat_activity = {"CodigoNegocio": deal_id}
-            
-            for field in fields_atividades:
-                # O campo pode não vir no retorno se estiver vazio para todos, ou pode vir com menos itens (embora raro no Vista)
-                # Vamos assumir que as listas estão alinhadas.
-                if field in data and isinstance(data[field], list) and len(data[field]) > i:
-                    flat_activity[field] = data[field][i]
-                else:
-                    flat_activity[field] = ""
-            
-            # Mapear AtividadeCreatedAt para Data
-            if "AtividadeCreatedAt" in flat_activity:
-                flat_activity["Data"] = flat_activity.pop("AtividadeCreatedAt")
-
-            # --- ENRIQUECIMENTO COM DADOS DO NEGÓCIO ---
-            # Se faltar dados na atividade, pegamos do negócio pai
-            if not flat_activity.get("CodigoCliente") and deal.get("CodigoCliente"):
-                flat_activity["CodigoCliente"] = deal.get("CodigoCliente")
-            
-            if not flat_activity.get("CodigoCorretor") and deal.get("CodigoCorretor"):
-                flat_activity["CodigoCorretor"] = deal.get("CodigoCorretor")
-
-            # NomeCliente e NomeCorretor muitas vezes não vêm na atividade, mas temos no negócio
-            if not flat_activity.get("NomeCliente") and deal.get("NomeCliente"):
-                flat_activity["NomeCliente"] = deal.get("NomeCliente")
-                
-            if not flat_activity.get("NomeCorretor") and deal.get("NomeCorretor"):
-                flat_activity["NomeCorretor"] = deal.get("NomeCorretor")
-                
-            deal_activities.append(flat_activity)
-            
-        return deal_activities
+        # Transpor formato colunar em registros compactos, coluna a coluna:
+        # colunas ausentes/curtas são alinhadas uma única vez e os dados faltantes
+        # (cliente/corretor) são preenchidos com os do negócio pai
+        # Ex: {"CampoA": [V1, V2], "CampoB": [V1, V2]} -> [Registro(V1, V1), Registro(V2, V2)]
+        return activities_from_columns(deal, data, fields_atividades)
 
     except Exception as e:
         print(f"Erro ao extrair atividades do negócio {deal_id}: {e}")
         return []
 
+async def iter_activity_batches(session, deals, batch_size=50):
+    """
+    Busca as atividades dos negócios em lotes e entrega as atividades de cada lote
+    assim que ele termina (gerador assíncrono).
+    """
+    fields_atividades = list(ACTIVITY_API_FIELDS)
+    
+    # Processar em lotes para não criar milhares de tasks de uma vez
+    with ProgressReporter("negocios/atividades", total=len(deals), unit="negócios") as progress:
+        for i in range(0, len(deals), batch_size):
+            batch = deals[i:i + batch_size]
+            tasks = [fetch_deal_activities(session, deal, fields_atividades) for deal in batch]
+            
+            results = await asyncio.gather(*tasks)
+            
+            activities = []
+            for res in results:
+                if res:
+                    activities.extend(res)
+                    
+            progress.update(len(batch), "%d atividades em %d negócios", len(activities), len(batch))
+            check_budget("negocios/atividades")
+            yield activities
+
 async def extract_activities(session, deals):
     """
     Extrai atividades de cada negócio usando asyncio.
+    Mantém todas as atividades em memória; para cargas grandes use load_activities_streaming.
     """
     print(f"Iniciando extração de atividades para {len(deals)} negócios (Async)...")
     all_activities = []
     
-    fields_atividades = [
-        "CodigoAtividade", "Assunto", "Texto", "TipoAtividade", "Status", 
-        "AtividadeCreatedAt", "ValorProposta", "TextoProposta", 
-        "CodigoCliente", "CodigoImovel", "CodigoCorretor", "Automatico",
-        "EstadoProposta", "Numero", "Pendente", "EtapaAcaoId", 
-        "EtapaAcao", "TipoAtividadeId", "MotivoLost", "CodigoEmImovel", "Hora", 
-        "AtividadeUpdatedAt", "NumeroAgenda", "DataHora", "DataAtualizacao", 
-        "Local", "Inicio", "Final", "Prioridade", "Privado", "AlertaMinutos", 
-        "Excluido", "Concluido", "Tarefa", "DataConclusao", "DiaInteiro", 
-        "TipoAgenda", "CodigoDev", "IdGoogleCalendar", "StatusVisita", 
-        "CodigoImobiliaria", "Icone", "Duracao", "FotoCorretor"
-    ]
-    
-    # Processar em lotes para não criar milhares de tasks de uma vez
-    batch_size = 50
-    for i in range(0, len(deals), batch_size):
-        batch = deals[i:i + batch_size]
-        tasks = [fetch_deal_activities(session, deal, fields_atividades) for deal in batch]
-        
-        results = await asyncio.gather(*tasks)
-        
-        for res in results:
-            if res:
-                all_activities.extend(res)
-                
-        print(f"Processado {min(i + batch_size, len(deals))}/{len(deals)} negócios...")
+    async for activities in iter_activity_batches(session, deals):
+        all_activities.extend(activities)
             
     print(f"Total de atividades extraídas: {len(all_activities)}")
     
     return all_activities
 
-async def enrich_atividades_with_names():
+async def load_activities_streaming(session, deals, chunk_size=None, max_pending_chunks=None):
     """
-    Executa a função RPC para preencher NomeCorretor e NomeCliente na tabela atividades.
+    Extrai as atividades e carrega no Supabase em blocos de tamanho fixo, à medida que chegam.
+
+    Os blocos passam por uma fila limitada até o loader (executado em thread para não
+    bloquear o event loop). Quando o loader atrasa, a fila enche e a extração espera
+    (backpressure), então a memória fica limitada a poucos blocos e o progresso já
+    gravado sobrevive a uma falha no meio do crawl.
+
+    Returns:
+        Total de atividades enviadas ao loader
     """
-    print("\n--- Enriquecendo Atividades com Nomes (SQL) ---")
-    from src.utils.supabase_client import get_supabase_client
+    settings = get_settings()
+    chunk_size = chunk_size or settings.ACTIVITIES_CHUNK_SIZE
+    max_pending_chunks = max_pending_chunks or settings.ACTIVITIES_MAX_PENDING_CHUNKS
+    print(f"Iniciando extração de atividades para {len(deals)} negócios (streaming, blocos de {chunk_size})...")
     
-    supabase = get_supabase_client()
-    if not supabase:
-        print("Erro: Não foi possível conectar ao Supabase.")
-        return
-
+    queue = asyncio.Queue(maxsize=max_pending_chunks)
+    
+    load_progress = ProgressReporter("atividades (carga)", unit="registros")
+    
+    async def loader():
+        while True:
+            chunk = await queue.get()
+            try:
+                if chunk is None:
+                    return
+                await asyncio.to_thread(save_to_supabase, chunk, "atividades", unique_key="CodigoNegocio,CodigoAtividade",
+                                        progress=load_progress)
+            finally:
+                # Sempre libera o item: uma falha no save não pode deixar queue.join() preso
+                queue.task_done()
+    
+    loader_task = asyncio.create_task(loader())
+    
+    async def enqueue(chunk):
+        # Aguarda espaço na fila, mas não fica preso se o loader tiver morrido
+        put_task = asyncio.ensure_future(queue.put(chunk))
+        done, _ = await asyncio.wait({put_task, loader_task}, return_when=asyncio.FIRST_COMPLETED)
+        if put_task not in done:
+            put_task.cancel()
+            loader_task.result()  # Propaga o erro do loader
+            raise RuntimeError("Loader de atividades encerrou antes do fim da extração")
+    
+    async def drain():
+        # Pressão de memória: espera o loader esvaziar a fila antes de extrair mais
+        join_task = asyncio.ensure_future(queue.join())
+        done, _ = await asyncio.wait({join_task, loader_task}, return_when=asyncio.FIRST_COMPLETED)
+        if join_task not in done:
+            join_task.cancel()
+            loader_task.result()
+    
+    total = 0
+    buffer = []
     try:
-        response = supabase.rpc('enrich_atividades_names', {}).execute()
-        print("Enriquecimento de atividades concluído com sucesso.")
-    except Exception as e:
-        print(f"Erro ao enriquecer atividades: {e}")
+        async for activities in iter_activity_batches(session, deals):
+            buffer.extend(activities)
+            while len(buffer) >= chunk_size:
+                chunk, buffer = buffer[:chunk_size], buffer[chunk_size:]
+                await enqueue(chunk)
+                total += len(chunk)
+            if under_pressure():
+                await drain()
+        
+        if buffer:
+            await enqueue(buffer)
+            total += len(buffer)
+            buffer = []
+        
+        await enqueue(None)
+        await loader_task
+    finally:
+        if not loader_task.done():
+            loader_task.cancel()
+        load_progress.close()
+    
+    print(f"Total de atividades extraídas e enviadas ao Supabase: {total}")
+    
+    return total
+
+async def crawl_activity_shards(session, deals, shards, run_id, preferred=0, client=None, ttl=None):
+    """
+    Carrega as atividades dos shards de uma execução que este worker conseguir pegar.
+
+    Tenta o shard `preferred` primeiro e depois os demais (circular): shards concluídos ou com
+    lease ativo de outro worker são pulados; shards não iniciados, que falharam ou com lease
+    expirado são assumidos (um worker atrasado ou morto não segura a execução).
+
+    Returns:
+        Resumo consolidado dos shards da execução (summarize_shards)
+    """
+    from src.utils.supabase_client import get_supabase_client
+    from src.utils.sharding import (DEFAULT_LEASE_TTL, ShardLease, claim_order, fetch_shard_rows, partition,
+                                    shard_entity, summarize_shards)
+
+    client = client or get_supabase_client()
+    ttl = ttl or DEFAULT_LEASE_TTL
+    for index in claim_order(preferred, shards):
+        lease = ShardLease(client, shard_entity(run_id, index, shards), ttl)
+        if not await asyncio.to_thread(lease.acquire):
+            continue
+        shard_deals = partition(deals, shards, index)
+        print(f"Shard {index + 1}/{shards}: {len(shard_deals)} negócios (lease {lease.owner})")
+        started = time.monotonic()
+        async with lease.renewing():
+            total = await load_activities_streaming(session, shard_deals)
+        details = {"deals": len(shard_deals), "activities": total,
+                   "seconds": round(time.monotonic() - started, 1), "owner": lease.owner}
+        if not await asyncio.to_thread(lease.complete, details):
+            # Outro worker assumiu o shard (lease expirou): as atividades são upserts, sem duplicidade
+            print(f"Shard {index + 1}/{shards}: lease perdido, conclusão fica com o outro worker")
+    
+    return summarize_shards(await asyncio.to_thread(fetch_shard_rows, client, run_id), shards, run_id)
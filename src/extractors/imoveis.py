@@ -1,10 +1,13 @@
 from src.utils.async_api_client import get_vista_data_async
 from src.utils.supabase_client import update_last_run_in_supabase, save_to_supabase
-from src.config import SAVE_TO_CSV
-import pandas as pd
+from src.utils.run_plan import WINDOW_FIELDS, filter_window
 import os
 
-async def extract_imoveis(session):
+async def extract_imoveis(session, since=None, until=None, update_state=True):
+    """
+    Extrai os imóveis; com janela (since/until, "AAAA-MM-DD HH:MM:SS") só os atualizados nela.
+    update_state=False não avança o sync_state (execuções parciais).
+    """
     print("\n--- Extraindo Imóveis (Async) ---")
     fields_imoveis = [
         "Codigo", "Categoria", "Bairro", "Cidade", "ValorVenda", "ValorLocacao", 
@@ -22,37 +25,13 @@ async def extract_imoveis(session):
         "Elevador", "SalaoFestas", "Portaria24Hrs", "SalaFitness"
     ]
     
-    imoveis = await get_vista_data_async(session, "imoveis/listar", fields_imoveis)
+    date_field = WINDOW_FIELDS["imoveis"]
+    imoveis = await get_vista_data_async(session, "imoveis/listar", fields_imoveis,
+                                         primary_date_field=date_field, last_run_time=since)
+    imoveis = filter_window(imoveis, date_field, None, until)
     
-    if imoveis:
-        # Limpar campo CorretorNome (remover prefixo "ID:")
-        for imovel in imoveis:
-            if "CorretorNome" in imovel and imovel["CorretorNome"] and ":" in imovel["CorretorNome"]:
-                parts = imovel["CorretorNome"].split(":", 1)
-                if len(parts) > 1:
-                    imovel["CorretorNome"] = parts[1].strip()
-
+    if imoveis and update_state:
+        # Limpeza do CorretorNome (prefixo "ID:") é feita pelo transformador da tabela no save
         update_last_run_in_supabase("imoveis")
         
     return imoveis
-
-async def enrich_imoveis_with_team():
-    """
-    Executa um comando SQL no Supabase para preencher a equipe do corretor
-    cruzando com a tabela de corretores.
-    """
-    print("\n--- Enriquecendo Imóveis com Equipe (SQL) ---")
-    from src.utils.supabase_client import get_supabase_client
-    
-    supabase = get_supabase_client()
-    if not supabase:
-        print("Erro: Não foi possível conectar ao Supabase.")
-        return
-
-    try:
-        # Chamar a função RPC criada no banco
-        response = supabase.rpc('enrich_imoveis_team', {}).execute()
-        print("Enriquecimento de equipe concluído com sucesso.")
-        
-    except Exception as e:
-        print(f"Erro ao enriquecer imóveis: {e}")
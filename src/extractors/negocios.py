@@ -1,7 +1,11 @@
 from src.utils.async_api_client import get_vista_data_async, make_async_api_request
 from src.utils.supabase_client import get_last_run_from_supabase, update_last_run_in_supabase, save_to_supabase
-from src.config import SAVE_TO_CSV, VISTA_API_KEY
-import pandas as pd
+from src.utils.records import DealRecord
+from src.utils.transformers import strip_id_prefix
+from src.utils.progress import ProgressReporter
+from src.utils.memory import check_budget
+from src.utils.run_plan import EMPRESA_ID, WINDOW_FIELDS, filter_window
+from src.config import get_settings
 import os
 import asyncio
 import json
@@ -19,7 +23,7 @@ async def fetch_deal_details(session, deal_id):
         ]
         
         params = {
-            "key": VISTA_API_KEY,
+            "key": get_settings().VISTA_API_KEY,
             "codigo_negocio": deal_id,
             "pesquisa": json.dumps({"fields": fields_detalhes})
         }
@@ -38,24 +42,33 @@ async def enrich_deals_with_details(session, deals):
     
     # Processar em lotes
     batch_size = 50
-    for i in range(0, len(deals), batch_size):
-        batch = deals[i:i + batch_size]
-        tasks = [fetch_deal_details(session, d.get("Codigo")) for d in batch]
-        
-        results = await asyncio.gather(*tasks)
-        
-        for original_deal, details in zip(batch, results):
-            if details:
-                # Mesclar detalhes no dicionário original
-                # Prioridade para o original, mas adicionamos o que falta (CorretoresNegocio)
-                original_deal.update(details)
-            enriched_deals.append(original_deal)
+    with ProgressReporter("negocios/detalhes", total=len(deals), unit="negócios") as progress:
+        for i in range(0, len(deals), batch_size):
+            batch = deals[i:i + batch_size]
+            tasks = [fetch_deal_details(session, d.get("Codigo")) for d in batch]
+            
+            results = await asyncio.gather(*tasks)
             
-        print(f"Enriquecido {min(i + batch_size, len(deals))}/{len(deals)} negócios...")
+            for original_deal, details in zip(batch, results):
+                if details:
+                    # Mesclar detalhes no dicionário original
+                    # Prioridade para o original, mas adicionamos o que falta (CorretoresNegocio)
+                    original_deal.update(details)
+                enriched_deals.append(original_deal)
+                
+            progress.update(len(batch), "enriquecido %d/%d negócios", min(i + batch_size, len(deals)), len(deals))
+            check_budget("negocios/detalhes")
         
     return enriched_deals
 
-async def extract_negocios(session):
+async def extract_negocios(session, pipe_ids=None, since=None, until=None, update_state=True):
+    """
+    Extrai os negócios de todos os pipes (ou só de pipe_ids) com os detalhes do corretor.
+
+    Com janela (since/until, "AAAA-MM-DD HH:MM:SS") a listagem continua completa (o endpoint
+    não aceita filtro de data), mas só os negócios atualizados na janela buscam detalhes,
+    são gravados e seguem para as atividades. update_state=False não avança o sync_state.
+    """
     print("\n--- Extraindo Negócios (Deals) - Async ---")
     
     fields_negocios = [
@@ -66,13 +79,19 @@ async def extract_negocios(session):
         'FotoCliente', 'CodigoImovel', 'StatusAtividades'
     ]
     
-    all_negocios = []
+    # Apenas os registros processados (compactos) são mantidos; os dicts brutos
+    # de cada pipe são descartados após o mapeamento
     processed_negocios = []
     
     # 1. Listar Pipes (Funis)
     fields_pipes = ["Codigo", "Nome"]
-    empresa_id = "32622" 
-    pipes = await get_vista_data_async(session, "pipes/listar", fields_pipes, url_params={"empresa": empresa_id})
+    pipes = await get_vista_data_async(session, "pipes/listar", fields_pipes, url_params={"empresa": EMPRESA_ID})
+    if pipes and pipe_ids:
+        wanted = {str(pipe_id) for pipe_id in pipe_ids}
+        pipes = [pipe for pipe in pipes if str(pipe.get("Codigo")) in wanted]
+        missing = wanted - {str(pipe.get("Codigo")) for pipe in pipes}
+        if missing:
+            print(f"Pipes não encontrados: {', '.join(sorted(missing))}")
     
     if pipes:
         print(f"Pipes encontrados: {len(pipes)}")
@@ -86,6 +105,10 @@ async def extract_negocios(session):
             # Endpoint negocios/listar também apresenta problemas com filtro de range (500 Error).
             # Vamos extrair tudo sempre para garantir.
             negocios_pipe = await get_vista_data_async(session, "negocios/listar", fields_negocios, url_params=url_params)
+            if since or until:
+                listed = len(negocios_pipe)
+                negocios_pipe = filter_window(negocios_pipe, WINDOW_FIELDS["negocios"], since, until)
+                print(f"{len(negocios_pipe)} de {listed} negócios atualizados na janela")
             
             if negocios_pipe:
                 # Enriquecer com detalhes (Corretor)
@@ -93,11 +116,6 @@ async def extract_negocios(session):
 
             # Processar e mapear os negócios
             for n in negocios_pipe:
-                # Adicionar info do pipe (mantido para compatibilidade com all_negocios)
-                n["PipeID"] = pipe_id
-                n["PipeNome"] = pipe_nome
-                all_negocios.append(n) # Adiciona o negócio bruto para a extração de atividades
-                
                 # Extrair dados do corretor (pode haver múltiplos, pegamos o primeiro por enquanto)
                 codigo_corretor = None
                 nome_corretor = ""
@@ -109,8 +127,7 @@ async def extract_negocios(session):
                     nome_corretor = first_broker.get("NomeCorretor")
 
                 # Mapeamento para o formato final (Schema SQL)
-                # Mapeamento para o formato final (Schema SQL)
-                processed_n = {
+                processed_n = DealRecord.from_mapping({
                     "Codigo": n.get("Codigo"),
                     "NomeNegocio": n.get("NomeNegocio"),
                     "ValorNegocio": n.get("ValorNegocio"),
@@ -129,7 +146,7 @@ async def extract_negocios(session):
                     "CodigoImovel": n.get("CodigoImovel"),
                     "ObservacaoPerda": n.get("ObservacaoPerda"),
                     "NomeCliente": n.get("NomeCliente"),
-                    "NomeCorretor": nome_corretor.split(":")[1].strip() if nome_corretor and ":" in nome_corretor else nome_corretor,
+                    "NomeCorretor": strip_id_prefix(nome_corretor), # Remove prefixo "ID:" (usado também nas atividades)
                     "MotivoPerda": n.get("MotivoPerda"),
                     "CodigoMotivoPerda": n.get("CodigoMotivoPerda"),
                     "DataPerda": n.get("DataFinal") if n.get("Status") == "Perdido" else None,
@@ -141,41 +158,21 @@ async def extract_negocios(session):
                     "CelularCliente": n.get("CelularCliente"),
                     "TelefoneCliente": n.get("TelefoneCliente"),
                     "TempoDasEtapasDoNegocio": n.get("TempoDasEtapasDoNegocio"),
-                    "EquipeCorretor": None # Será preenchido via SQL enrichment
-                }
+                    "EquipeCorretor": None # Preenchido no save pelo índice de enriquecimento (corretores)
+                })
                 processed_negocios.append(processed_n)
             
         # Salvar Negócios no Supabase
         save_to_supabase(processed_negocios, "negocios", unique_key="Codigo")
         
         # Atualizar last_run se houve sucesso
-        if all_negocios:
+        if processed_negocios and update_state:
             update_last_run_in_supabase("negocios")
 
     else:
         print("Nenhum pipe encontrado. Tentando extração geral de negócios...")
 
-    print(f"\nTotal de negócios extraídos: {len(all_negocios)}")
+    print(f"\nTotal de negócios extraídos: {len(processed_negocios)}")
     
-    return all_negocios
-
-async def enrich_negocios_with_team():
-    """
-    Executa um comando SQL no Supabase para preencher a equipe do corretor
-    cruzando com a tabela de corretores.
-    """
-    print("\n--- Enriquecendo Negócios com Equipe (SQL) ---")
-    from src.utils.supabase_client import get_supabase_client
-    
-    supabase = get_supabase_client()
-    if not supabase:
-        print("Erro: Não foi possível conectar ao Supabase.")
-        return
-
-    try:
-        # Chamar a função RPC criada no banco
-        response = supabase.rpc('enrich_negocios_team', {}).execute()
-        print("Enriquecimento de equipe de negócios concluído com sucesso.")
-        
-    except Exception as e:
-        print(f"Erro ao enriquecer negócios: {e}")
+    # Registros processados já trazem cliente/corretor usados como fallback nas atividades
+    return processed_negocios
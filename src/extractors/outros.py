@@ -1,6 +1,6 @@
 from src.utils.async_api_client import get_vista_data_async
 from src.utils.supabase_client import get_last_run_from_supabase, update_last_run_in_supabase, save_to_supabase
-from src.config import SAVE_TO_CSV
+from src.utils.run_plan import EMPRESA_ID
 
 async def extract_usuarios(session):
     print("\n--- Extraindo Usuários (Async) ---")
@@ -62,11 +62,9 @@ async def extract_proprietarios(session):
 
 async def extract_pipes(session):
     print("\n--- Extraindo Pipes (Async) ---")
-    empresa_id = "32622"
-    
     fields = ["Codigo", "Nome", "Empresa"]
     
-    pipes = await get_vista_data_async(session, "pipes/listar", fields, url_params={"empresa": empresa_id})
+    pipes = await get_vista_data_async(session, "pipes/listar", fields, url_params={"empresa": EMPRESA_ID})
     print(f"Total de pipes extraídos: {len(pipes)}")
     
     if pipes:
@@ -0,0 +1,126 @@
+"""
+Recarga no Supabase de uma execução gravada no staging em Parquet (--stage / STAGING_ENABLED),
+sem chamar a API do Vista: repete uma carga que falhou ou faz backfill sem gastar cota da API.
+
+Uso:
+    python -m src.load --list
+    python -m src.load --latest
+    python -m src.load --run 2026-10-19T09-00-00 --entities negocios,atividades
+
+A recarga passa pelo mesmo loader (transformação, upsert em lotes, audit log); as linhas já foram
+gravadas no staging enriquecidas (equipe/nomes) e o sync_state não é alterado.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+from src.config import get_settings, require_supabase
+from src.utils.audit_logger import flush_audit_logs
+from src.utils.metrics import publish_run_metrics, stage
+from src.utils.progress import ProgressReporter
+from src.utils.run_plan import ENTITIES, comma_list
+from src.utils.secure_logger import capture_stdout, shutdown_logging
+from src.utils.staging import iter_staged, list_runs
+from src.utils.supabase_client import save_to_supabase
+
+def format_runs(runs) -> str:
+    if not runs:
+        return "Nenhuma execução no staging."
+    lines = []
+    for run_id, manifests in runs.items():
+        entities = ", ".join(
+            f"{entity}={manifest['rows']}" + ("" if manifest["complete"] else " (parcial)")
+            for entity, manifest in manifests.items()
+        )
+        lines.append(f"{run_id}: {entities}")
+    return "\n".join(lines)
+
+
+async def load_run(run_id, entities=None, root=None, batch_size=1000):
+    """
+    Recarrega as entidades de uma execução do staging.
+
+    Returns:
+        Registros enviados ao loader por entidade
+
+    Raises:
+        ValueError: Execução ou entidade inexistente no staging
+    """
+    root = root or get_settings().STAGING_DIR
+    manifests = list_runs(root).get(run_id)
+    if not manifests:
+        raise ValueError(f"Execução {run_id} não encontrada em {root}")
+    missing = set(entities or ()) - set(manifests)
+    if missing:
+        raise ValueError(f"Entidades ausentes na execução {run_id}: {', '.join(sorted(missing))}")
+    # Ordem do ETL (corretores/clientes antes de negócios e atividades), extras no fim
+    order = [entity for entity in ENTITIES if entity in manifests]
+    order += sorted(set(manifests) - set(order))
+    order = [entity for entity in order if not entities or entity in entities]
+
+    loaded = {}
+    for entity in order:
+        manifest = manifests[entity]
+        if not manifest["complete"]:
+            print(f"Aviso: {entity} tem staging parcial (execução interrompida), recarregando as partes fechadas")
+        print(f"\n--- Recarregando {entity}: {manifest['rows']} registros ---")
+        progress = ProgressReporter(f"recarga {entity}", total=manifest["rows"], unit="registros")
+        loaded[entity] = 0
+        try:
+            with stage(f"recarga_{entity}"):
+                # Lê alguns lotes por vez: memória limitada mesmo para atividades
+                for rows in iter_staged(root, entity, run_id, batch_size=batch_size * 10):
+                    await asyncio.to_thread(save_to_supabase, rows, entity, unique_key=manifest["unique_key"],
+                                            progress=progress, batch_size=batch_size, stage=False)
+                    loaded[entity] += len(rows)
+        finally:
+            progress.close()
+    return loaded
+
+
+async def main(args):
+    start_time = time.time()
+    require_supabase()
+    status = "SUCCESS"
+    try:
+        loaded = await load_run(args.run_id, args.entities, batch_size=args.batch_size)
+        print(f"\nRecarga de {args.run_id} concluída: " + ", ".join(f"{e}={n}" for e, n in loaded.items()))
+    except Exception:
+        status = "ERROR"
+        raise
+    finally:
+        publish_run_metrics("vista_load", time.time() - start_time, status)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Recarga de uma execução do staging em Parquet no Supabase")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--run", dest="run_id", help="Execução a recarregar (veja --list)")
+    target.add_argument("--latest", action="store_true", help="Recarrega a execução mais recente")
+    target.add_argument("--list", action="store_true", help="Lista as execuções do staging e sai")
+    parser.add_argument("--entities", type=comma_list, default=None,
+                        help="Entidades separadas por vírgula (padrão: todas as da execução)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Registros por upsert")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    runs = list_runs(get_settings().STAGING_DIR)
+    if args.list:
+        print(format_runs(runs))
+        sys.exit(0)
+    if args.latest:
+        if not runs:
+            print(format_runs(runs))
+            sys.exit(1)
+        # list_runs ordena pela última gravação (written_at), não pelo texto do run_id
+        args.run_id = list(runs)[-1]
+    capture_stdout()
+    try:
+        asyncio.run(main(args))
+    finally:
+        flush_audit_logs()
+        shutdown_logging()
@@ -1,73 +1,171 @@
+import argparse
 import asyncio
+import functools
+import sys
 import aiohttp
-from src.extractors.imoveis import extract_imoveis, enrich_imoveis_with_team
+from src.extractors.imoveis import extract_imoveis
 from src.extractors.clientes import extract_clientes
-from src.extractors.negocios import extract_negocios, enrich_negocios_with_team
-from src.extractors.atividades import extract_activities, enrich_atividades_with_names
+from src.extractors.negocios import extract_negocios
+from src.extractors.atividades import load_activities_streaming
 from src.extractors.outros import extract_usuarios, extract_agencias, extract_proprietarios, extract_pipes
 from src.extractors.agenda import extract_agenda
-from src.utils.supabase_client import save_to_supabase, update_last_run_in_supabase
-from src.config import SAVE_TO_CSV
+from src.utils.supabase_client import get_last_run_from_supabase, save_to_supabase
+from src.utils.validators import validate_cliente
+from src.utils.cache import cache_stats
+from src.utils.enrichment import load_enrichment_index, stop_enrichment
+from src.utils.metrics import publish_run_metrics, stage
+from src.utils.profiling import add_profile_arguments, run_main
+from src.utils.memory import MemoryBudgetExceeded, add_memory_arguments, configure_from_args, get_memory_monitor
+from src.utils.run_plan import ENTITIES, RunSelection, add_selection_arguments, dry_run, save_page_totals
+from src.utils.staging import add_staging_arguments, configure_staging_from_args, stop_staging
+from src.utils.secure_logger import capture_stdout, shutdown_logging
+from src.utils.audit_logger import flush_audit_logs
+from src.config import validate
 import time
 
-async def main():
+# Validação (ENABLE_DATA_VALIDATION) aplicada no save das tabelas gravadas aqui
+VALIDATORS = {"clientes": validate_cliente}
+
+async def extract_and_save(extraction, table_name):
+    """Grava o resultado (em thread) assim que o extrator termina, sem segurar a lista até as demais extrações."""
+    data = await extraction
+    if data:
+        await asyncio.to_thread(save_to_supabase, data, table_name, unique_key="Codigo",
+                                validator_func=VALIDATORS.get(table_name))
+
+async def main(selection=None):
     start_time = time.time()
+    validate()
+    selection = selection or RunSelection()
     print("--- INICIANDO PROCESSO ETL (ASYNC) ---")
+    if selection.partial or len(selection.entities) < len(ENTITIES):
+        print(f">> Execução seletiva: {selection.describe()}")
+    selection.resolve_last_run(get_last_run_from_supabase)
+    # Índices de enriquecimento (equipe/nomes) aplicados no save; usuarios e clientes extraídos
+    # nesta execução alimentam o índice ao serem gravados
+    with stage("indice_enriquecimento"):
+        await asyncio.to_thread(load_enrichment_index,
+                                [name for name in ("usuarios", "clientes") if selection.includes(name)])
+    status = "SUCCESS"
+    memory = get_memory_monitor()
+    memory_error = None
 
     try:
         async with aiohttp.ClientSession() as session:
             # 1. Extrações Independentes (Podem rodar em paralelo)
             # Agrupamos tarefas que não dependem umas das outras
-            print(">> Iniciando extrações paralelas (Imóveis, Clientes, Usuários, Agências, Proprietários, Pipes, Agenda)...")
+            extractions = {
+                "imoveis": lambda: extract_imoveis(session, *selection.window("imoveis"), update_state=not selection.partial),
+                "clientes": lambda: extract_clientes(session),
+                "usuarios": lambda: extract_usuarios(session),
+                "agencias": lambda: extract_agencias(session),
+                "proprietarios": lambda: extract_proprietarios(session),
+                "pipes": lambda: extract_pipes(session),
+                "agenda": lambda: extract_agenda(session, *selection.window("agenda"), update_state=not selection.partial),
+            }
+            names = [name for name in extractions if selection.includes(name)]
+            if names:
+                print(f">> Iniciando extrações paralelas ({', '.join(names)})...")
             
-            results = await asyncio.gather(
-                extract_imoveis(session),
-                extract_clientes(session),
-                extract_usuarios(session),
-                extract_agencias(session),
-                extract_proprietarios(session),
-                extract_pipes(session),
-                extract_agenda(session)
-            )
+            if memory.constrained:
+                print(">> Orçamento de memória definido: imóveis e clientes são gravados assim que extraídos")
+            with stage("extracao_paralela"):
+                results = await asyncio.gather(*(
+                    extract_and_save(extractions[name](), name)
+                    if memory.constrained and name in ("imoveis", "clientes") else extractions[name]()
+                    for name in names
+                ))
             
-            imoveis, clientes, usuarios, agencias, proprietarios, pipes, agenda = results
+            results = dict(zip(names, results))
+            imoveis, clientes = results.get("imoveis"), results.get("clientes")
 
             # Salvar resultados independentes (Isso pode ser feito enquanto extraímos negócios, mas por simplicidade faremos aqui)
-            if imoveis: save_to_supabase(imoveis, "imoveis", unique_key="Codigo")
-            if clientes: save_to_supabase(clientes, "clientes", unique_key="Codigo")
+            if not memory.constrained:
+                with stage("carga_imoveis_clientes"):
+                    if imoveis: save_to_supabase(imoveis, "imoveis", unique_key="Codigo")
+                    if clientes: save_to_supabase(clientes, "clientes", unique_key="Codigo",
+                                                  validator_func=VALIDATORS["clientes"])
+            # Libera as listas antes de negócios/atividades
+            results = imoveis = clientes = None
             # Usuarios, Agencias, etc já salvam dentro da função (legado) ou podemos refatorar. 
             # Na refatoração atual, mantivemos o save dentro, mas o ideal seria retornar e salvar aqui.
-            # Como mantivemos a compatibilidade, eles já salvaram.
-            
-            # Executar enriquecimento de dados (SQL Updates)
-            # Importante: Deve ser feito APÓS salvar imoveis e corretores
-            if imoveis:
-                await enrich_imoveis_with_team()
+            # Como mantivemos a compatibilidade, eles já salvaram (e alimentaram o índice de enriquecimento).
 
-            # 2. Negócios (Deals)
-            # Precisamos dos negócios para buscar atividades
-            all_negocios = await extract_negocios(session)
+            if not selection.includes("negocios"):
+                all_negocios = None
+            else:
+                # 2. Negócios (Deals)
+                # Precisamos dos negócios para buscar atividades
+                with stage("negocios"):
+                    all_negocios = await extract_negocios(session, selection.pipes, *selection.window("negocios"),
+                                                          update_state=not selection.partial)
             
             if all_negocios:
-                # Enriquecer negócios com equipe (SQL)
-                await enrich_negocios_with_team()
-                
-                # 3. Atividades (Depende de Negócios)
-                print("\n--- Extraindo Atividades (Incremental via Negócios Atualizados) ---")
-                atividades = await extract_activities(session, all_negocios)
-                if atividades:
-                    save_to_supabase(atividades, "atividades", unique_key="CodigoNegocio,CodigoAtividade")
-                    # Enriquecer atividades com nomes (SQL)
-                    await enrich_atividades_with_names()
-            else:
+                if selection.includes("atividades"):
+                    # 3. Atividades (Depende de Negócios)
+                    print("\n--- Extraindo Atividades (Incremental via Negócios Atualizados) ---")
+                    # Atividades são gravadas em blocos durante o crawl (memória constante)
+                    with stage("atividades"):
+                        await load_activities_streaming(session, all_negocios)
+            elif selection.includes("negocios"):
                 print("Nenhum negócio novo/atualizado encontrado, pulando extração de atividades.")
 
+    except MemoryBudgetExceeded as e:
+        # Falha cedo, antes do OOM killer: o relatório já foi registrado; sai com erro após gravar as métricas
+        status = "ERROR"
+        memory_error = e
     except Exception as e:
+        status = "ERROR"
         print(f"Erro no loop principal: {e}")
+    finally:
+        stop_enrichment()
+
+    for name, stats in cache_stats().items():
+        if stats["hits"] or stats["misses"]:
+            print(f"Cache {name}: {stats['hits']} acertos, {stats['misses']} faltas ({stats['hit_rate']:.0%})")
 
     end_time = time.time()
     duration = end_time - start_time
+    # Textfile do Prometheus + resumo JSON; o resumo também vai para o audit log da execução
+    publish_run_metrics("vista_etl", duration, status)
+    memory.write_report("vista_etl")
+    try:
+        # Base da estimativa do --dry-run nas próximas execuções
+        save_page_totals()
+    except OSError as e:
+        print(f"Falha ao gravar os totais de paginação: {e}")
     print(f"\n--- PROCESSO ETL CONCLUÍDO EM {duration:.2f} SEGUNDOS ---")
+    if memory_error is not None:
+        raise memory_error
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ETL Vista CRM -> Supabase")
+    add_profile_arguments(parser)
+    add_memory_arguments(parser)
+    add_selection_arguments(parser)
+    add_staging_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        args.selection = RunSelection.from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.dry_run:
+        # Sem API, Supabase nem credenciais: só o plano a partir dos totais da última execução
+        print(dry_run(args.selection))
+        sys.exit(0)
+    configure_from_args(args)
+    # Prints e logs saem por uma fila escrita em thread própria (não bloqueia o event loop)
+    capture_stdout()
+    try:
+        configure_staging_from_args(args)
+        run_main(functools.partial(main, args.selection), "vista_etl", args)
+    finally:
+        # Fecha os arquivos Parquet da execução (recarregáveis com python -m src.load)
+        stop_staging()
+        # Um único insert com os audit logs da execução, antes de esvaziar a fila de log
+        flush_audit_logs()
+        shutdown_logging()
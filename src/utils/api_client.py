@@ -1,13 +1,15 @@
 import requests
 import time
 import json
-from src.config import VISTA_API_URL, VISTA_API_KEY, MAX_RETRIES, REQUEST_DELAY, BACKOFF_FACTOR
+from src.config import MAX_RETRIES, REQUEST_DELAY, BACKOFF_FACTOR, get_settings
 
 def make_api_request(endpoint, params=None, method="GET"):
     """
     Função auxiliar para fazer requisições à API com tratamento de erros e retries.
     """
-    url = f"{VISTA_API_URL}/{endpoint}"
+    settings = get_settings()
+    settings.require_vista()
+    url = f"{settings.VISTA_API_URL}/{endpoint}"
     headers = {"Accept": "application/json"}
     
     # Adicionar delay preventivo
@@ -103,7 +105,7 @@ def get_vista_data(endpoint, fields, primary_date_field=None, filters=None, item
 
         # Parâmetros da URL
         query_params = {
-            "key": VISTA_API_KEY,
+            "key": get_settings().VISTA_API_KEY,
             "pesquisa": json.dumps(params_pesquisa),
             "showtotal": "1"
         }
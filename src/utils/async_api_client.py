@@ -1,8 +1,13 @@
 import aiohttp
 import asyncio
 import json
-from src.config import VISTA_API_URL, VISTA_API_KEY, MAX_RETRIES, BACKOFF_FACTOR, REQUEST_TIMEOUT
+import time
+from src.config import MAX_RETRIES, BACKOFF_FACTOR, REQUEST_TIMEOUT, get_settings
 from src.utils.secure_logger import SecureLogger
+from src.utils.progress import ProgressReporter
+from src.utils.run_plan import record_page_totals
+from src.utils.memory import check_budget
+from src.utils.metrics import HTTP_BYTES, HTTP_LATENCY, HTTP_RATE_LIMITED, HTTP_REQUESTS, HTTP_RETRIES
 
 # Logger seguro
 logger = SecureLogger('async_api_client')
@@ -22,7 +27,9 @@ async def make_async_api_request(session, endpoint, params=None, method="GET"):
     """
     Faz uma requisição assíncrona à API com retries, timeouts e backoff.
     """
-    url = f"{VISTA_API_URL}/{endpoint}"
+    settings = get_settings()
+    settings.require_vista()
+    url = f"{settings.VISTA_API_URL}/{endpoint}"
     headers = {
         "Accept": "application/json",
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
@@ -30,57 +37,75 @@ async def make_async_api_request(session, endpoint, params=None, method="GET"):
     
     # Configurar timeout
     timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=10)
-    
+
+    retry_reason = None
     for attempt in range(MAX_RETRIES):
+        if attempt:
+            HTTP_RETRIES.inc(endpoint=endpoint, reason=retry_reason)
         try:
             async with get_semaphore():  # Respeitar limite de concorrência
+                started = time.perf_counter()
                 async with session.request(
-                    method, url, 
-                    params=params, 
+                    method, url,
+                    params=params,
                     headers=headers,
                     timeout=timeout
                 ) as response:
-                        
+                    HTTP_REQUESTS.inc(endpoint=endpoint, status=response.status)
+
                     if response.status == 429:
+                        HTTP_RATE_LIMITED.inc(endpoint=endpoint)
+                        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+                        retry_reason = "429"
                         wait_time = (BACKOFF_FACTOR ** attempt) * 2
-                        logger.warning(f"Rate limit (429) em {endpoint}. Esperando {wait_time:.2f}s")
+                        logger.warning("Rate limit (429) em %s. Esperando %.2fs", endpoint, wait_time)
                         await asyncio.sleep(wait_time)
                         continue
-                        
+
                     if 500 <= response.status < 600:
+                        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+                        retry_reason = "5xx"
                         wait_time = (BACKOFF_FACTOR ** attempt)
-                        logger.warning(f"Erro Servidor ({response.status}) em {endpoint}. Esperando {wait_time:.2f}s")
+                        logger.warning("Erro Servidor (%s) em %s. Esperando %.2fs", response.status, endpoint, wait_time)
                         await asyncio.sleep(wait_time)
                         continue
-                        
+
                     response.raise_for_status()
-                    
+
                     try:
                         data = await response.json()
+                        # Corpo já lido por json(): read() devolve o buffer sem nova leitura
+                        HTTP_BYTES.inc(len(await response.read()), endpoint=endpoint)
+                        HTTP_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
                         # Verificar erro lógico na resposta
                         if isinstance(data, dict) and "status" in data and str(data["status"]) != "200":
-                            logger.warning(f"Erro API (Tentativa {attempt+1}): {data.get('message')}")
-                            return data 
+                            logger.warning("Erro API (Tentativa %d): %s", attempt + 1, data.get('message'))
+                            return data
                         return data
                     except json.JSONDecodeError:
                         text = await response.text()
-                        logger.error(f"Erro JSON em {endpoint}: {text[:100]}")
+                        logger.error("Erro JSON em %s: %s", endpoint, text[:100])
                         return None
-        
+
         except asyncio.TimeoutError:
-            logger.error(f"Timeout ({REQUEST_TIMEOUT}s) em {endpoint} (Tentativa {attempt+1}/{MAX_RETRIES})")
-            await asyncio.sleep(BACKOFF_FACTOR ** attempt)            
+            HTTP_REQUESTS.inc(endpoint=endpoint, status="timeout")
+            retry_reason = "timeout"
+            logger.error("Timeout (%ss) em %s (Tentativa %d/%d)", REQUEST_TIMEOUT, endpoint, attempt + 1, MAX_RETRIES)
+            await asyncio.sleep(BACKOFF_FACTOR ** attempt)
         except aiohttp.ClientResponseError as e:
             if e.status == 404:
-                logger.warning(f"Recurso não encontrado (404) em {endpoint}. Não será feita nova tentativa.")
+                logger.warning("Recurso não encontrado (404) em %s. Não será feita nova tentativa.", endpoint)
                 return None
-            logger.error(f"Erro HTTP {e.status} ({attempt+1}/{MAX_RETRIES}) em {endpoint}: {e}")
+            retry_reason = "http_error"
+            logger.error("Erro HTTP %s (%d/%d) em %s: %s", e.status, attempt + 1, MAX_RETRIES, endpoint, e)
             await asyncio.sleep(BACKOFF_FACTOR ** attempt)
         except aiohttp.ClientError as e:
-            logger.error(f"Erro Conexão ({attempt+1}/{MAX_RETRIES}) em {endpoint}: {e}")
+            HTTP_REQUESTS.inc(endpoint=endpoint, status="connection_error")
+            retry_reason = "connection_error"
+            logger.error("Erro Conexão (%d/%d) em %s: %s", attempt + 1, MAX_RETRIES, endpoint, e)
             await asyncio.sleep(BACKOFF_FACTOR ** attempt)
-            
-    logger.error(f"Falha definitiva após {MAX_RETRIES} tentativas para {endpoint}")
+
+    logger.error("Falha definitiva após %d tentativas para %s", MAX_RETRIES, endpoint)
     return None
 
 async def get_vista_data_async(session, endpoint, fields, primary_date_field=None, filters=None, items_per_page=50, extra_params=None, url_params=None, last_run_time=None):
@@ -91,7 +116,7 @@ async def get_vista_data_async(session, endpoint, fields, primary_date_field=Non
     all_data = []
     
     # 1. Buscar primeira página para obter metadados
-    logger.info(f"Iniciando extração async de {endpoint}...")
+    logger.info("Iniciando extração async de %s...", endpoint)
     
     # Lógica Incremental
     if primary_date_field and last_run_time:
@@ -117,7 +142,7 @@ async def get_vista_data_async(session, endpoint, fields, primary_date_field=Non
         params_pesquisa.update(extra_params)
 
     query_params = {
-        "key": VISTA_API_KEY,
+        "key": get_settings().VISTA_API_KEY,
         "pesquisa": json.dumps(params_pesquisa),
         "showtotal": "1"
     }
@@ -151,12 +176,23 @@ async def get_vista_data_async(session, endpoint, fields, primary_date_field=Non
         else:
             total_pages = int(first_page_data.get("paginas", 1))
             
-    logger.info(f"{endpoint}: Página 1 processada. Total páginas: {total_pages}")
+    logger.info("%s: Página 1 processada. Total páginas: %s", endpoint, total_pages)
     
     if total_pages <= 1:
+        if not filters:
+            record_page_totals(endpoint, url_params, total_pages, len(all_data), items_per_page)
         return all_data
 
     # 2. Disparar requisições para as demais páginas em paralelo
+    progress = ProgressReporter(endpoint, total=total_pages, unit="páginas")
+    progress.update(1)
+    
+    async def fetch_page(page, q_params):
+        page_data = await make_async_api_request(session, endpoint, params=q_params)
+        progress.update(1, "página %d recebida", page)
+        check_budget(endpoint)
+        return page_data
+    
     tasks = []
     for page in range(2, total_pages + 1):
         # Clonar params para não afetar outras iterações
@@ -170,10 +206,11 @@ async def get_vista_data_async(session, endpoint, fields, primary_date_field=Non
         if "meta" in first_page_data: 
              q_params["page"] = page
 
-        tasks.append(make_async_api_request(session, endpoint, params=q_params))
+        tasks.append(fetch_page(page, q_params))
         
     # Aguardar todas as páginas
     pages_results = await asyncio.gather(*tasks)
+    progress.close()
     
     for i, page_data in enumerate(pages_results):
         if not page_data:
@@ -192,5 +229,8 @@ async def get_vista_data_async(session, endpoint, fields, primary_date_field=Non
             
         all_data.extend(p_results)
         
-    logger.info(f"{endpoint}: Extração concluída. Total registros: {len(all_data)}")
+    logger.info("%s: Extração concluída. Total registros: %d", endpoint, len(all_data))
+    # Só listagens completas servem de base para a estimativa do --dry-run
+    if not filters:
+        record_page_totals(endpoint, url_params, total_pages, len(all_data), items_per_page)
     return all_data
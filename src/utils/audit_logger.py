@@ -2,28 +2,111 @@
 Sistema de auditoria para rastreamento de operações ETL.
 Registra execuções, erros e métricas de performance.
 Compliance: LGPD - rastreabilidade de processamento de dados.
+
+Os registros ficam em buffer e são gravados em um único insert em lote (a cada N
+registros ou no fim da execução). Se o insert falhar, vão para um arquivo JSONL local.
 """
 
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
+import asyncio
+import atexit
+import json
+import os
+import threading
 import time
-from supabase import Client
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Registros acumulados antes de um flush automático
+DEFAULT_FLUSH_EVERY = 100
 
 
 class AuditLogger:
     """
     Logger de auditoria para operações de ETL.
-    Registra todas as operações na tabela audit_logs do Supabase.
+    Acumula os registros em memória e os grava na tabela audit_logs do Supabase em lote.
+    Seguro para uso a partir de threads (loader em asyncio.to_thread) e do event loop.
     """
     
-    def __init__(self, supabase: Client):
+    def __init__(
+        self,
+        supabase: Optional["Client"] = None,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+        fallback_path: Optional[str] = None
+    ):
         """
         Inicializa o audit logger.
         
         Args:
-            supabase: Cliente Supabase autenticado
+            supabase: Cliente Supabase autenticado (padrão: criado no primeiro flush)
+            flush_every: Número de registros que dispara um flush automático
+            fallback_path: Arquivo JSONL usado quando o insert falha
         """
         self.supabase = supabase
+        self.flush_every = flush_every
+        self.fallback_path = fallback_path
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Serializa os flushes (o buffer continua aceitando registros durante o insert)
+        self._flush_lock = threading.Lock()
+    
+    def _append(self, audit_record: Dict[str, Any]):
+        with self._lock:
+            self._buffer.append(audit_record)
+            should_flush = len(self._buffer) >= self.flush_every
+        if should_flush:
+            self.flush()
+    
+    def pending(self) -> int:
+        """Número de registros aguardando flush."""
+        with self._lock:
+            return len(self._buffer)
+    
+    def flush(self) -> int:
+        """
+        Grava os registros pendentes em um único insert. Em caso de falha,
+        os registros são anexados ao arquivo de fallback (não se perdem).
+        
+        Returns:
+            Número de registros gravados (no Supabase ou no fallback)
+        """
+        with self._flush_lock:
+            with self._lock:
+                records, self._buffer = self._buffer, []
+            if not records:
+                return 0
+            
+            try:
+                if self.supabase is None:
+                    from src.utils.supabase_client import get_supabase_client
+                    self.supabase = get_supabase_client()
+                self.supabase.table('audit_logs').insert(records).execute()
+            except Exception as e:
+                # Não queremos que falha no audit quebre o ETL
+                print(f"AVISO: Falha ao registrar {len(records)} audit logs: {e}")
+                self._write_fallback(records)
+            return len(records)
+    
+    async def flush_async(self) -> int:
+        """Versão para o event loop: o insert roda em thread, sem bloquear o loop."""
+        return await asyncio.to_thread(self.flush)
+    
+    def _write_fallback(self, records: List[Dict[str, Any]]):
+        if not self.fallback_path:
+            print("AVISO: Sem arquivo de fallback configurado; audit logs descartados")
+            return
+        try:
+            directory = os.path.dirname(self.fallback_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.fallback_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            print(f"AVISO: {len(records)} audit logs gravados em {self.fallback_path}")
+        except OSError as e:
+            print(f"AVISO: Falha ao gravar audit logs no fallback: {e}")
     
     def log_etl_run(
         self,
@@ -47,24 +130,17 @@ class AuditLogger:
             metadata: Metadados adicionais (opcional)
             execution_time_ms: Tempo de execução em milissegundos
         """
-        try:
-            audit_record = {
-                'timestamp': datetime.now().isoformat(),
-                'entity': entity,
-                'operation': 'ETL_RUN',
-                'status': status,
-                'records_processed': records_processed,
-                'records_failed': records_failed,
-                'errors': errors or [],
-                'metadata': metadata or {},
-                'execution_time_ms': execution_time_ms,
-            }
-            
-            self.supabase.table('audit_logs').insert(audit_record).execute()
-            
-        except Exception as e:
-            # Não queremos que falha no audit quebre o ETL
-            print(f"AVISO: Falha ao registrar audit log: {e}")
+        self._append({
+            'timestamp': datetime.now().isoformat(),
+            'entity': entity,
+            'operation': 'ETL_RUN',
+            'status': status,
+            'records_processed': records_processed,
+            'records_failed': records_failed,
+            'errors': errors or [],
+            'metadata': metadata or {},
+            'execution_time_ms': execution_time_ms,
+        })
     
     def log_operation(
         self,
@@ -82,19 +158,40 @@ class AuditLogger:
             status: Status da operação
             metadata: Metadados adicionais
         """
-        try:
-            audit_record = {
-                'timestamp': datetime.now().isoformat(),
-                'entity': entity,
-                'operation': operation,
-                'status': status,
-                'metadata': metadata or {},
-            }
-            
-            self.supabase.table('audit_logs').insert(audit_record).execute()
-            
-        except Exception as e:
-            print(f"AVISO: Falha ao registrar audit log: {e}")
+        self._append({
+            'timestamp': datetime.now().isoformat(),
+            'entity': entity,
+            'operation': operation,
+            'status': status,
+            'metadata': metadata or {},
+        })
+
+
+_shared_audit_logger: Optional[AuditLogger] = None
+_shared_lock = threading.Lock()
+
+
+def get_audit_logger() -> AuditLogger:
+    """
+    Retorna o AuditLogger compartilhado da execução (um único buffer para todas as tabelas).
+    O flush final acontece em flush_audit_logs() ou no atexit.
+    """
+    global _shared_audit_logger
+    with _shared_lock:
+        if _shared_audit_logger is None:
+            from src.config import AUDIT_FLUSH_EVERY, AUDIT_FALLBACK_FILE
+            _shared_audit_logger = AuditLogger(flush_every=AUDIT_FLUSH_EVERY, fallback_path=AUDIT_FALLBACK_FILE)
+        return _shared_audit_logger
+
+
+def flush_audit_logs() -> int:
+    """Grava os registros pendentes do AuditLogger compartilhado (fim da execução)."""
+    if _shared_audit_logger is None:
+        return 0
+    return _shared_audit_logger.flush()
+
+
+atexit.register(flush_audit_logs)
 
 
 class ETLTimer:
@@ -162,11 +259,9 @@ class ETLTimer:
 
 # Exemplo de uso:
 """
-from src.utils.audit_logger import AuditLogger, ETLTimer
-from src.utils.supabase_client import get_supabase_client
+from src.utils.audit_logger import ETLTimer, get_audit_logger, flush_audit_logs
 
-supabase = get_supabase_client()
-audit = AuditLogger(supabase)
+audit = get_audit_logger()  # ou AuditLogger(get_supabase_client())
 
 # Uso simples
 audit.log_etl_run(
@@ -185,4 +280,7 @@ with ETLTimer(audit, 'clientes') as timer:
             timer.add_success()
         except Exception as e:
             timer.add_failure(error=str(e))
+
+# Fim da execução: um único insert com tudo que ficou no buffer
+flush_audit_logs()
 """
@@ -0,0 +1,114 @@
+"""
+Caches de validação: LRU limitado, em memória e só durante a execução, com contadores
+de acerto/erro.
+"""
+
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+DEFAULT_MAXSIZE = 100_000
+
+_MISSING = object()
+
+# Caches registrados por nome (para estatísticas e limpeza)
+_registry: Dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+    """
+    Cache LRU limitado com contadores de acertos e faltas.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Args:
+            maxsize: Número máximo de entradas (as menos usadas são descartadas)
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Retorna acertos, faltas, taxa de acerto e ocupação."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+def register_cache(name: str, maxsize: int = DEFAULT_MAXSIZE) -> LRUCache:
+    """Cria (ou retorna) o cache registrado com esse nome."""
+    cache = _registry.get(name)
+    if cache is None:
+        cache = _registry[name] = LRUCache(maxsize)
+    return cache
+
+
+def memoize(name: str, maxsize: int = DEFAULT_MAXSIZE) -> Callable[[Callable], Callable]:
+    """
+    Decorator que memoiza uma função pura de validação/sanitização em um LRUCache registrado.
+    Argumentos não hasheáveis não são cacheados.
+
+    Args:
+        name: Nome do cache (aparece em cache_stats)
+        maxsize: Número máximo de entradas
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = register_cache(name, maxsize)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items()))) if kwargs else args
+            try:
+                value = cache.get(key, _MISSING)
+            except TypeError:
+                return func(*args, **kwargs)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Estatísticas de todos os caches registrados."""
+    return {name: cache.stats() for name, cache in _registry.items()}
+
+
+def clear_caches():
+    """Esvazia todos os caches registrados e zera os contadores."""
+    for cache in _registry.values():
+        cache.clear()
@@ -0,0 +1,133 @@
+"""
+Enriquecimento durante a transformação: equipe e nome do corretor e nome do cliente preenchidos
+a partir de índices em memória, antes da primeira gravação, no lugar dos UPDATEs pós-carga
+(enrich_*_team / enrich_atividades_names) que reescreviam cada linha enriquecida.
+
+- código do corretor -> equipe (corretores."Equipe") e nome (usuarios."Nome")
+- código do cliente -> nome (clientes."Nome")
+
+Os índices são montados uma vez por execução (Supabase para as tabelas que a execução não extrai)
+e atualizados com o que a própria execução grava em usuarios/clientes; save_to_supabase aplica
+o índice ativo a cada tabela enriquecida antes do staging e do upsert.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from src.utils.secure_logger import SecureLogger
+
+logger = SecureLogger('enrichment')
+
+# Tabelas de origem dos índices e linhas lidas por página
+SOURCE_TABLES = ("corretores", "usuarios", "clientes")
+PAGE_SIZE = 1000
+
+# Tabela enriquecida -> (coluna de destino, coluna com o código, índice)
+TARGETS = {
+    "imoveis": (("EquipeCorretor", "CodigoCorretor", "teams"),),
+    "negocios": (("EquipeCorretor", "CodigoCorretor", "teams"),),
+    "atividades": (("NomeCorretor", "CodigoCorretor", "brokers"), ("NomeCliente", "CodigoCliente", "clients")),
+}
+
+# Tabela de origem -> (índice, coluna com o valor)
+_SOURCES = {
+    "corretores": ("teams", "Equipe"),
+    "usuarios": ("brokers", "Nome"),
+    "clientes": ("clients", "Nome"),
+}
+
+
+def _key(value: Any) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    return str(value)
+
+
+class EnrichmentIndex:
+    """Índices código -> valor usados para preencher as colunas enriquecidas."""
+
+    def __init__(self):
+        self.teams: Dict[str, str] = {}
+        self.brokers: Dict[str, str] = {}
+        self.clients: Dict[str, str] = {}
+
+    def learn(self, table: str, rows: Iterable[Any]) -> int:
+        """Atualiza o índice com registros de corretores/usuarios/clientes. Returns: entradas lidas."""
+        name, column = _SOURCES[table]
+        index = getattr(self, name)
+        count = 0
+        for row in rows:
+            key, value = _key(row.get("Codigo")), row.get(column)
+            if key is not None and value not in (None, ""):
+                index[key] = value
+                count += 1
+        return count
+
+    @classmethod
+    def from_supabase(cls, client, tables: Sequence[str] = SOURCE_TABLES,
+                      page_size: int = PAGE_SIZE) -> "EnrichmentIndex":
+        """Monta os índices lendo só código e valor das tabelas de origem (paginado)."""
+        index = cls()
+        for table in tables:
+            column = _SOURCES[table][1]
+            start, count = 0, 0
+            while True:
+                response = (client.table(table).select(f"Codigo, {column}").order("Codigo")
+                            .range(start, start + page_size - 1).execute())
+                rows = response.data or []
+                count += index.learn(table, rows)
+                if len(rows) < page_size:
+                    break
+                start += page_size
+            logger.info("Índice de enriquecimento: %d entradas de %s", count, table)
+        return index
+
+    def enrich(self, table: str, rows: Iterable[Any]) -> int:
+        """Preenche as colunas enriquecidas da tabela (in place). Returns: valores preenchidos."""
+        filled = 0
+        for column, code_column, name in TARGETS.get(table, ()):
+            index = getattr(self, name)
+            if not index:
+                continue
+            for row in rows:
+                value = index.get(_key(row.get(code_column)))
+                if value is not None and row.get(column) != value:
+                    row[column] = value
+                    filled += 1
+        return filled
+
+
+_index: Optional[EnrichmentIndex] = None
+
+
+def start_enrichment(index: EnrichmentIndex) -> EnrichmentIndex:
+    """Ativa o índice da execução: a partir daqui save_to_supabase enriquece e alimenta o índice."""
+    global _index
+    _index = index
+    return index
+
+
+def stop_enrichment():
+    global _index
+    _index = None
+
+
+def enrich_rows(table: str, rows: Sequence[Any]):
+    """Aplica o índice ativo antes da gravação (e aprende com usuarios/clientes gravados)."""
+    if _index is None:
+        return
+    if table in _SOURCES:
+        _index.learn(table, rows)
+    elif table in TARGETS:
+        filled = _index.enrich(table, rows)
+        logger.debug("%s: %d valores enriquecidos", table, filled)
+
+
+def load_enrichment_index(skip: Iterable[str] = ()) -> EnrichmentIndex:
+    """
+    Monta e ativa o índice da execução a partir do Supabase, exceto as tabelas em `skip`
+    (extraídas na própria execução: o índice aprende com elas ao serem gravadas).
+    """
+    from src.utils.supabase_client import get_supabase_client
+    tables = [table for table in SOURCE_TABLES if table not in set(skip)]
+    index = EnrichmentIndex.from_supabase(get_supabase_client(), tables) if tables else EnrichmentIndex()
+    return start_enrichment(index)
@@ -0,0 +1,212 @@
+"""
+Acompanhamento de memória por etapa e orçamento de memória da execução.
+
+- RSS no início/fim de cada etapa (metrics.stage) e pico do processo (ru_maxrss)
+- com rastreamento ligado (--memory ou MEMORY_TRACKING=True): pico do tracemalloc por
+  etapa e os principais pontos de alocação (arquivo:linha) que cresceram na etapa
+- com MEMORY_BUDGET_MB: acima de MEMORY_SOFT_LIMIT do orçamento o pipeline passa para o
+  modo em blocos/streaming (under_pressure); acima do orçamento a execução falha cedo
+  com MemoryBudgetExceeded e um relatório, antes do OOM killer do runner
+"""
+
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.secure_logger import SecureLogger
+
+logger = SecureLogger('memory')
+
+MB = 2 ** 20
+DEFAULT_SOFT_LIMIT = 0.8
+DEFAULT_TOP_SITES = 10
+# check_budget em laços quentes lê o RSS no máximo uma vez por intervalo
+CHECK_INTERVAL = 0.5
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """RSS acima de MEMORY_BUDGET_MB; a mensagem traz o relatório por etapa."""
+
+
+def current_rss() -> int:
+    """RSS atual do processo em bytes (Linux: /proc; demais: pico como aproximação)."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss()
+
+
+def peak_rss() -> int:
+    """Pico de RSS do processo em bytes (ru_maxrss: KB no Linux, bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryMonitor:
+    """Registra a memória de cada etapa e aplica o orçamento da execução."""
+
+    def __init__(self, budget_mb: float = 0, trace: bool = False, soft_limit: float = DEFAULT_SOFT_LIMIT,
+                 top: int = DEFAULT_TOP_SITES):
+        """
+        Args:
+            budget_mb: Orçamento de RSS em MB (0 desliga)
+            trace: Liga o tracemalloc (pico e pontos de alocação por etapa; deixa a execução mais lenta)
+            soft_limit: Fração do orçamento a partir da qual o pipeline usa o modo em blocos
+            top: Pontos de alocação listados por etapa
+        """
+        self.budget = int(budget_mb * MB)
+        self.soft_limit = soft_limit
+        self.trace = trace
+        self.top = top
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._next_check = 0.0
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @property
+    def constrained(self) -> bool:
+        """Há orçamento configurado (o pipeline prefere os caminhos em blocos/streaming)."""
+        return self.budget > 0
+
+    def under_pressure(self) -> bool:
+        """RSS acima do limite suave do orçamento."""
+        return self.constrained and current_rss() >= self.budget * self.soft_limit
+
+    def check_budget(self, where: str, force: bool = False):
+        """
+        Falha cedo se o RSS passou do orçamento. Sem `force`, lê o RSS no máximo a cada CHECK_INTERVAL.
+
+        Raises:
+            MemoryBudgetExceeded: RSS acima de MEMORY_BUDGET_MB
+        """
+        if not self.constrained:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + CHECK_INTERVAL
+        rss = current_rss()
+        if rss > self.budget:
+            report = self.report()
+            logger.error("Memória acima do orçamento em %s: RSS %.0f MB > %.0f MB\n%s", where, rss / MB,
+                         self.budget / MB, report)
+            raise MemoryBudgetExceeded(
+                f"RSS {rss / MB:.0f} MB acima de MEMORY_BUDGET_MB={self.budget / MB:.0f} em {where}\n{report}")
+
+    @contextmanager
+    def track(self, name: str) -> Iterator[None]:
+        """Mede a etapa (RSS antes/depois, pico e alocações) e confere o orçamento no fim."""
+        rss_before = current_rss()
+        snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            snapshot = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            rss_after = current_rss()
+            entry: Dict[str, Any] = {
+                "rss_before_mb": round(rss_before / MB, 1),
+                "rss_after_mb": round(rss_after / MB, 1),
+                # ru_maxrss é atualizado pelo kernel com atraso; nunca abaixo do RSS lido agora
+                "process_peak_mb": round(max(peak_rss(), rss_after) / MB, 1),
+            }
+            if snapshot is not None and tracemalloc.is_tracing():
+                entry["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / MB, 1)
+                entry["top_sites"] = _top_sites(snapshot, tracemalloc.take_snapshot(), self.top)
+            self.stages[name] = entry
+        self.check_budget(name, force=True)
+
+    def report(self) -> str:
+        """Tabela por etapa (RSS, pico, maiores pontos de alocação)."""
+        lines = [f"{'etapa':<28} {'RSS antes':>9} {'RSS depois':>10} {'pico proc.':>10} {'pico traced':>11}"]
+        for name, entry in self.stages.items():
+            traced = entry.get("traced_peak_mb")
+            lines.append(f"{name:<28} {entry['rss_before_mb']:>9.1f} {entry['rss_after_mb']:>10.1f} "
+                         f"{entry['process_peak_mb']:>10.1f} {traced if traced is not None else '-':>11}")
+            for site in entry.get("top_sites", [])[:3]:
+                lines.append(f"    {site['size_diff_mb']:+8.1f} MB  {site['site']}")
+        lines.append(f"RSS atual {current_rss() / MB:.1f} MB, pico {peak_rss() / MB:.1f} MB"
+                     + (f", orçamento {self.budget / MB:.0f} MB" if self.budget else ""))
+        return "\n".join(lines)
+
+    def write_report(self, job: str, directory: Optional[str] = None) -> str:
+        """Grava <directory>/<job>-memory.json (padrão: METRICS_DIR) e registra o resumo."""
+        if directory is None:
+            from src.config import METRICS_DIR
+            directory = METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{job}-memory.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "budget_mb": self.budget / MB if self.budget else None,
+                "peak_rss_mb": round(peak_rss() / MB, 1),
+                "stages": self.stages,
+            }, f, indent=2, ensure_ascii=False)
+        logger.info("Memória por etapa (MB):\n%s", self.report())
+        return path
+
+
+def _top_sites(before: "tracemalloc.Snapshot", after: "tracemalloc.Snapshot", top: int) -> List[Dict[str, Any]]:
+    own_file = os.path.abspath(__file__)
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, own_file)]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "lineno")
+    return [
+        {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "size_diff_mb": round(stat.size_diff / MB, 2), "size_mb": round(stat.size / MB, 2)}
+        for stat in stats[:top] if stat.size_diff > 0
+    ]
+
+
+_monitor: Optional[MemoryMonitor] = None
+
+
+def get_memory_monitor() -> MemoryMonitor:
+    """Monitor da execução (MEMORY_BUDGET_MB / MEMORY_TRACKING; sem configuração, só RSS por etapa)."""
+    global _monitor
+    if _monitor is None:
+        from src.config import get_settings
+        settings = get_settings()
+        _monitor = MemoryMonitor(budget_mb=settings.MEMORY_BUDGET_MB, trace=settings.MEMORY_TRACKING)
+    return _monitor
+
+
+def configure_memory(budget_mb: Optional[float] = None, trace: Optional[bool] = None) -> MemoryMonitor:
+    """Recria o monitor com opções da linha de comando (None mantém o valor da configuração)."""
+    global _monitor
+    current = get_memory_monitor()
+    _monitor = MemoryMonitor(
+        budget_mb=current.budget / MB if budget_mb is None else budget_mb,
+        trace=current.trace if trace is None else trace,
+    )
+    return _monitor
+
+
+def under_pressure() -> bool:
+    return get_memory_monitor().under_pressure()
+
+
+def check_budget(where: str):
+    """Atalho para laços quentes (no máximo uma leitura de RSS por CHECK_INTERVAL)."""
+    get_memory_monitor().check_budget(where)
+
+
+def add_memory_arguments(parser):
+    """Opções --memory/--memory-budget-mb (src.main e scripts/sync_activities.py)."""
+    parser.add_argument("--memory", action="store_true",
+                        help="Liga o tracemalloc: pico e principais pontos de alocação por etapa")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Orçamento de RSS em MB (padrão: MEMORY_BUDGET_MB; 0 desliga)")
+
+
+def configure_from_args(args) -> MemoryMonitor:
+    """Aplica --memory/--memory-budget-mb ao monitor da execução."""
+    return configure_memory(budget_mb=args.memory_budget_mb, trace=True if args.memory else None)
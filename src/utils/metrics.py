@@ -0,0 +1,322 @@
+"""
+Registro de métricas da execução (requisições por endpoint, latências, retries, 429,
+bytes, linhas e latência de lote por tabela, tempo de cada etapa).
+No fim da execução as métricas são exportadas em formato textfile do Prometheus
+(node_exporter textfile collector) e em um resumo JSON, anexado também ao audit log.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from src.utils.memory import get_memory_monitor
+
+# Buckets (segundos) para latência de requisições HTTP e de lotes do loader
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        name + '="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        self.name = name
+        self.documentation = documentation
+        self._lock = lock
+
+    def header(self) -> str:
+        return f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.type_name}\n"
+
+
+class Counter(_Metric):
+    """Contador monotônico por conjunto de labels."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock):
+        super().__init__(name, documentation, lock)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, value: float = 1, **labels: Any):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def to_prometheus(self) -> str:
+        lines = [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+        return self.header() + "".join(line + "\n" for line in lines)
+
+    def summary(self) -> Dict[str, float]:
+        return {_format_labels(key) or "total": value for key, value in sorted(self._values.items())}
+
+
+class Gauge(Counter):
+    """Valor pontual por conjunto de labels (ex.: duração de uma etapa)."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos, soma e contagem por conjunto de labels."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, lock: threading.Lock, buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, lock)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket (não cumulativa, + overflow), soma, contagem]
+        self._series: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: Any) -> Iterator[None]:
+        """Mede o bloco e registra a duração (segundos)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def mean(self, **labels: Any) -> Optional[float]:
+        """Média das observações com esses labels (None se não houver)."""
+        series = self._series.get(_label_key(labels))
+        return series[1] / series[2] if series and series[2] else None
+
+    def quantile(self, q: float, **labels: Any) -> Optional[float]:
+        """Estimativa do quantil pelos buckets (interpolação linear, como histogram_quantile)."""
+        series = self._series.get(_label_key(labels))
+        return self._quantile(series, q) if series else None
+
+    def _quantile(self, series: list, q: float) -> Optional[float]:
+        counts, _, total = series
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets + (float("inf"),), counts):
+            if cumulative + count >= rank and count:
+                if upper == float("inf"):
+                    return self.buckets[-1] if self.buckets else lower
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return lower
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for key, (counts, total_sum, count) in sorted(self._series.items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(upper))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(round(total_sum, 6))}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return self.header() + "".join(line + "\n" for line in lines)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for key, series in sorted(self._series.items()):
+            _, total_sum, count = series
+            result[_format_labels(key) or "total"] = {
+                "count": count,
+                "sum": round(total_sum, 3),
+                "mean": round(total_sum / count, 4) if count else 0.0,
+                "p50": round(self._quantile(series, 0.5), 4),
+                "p99": round(self._quantile(series, 0.99), 4),
+            }
+        return result
+
+
+class MetricsRegistry:
+    """Conjunto de métricas nomeadas da execução (seguro para threads)."""
+
+    def __init__(self, namespace: str = "vista_etl"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _get(self, cls, name: str, documentation: str, **kwargs) -> Any:
+        full_name = f"{self.namespace}_{name}"
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = self._metrics[full_name] = cls(full_name, documentation, self._lock, **kwargs)
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._get(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._get(Gauge, name, documentation)
+
+    def histogram(self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, buckets=buckets)
+
+    def reset(self):
+        """Zera os valores (as métricas continuam registradas)."""
+        with self._lock:
+            for metric in self._metrics.values():
+                if isinstance(metric, Histogram):
+                    metric._series.clear()
+                else:
+                    metric._values.clear()
+
+    def to_prometheus(self) -> str:
+        """Exposição no formato texto do Prometheus (textfile collector)."""
+        with self._lock:
+            return "".join(metric.to_prometheus() for _, metric in sorted(self._metrics.items()))
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumo JSON-serializável (p50/p99 estimados para histogramas); métricas vazias são omitidas."""
+        with self._lock:
+            result = {}
+            for name, metric in sorted(self._metrics.items()):
+                values = metric.summary()
+                if values:
+                    result[name[len(self.namespace) + 1:]] = values
+            return result
+
+
+# Registro global da execução e métricas instrumentadas no pipeline
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "Respostas recebidas da API Vista por endpoint e status")
+HTTP_LATENCY = REGISTRY.histogram("http_request_seconds", "Latência das requisições à API Vista (por tentativa)")
+HTTP_RETRIES = REGISTRY.counter("http_retries_total", "Novas tentativas por endpoint e motivo")
+HTTP_RATE_LIMITED = REGISTRY.counter("http_rate_limited_total", "Respostas 429 por endpoint")
+HTTP_BYTES = REGISTRY.counter("http_response_bytes_total", "Bytes recebidos da API Vista por endpoint")
+ROWS_LOADED = REGISTRY.counter("rows_loaded_total", "Linhas gravadas no Supabase por tabela")
+ROWS_FAILED = REGISTRY.counter("rows_failed_total", "Linhas em lotes que falharam por tabela")
+LOAD_BATCH_LATENCY = REGISTRY.histogram("load_batch_seconds", "Latência do upsert de cada lote por tabela")
+STAGE_SECONDS = REGISTRY.gauge("stage_seconds", "Tempo de parede de cada etapa da execução")
+STAGE_RSS = REGISTRY.gauge("stage_rss_megabytes", "RSS do processo ao fim de cada etapa")
+PEAK_RSS = REGISTRY.gauge("peak_rss_megabytes", "Pico de RSS do processo até o fim de cada etapa")
+RUN_SECONDS = REGISTRY.gauge("run_duration_seconds", "Duração total da execução")
+RUN_TIMESTAMP = REGISTRY.gauge("run_last_timestamp_seconds", "Horário (epoch) do fim da última execução")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Mede o tempo de parede e a memória de uma etapa (ex.: extracao, carga_imoveis); confere o orçamento no fim."""
+    monitor = get_memory_monitor()
+    start = time.perf_counter()
+    try:
+        with monitor.track(name):
+            yield
+    finally:
+        STAGE_SECONDS.set(round(time.perf_counter() - start, 3), stage=name)
+        memory = monitor.stages.get(name)
+        if memory:
+            STAGE_RSS.set(memory["rss_after_mb"], stage=name)
+            PEAK_RSS.set(memory["process_peak_mb"], stage=name)
+
+
+def write_metrics(directory: Optional[str] = None, job: str = "vista_etl") -> Dict[str, Any]:
+    """
+    Grava as métricas em <directory>/<job>.prom (textfile do Prometheus) e <job>.json.
+
+    Args:
+        directory: Diretório de saída (padrão: METRICS_DIR)
+        job: Nome base dos arquivos (ex.: vista_etl, sync_activities)
+
+    Returns:
+        Resumo JSON das métricas
+    """
+    if directory is None:
+        from src.config import METRICS_DIR
+        directory = METRICS_DIR
+    summary = REGISTRY.summary()
+    os.makedirs(directory, exist_ok=True)
+    # Escrita atômica: o textfile collector nunca lê um arquivo pela metade
+    for filename, content in (
+        (f"{job}.prom", REGISTRY.to_prometheus()),
+        (f"{job}.json", json.dumps(summary, indent=2, ensure_ascii=False)),
+    ):
+        path = os.path.join(directory, filename)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(f"{path}.tmp", path)
+    return summary
+
+
+def publish_run_metrics(job: str, duration_s: float, status: str = "SUCCESS") -> Dict[str, Any]:
+    """
+    Fecha as métricas da execução: grava textfile/JSON e anexa o resumo ao audit log.
+
+    Falhas aqui nunca interrompem o ETL (apenas são registradas).
+
+    Args:
+        job: Nome da execução (vista_etl, sync_activities)
+        duration_s: Duração total em segundos
+        status: Status da execução para o audit log
+
+    Returns:
+        Resumo JSON das métricas
+    """
+    from src.utils.secure_logger import SecureLogger
+    logger = SecureLogger('metrics')
+
+    RUN_SECONDS.set(round(duration_s, 3), job=job)
+    RUN_TIMESTAMP.set(int(time.time()), job=job)
+    summary = REGISTRY.summary()
+    try:
+        summary = write_metrics(job=job)
+    except OSError as e:
+        logger.error("Falha ao gravar métricas de %s: %s", job, e)
+
+    try:
+        from src.config import ENABLE_AUDIT_LOGGING
+        if ENABLE_AUDIT_LOGGING:
+            from src.utils.audit_logger import get_audit_logger
+            get_audit_logger().log_etl_run(
+                entity=job,
+                status=status,
+                metadata={"metrics": summary},
+                execution_time_ms=int(duration_s * 1000),
+            )
+    except Exception as e:
+        logger.error("Falha ao registrar métricas de %s no audit log: %s", job, e)
+    return summary
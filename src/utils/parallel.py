@@ -0,0 +1,147 @@
+"""
+Execução de etapas CPU-bound (validação, sanitização, transformação de linhas) em um
+pool de processos compartilhado. Os dados são enviados em blocos grandes para reduzir o
+custo de pickling e os resultados voltam na ordem original.
+"""
+
+import atexit
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Abaixo disso o custo de serializar os dados para outro processo supera o ganho
+MIN_PARALLEL_ITEMS = 5000
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+
+def default_workers() -> int:
+    """Número de workers configurado (PARALLEL_WORKERS); 0/1 desliga o pool."""
+    from src.config import PARALLEL_WORKERS
+    return PARALLEL_WORKERS
+
+
+def get_process_pool(workers: Optional[int] = None) -> Optional[Executor]:
+    """
+    Retorna o pool de processos compartilhado (criado sob demanda).
+
+    Args:
+        workers: Número de processos (padrão: PARALLEL_WORKERS)
+
+    Returns:
+        ProcessPoolExecutor, ou None se o paralelismo estiver desligado
+    """
+    global _pool, _pool_workers
+    workers = default_workers() if workers is None else workers
+    if workers <= 1:
+        return None
+    if _pool is None or _pool_workers != workers:
+        shutdown_process_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        _pool_workers = workers
+    return _pool
+
+
+def _init_worker():
+    """Inicialização de cada worker: logs e prints do filho saem direto, sem a fila do pai."""
+    from src.utils.secure_logger import reset_after_fork
+    reset_after_fork()
+
+
+def shutdown_process_pool():
+    """Encerra o pool compartilhado (chamado também no atexit)."""
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_process_pool)
+
+
+def split_chunks(items: Sequence[Any], workers: int, chunk_size: Optional[int] = None) -> List[Sequence[Any]]:
+    """Divide em blocos contíguos (por padrão, 4 blocos por worker para balancear a carga)."""
+    if not chunk_size:
+        chunk_size = max(1, -(-len(items) // (workers * 4)))
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def map_chunks(
+    func: Callable[..., Any],
+    items: Sequence[Any],
+    *args: Any,
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    min_items: int = MIN_PARALLEL_ITEMS,
+) -> List[Any]:
+    """
+    Aplica func(bloco, *args) em blocos de items no pool de processos.
+
+    func precisa ser uma função de módulo (serializável por referência). Lotes pequenos
+    ou pool desligado rodam no próprio processo, com um único bloco.
+
+    Args:
+        func: Função aplicada a cada bloco
+        items: Sequência a dividir
+        *args: Argumentos extras repassados a func
+        workers: Número de processos (padrão: PARALLEL_WORKERS)
+        chunk_size: Tamanho do bloco (padrão: len(items) / (4 * workers))
+        min_items: Tamanho mínimo para usar o pool
+
+    Returns:
+        Lista com o resultado de cada bloco, na ordem dos blocos
+    """
+    if len(items) < min_items:
+        return [func(items, *args)] if len(items) else []
+    workers = default_workers() if workers is None else workers
+    pool = get_process_pool(workers)
+    if pool is None:
+        return [func(items, *args)] if len(items) else []
+
+    futures = [pool.submit(func, chunk, *args) for chunk in split_chunks(items, workers, chunk_size)]
+    return [future.result() for future in futures]
+
+
+def imap_ordered(
+    func: Callable[..., Any],
+    arguments: Iterable[Tuple[Any, ...]],
+    workers: Optional[int] = None,
+    prefetch: Optional[int] = None,
+) -> Iterator[Any]:
+    """
+    Versão preguiçosa de map no pool: consome `arguments` aos poucos, mantém no máximo
+    `prefetch` tarefas em andamento e entrega os resultados na ordem de entrada.
+    Permite que o processo principal faça I/O (ex.: upsert do lote anterior) enquanto
+    os próximos lotes são preparados nos workers, com memória limitada.
+
+    Args:
+        func: Função de módulo aplicada a cada tupla de argumentos
+        arguments: Iterável de tuplas de argumentos
+        workers: Número de processos (padrão: PARALLEL_WORKERS)
+        prefetch: Tarefas em andamento (padrão: 2 por worker)
+
+    Yields:
+        func(*args) para cada item, na ordem
+    """
+    workers = default_workers() if workers is None else workers
+    pool = get_process_pool(workers)
+    if pool is None:
+        for args in arguments:
+            yield func(*args)
+        return
+
+    prefetch = prefetch or workers * 2
+    pending: deque = deque()
+    try:
+        for args in arguments:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
@@ -0,0 +1,276 @@
+"""
+Modo de profiling da execução (--profile em src.main e scripts/sync_activities.py).
+
+- cProfile da thread principal -> <job>-<data>.pstats (snakeviz, python -m pstats)
+- amostragem de pilhas (thread própria, só stdlib) com a task asyncio e o extrator de
+  origem como raiz -> <job>-<data>.folded (flamegraph.pl, speedscope, inferno)
+- monitor de lag do event loop: callbacks que bloqueiam o loop por mais que o limite são
+  registrados com a pilha de quem bloqueou -> <job>-<data>-lag.json
+
+Atribuição por task: um task factory rotula cada task com a cadeia de corrotinas que a
+criou (ex.: "extract_negocios > enrich_deals_with_details > fetch_deal_details"), então o
+tempo de uma subtask é somado ao extrator que a disparou.
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from src.utils.secure_logger import SecureLogger
+
+logger = SecureLogger('profiling')
+
+DEFAULT_SAMPLE_INTERVAL = 0.005   # segundos entre amostras de pilha
+DEFAULT_LAG_THRESHOLD = 0.1       # callbacks acima disso (segundos) são registrados
+HEARTBEAT_INTERVAL = 0.01
+MAX_STACK_DEPTH = 64
+
+# Frames do próprio asyncio/selectors não ajudam a localizar quem bloqueou
+_INTERNAL_PATHS = (os.sep + "asyncio" + os.sep, "selectors.py", os.sep + "threading.py")
+
+# Módulo C e Python do asyncio compartilham este dict (loop -> task em execução)
+_current_tasks: Dict[Any, Any] = getattr(asyncio.tasks, "_current_tasks", {})
+
+
+def _coro_name(coro: Any) -> str:
+    return getattr(coro, "__qualname__", None) or getattr(coro, "__name__", None) or type(coro).__name__
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _function_label(frame) -> str:
+    # Linha de definição (não a atual): a mesma função vira um único nó no flamegraph
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class TaskLabels:
+    """Task factory que rotula cada task com a cadeia de corrotinas de origem."""
+
+    def __init__(self, max_depth: int = 3):
+        self.max_depth = max_depth
+        self._labels: "weakref.WeakKeyDictionary[asyncio.Task, str]" = weakref.WeakKeyDictionary()
+
+    def label(self, task: Optional[asyncio.Task]) -> str:
+        if task is None:
+            return "loop"
+        label = self._labels.get(task)
+        return label if label is not None else _coro_name(task.get_coro())
+
+    def factory(self, loop: asyncio.AbstractEventLoop, coro, **kwargs) -> asyncio.Task:
+        task = asyncio.Task(coro, loop=loop, **kwargs)
+        # Tasks criadas antes do profiling (ex.: a do asyncio.run) não entram na cadeia
+        current = _current_tasks.get(loop)
+        parent = self._labels.get(current) if current is not None else None
+        name = _coro_name(coro)
+        if parent and parent != name:
+            # Mantém a raiz (extrator) e os níveis mais próximos da task
+            chain = parent.split(" > ") + [name]
+            if len(chain) > self.max_depth:
+                chain = chain[:1] + chain[-(self.max_depth - 1):]
+            name = " > ".join(chain)
+        self._labels[task] = name
+        return task
+
+
+class SamplingProfiler(threading.Thread):
+    """
+    Amostra periodicamente a pilha de todas as threads (a principal rotulada pela task
+    asyncio em execução) e vigia o heartbeat do loop para registrar bloqueios.
+    """
+
+    def __init__(self, labels: TaskLabels, interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 lag_threshold: float = DEFAULT_LAG_THRESHOLD):
+        super().__init__(name="sampling-profiler", daemon=True)
+        self.labels = labels
+        self.interval = interval
+        self.lag_threshold = lag_threshold
+        self.stacks: Counter = Counter()
+        self.stalls: List[Dict[str, Any]] = []
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.last_beat = time.monotonic()
+        self._main_id = threading.main_thread().ident
+        self._stop_event = threading.Event()
+        self._stall: Optional[Dict[str, Any]] = None
+
+    def beat(self):
+        """Chamado pelo loop a cada HEARTBEAT_INTERVAL."""
+        now = time.monotonic()
+        if self._stall is not None:
+            self._stall["duration_s"] = round(now - self._stall.pop("_started"), 3)
+            self.stalls.append(self._stall)
+            logger.warning("Event loop bloqueado por %.3fs em %s (task %s)", self._stall["duration_s"],
+                           self._stall["location"], self._stall["task"])
+            self._stall = None
+        self.last_beat = now
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        for thread_id, frame in frames.items():
+            if thread_id == threading.get_ident():
+                continue
+            if thread_id == self._main_id:
+                task = _current_tasks.get(self.loop) if self.loop is not None else None
+                root = f"task:{self.labels.label(task)}" if self.loop is not None else "main"
+            else:
+                root = f"thread:{_thread_name(thread_id)}"
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_function_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join([root] + stack[::-1])] += 1
+            if thread_id == self._main_id:
+                self._check_lag(frames[thread_id], root)
+
+    def _check_lag(self, frame, root: str):
+        if self.loop is None or self._stall is not None:
+            return
+        blocked = time.monotonic() - self.last_beat - HEARTBEAT_INTERVAL
+        if blocked < self.lag_threshold:
+            return
+        # Frame mais interno fora do asyncio: o código que está segurando o loop
+        location = None
+        while frame is not None:
+            if not any(path in frame.f_code.co_filename for path in _INTERNAL_PATHS):
+                location = _frame_label(frame)
+                break
+            frame = frame.f_back
+        self._stall = {"task": root[len("task:"):], "location": location or "?", "_started": self.last_beat}
+
+    def task_totals(self) -> Counter:
+        """Amostras por task/thread (raiz da pilha)."""
+        totals: Counter = Counter()
+        for stack, count in self.stacks.items():
+            totals[stack.split(";", 1)[0]] += count
+        return totals
+
+
+def _thread_name(thread_id: int) -> str:
+    for thread in threading.enumerate():
+        if thread.ident == thread_id:
+            return thread.name
+    return str(thread_id)
+
+
+async def _instrumented(awaitable: Awaitable, labels: TaskLabels, sampler: SamplingProfiler):
+    loop = asyncio.get_running_loop()
+    loop.set_task_factory(labels.factory)
+    labels._labels[asyncio.current_task()] = "main"
+    sampler.loop = loop
+
+    async def heartbeat():
+        while True:
+            sampler.beat()
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    beats = asyncio.ensure_future(heartbeat())
+    try:
+        return await awaitable
+    finally:
+        beats.cancel()
+        sampler.loop = None
+
+
+def run_profiled(
+    main: Callable[[], Awaitable],
+    job: str,
+    output_dir: Optional[str] = None,
+    lag_threshold: float = DEFAULT_LAG_THRESHOLD,
+    interval: float = DEFAULT_SAMPLE_INTERVAL,
+) -> Any:
+    """
+    Executa asyncio.run(main()) com cProfile, amostragem por task e monitor de lag.
+
+    Args:
+        main: Função que retorna a corrotina principal (ex.: src.main.main)
+        job: Prefixo dos arquivos (vista_etl, sync_activities)
+        output_dir: Diretório de saída (padrão: PROFILE_DIR)
+        lag_threshold: Bloqueio mínimo do event loop registrado (segundos)
+        interval: Intervalo entre amostras de pilha (segundos)
+
+    Returns:
+        O retorno de main()
+    """
+    if output_dir is None:
+        from src.config import PROFILE_DIR
+        output_dir = PROFILE_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{job}-{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    labels = TaskLabels()
+    sampler = SamplingProfiler(labels, interval=interval, lag_threshold=lag_threshold)
+    profiler = cProfile.Profile()
+    sampler.start()
+    profiler.enable()
+    try:
+        return asyncio.run(_instrumented(main(), labels, sampler))
+    finally:
+        profiler.disable()
+        sampler.stop()
+        write_profile(profiler, sampler, prefix)
+
+
+def write_profile(profiler: cProfile.Profile, sampler: SamplingProfiler, prefix: str) -> Dict[str, str]:
+    """Grava .pstats, .folded e -lag.json e registra um resumo (top funções, tempo por task, bloqueios)."""
+    paths = {"pstats": f"{prefix}.pstats", "folded": f"{prefix}.folded", "lag": f"{prefix}-lag.json"}
+    profiler.dump_stats(paths["pstats"])
+    with open(paths["folded"], "w", encoding="utf-8") as f:
+        for stack, count in sorted(sampler.stacks.items()):
+            f.write(f"{stack} {count}\n")
+    with open(paths["lag"], "w", encoding="utf-8") as f:
+        json.dump({"threshold_s": sampler.lag_threshold, "stalls": sampler.stalls}, f, indent=2, ensure_ascii=False)
+
+    totals = sampler.task_totals()
+    samples = sum(totals.values()) or 1
+    logger.info("Profiling: %d amostras; tempo por task/thread:", samples)
+    for root, count in totals.most_common(15):
+        logger.info("  %5.1f%%  %s", 100.0 * count / samples, root)
+    if sampler.stalls:
+        worst = max(sampler.stalls, key=lambda stall: stall["duration_s"])
+        logger.warning("Event loop bloqueado %d vezes acima de %.0f ms (pior: %.3fs em %s)", len(sampler.stalls),
+                       sampler.lag_threshold * 1000, worst["duration_s"], worst["location"])
+
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(20)
+    for line in report.getvalue().splitlines():
+        if line.strip():
+            logger.debug("%s", line)
+    logger.info("Perfis gravados: %s", ", ".join(paths.values()))
+    return paths
+
+
+def add_profile_arguments(parser):
+    """Opções --profile/--profile-dir/--lag-threshold-ms (src.main e scripts/sync_activities.py)."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Grava perfil cProfile (.pstats), pilhas por task (.folded) e bloqueios do event loop")
+    parser.add_argument("--profile-dir", default=None, help="Diretório dos perfis (padrão: PROFILE_DIR)")
+    parser.add_argument("--lag-threshold-ms", type=float, default=DEFAULT_LAG_THRESHOLD * 1000,
+                        help="Bloqueio mínimo do event loop a registrar (ms)")
+
+
+def run_main(main: Callable[[], Awaitable], job: str, args) -> Any:
+    """asyncio.run(main()), com profiling se args.profile."""
+    if not getattr(args, "profile", False):
+        return asyncio.run(main())
+    return run_profiled(main, job, output_dir=args.profile_dir, lag_threshold=args.lag_threshold_ms / 1000)
@@ -0,0 +1,123 @@
+"""
+Relatório de progresso amostrado para laços quentes (páginas, lotes, negócios).
+Agrega contagem e vazão e emite no máximo uma linha INFO por intervalo (com ETA);
+o detalhe por item vai para DEBUG. O volume de log não cresce com o número de registros.
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+from src.utils.secure_logger import SecureLogger
+
+logger = SecureLogger('progress')
+
+# Intervalo padrão entre linhas de progresso (segundos)
+DEFAULT_INTERVAL = 5.0
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+class ProgressReporter:
+    """
+    Acumula o progresso de uma etapa e registra contagem, vazão e ETA a cada `interval` segundos.
+
+    Uso:
+        with ProgressReporter("negocios/atividades", total=len(deals), unit="negócios") as progress:
+            for batch in batches:
+                ...
+                progress.update(len(batch), "lote %d concluído", number)
+    """
+
+    def __init__(
+        self,
+        label: str,
+        total: Optional[int] = None,
+        unit: str = "itens",
+        interval: Optional[float] = None,
+        log: Optional[SecureLogger] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            label: Nome da etapa (aparece em cada linha)
+            total: Total esperado (habilita percentual e ETA)
+            unit: Unidade contada (registros, páginas, negócios...)
+            interval: Segundos entre linhas INFO (padrão: PROGRESS_LOG_INTERVAL)
+            log: Logger de destino (padrão: logger 'progress')
+            clock: Relógio monotônico (injetável em testes)
+        """
+        if interval is None:
+            interval = _default_interval()
+        self.label = label
+        self.total = total
+        self.unit = unit
+        self.interval = interval
+        self.log = log or logger
+        self._clock = clock
+        self.count = 0
+        self.started_at = clock()
+        self._next_emit = self.started_at + interval
+        self._closed = False
+
+    def update(self, n: int = 1, detail: Optional[str] = None, *detail_args):
+        """
+        Soma n itens concluídos.
+
+        Args:
+            n: Itens concluídos desde a última chamada
+            detail: Mensagem de detalhe (%-style), registrada só em DEBUG
+            *detail_args: Argumentos da mensagem de detalhe
+        """
+        self.count += n
+        if detail is not None and self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("%s: " + detail, self.label, *detail_args)
+        now = self._clock()
+        if now >= self._next_emit:
+            self._next_emit = now + self.interval
+            self.emit(now)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        elapsed = (now if now is not None else self._clock()) - self.started_at
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def emit(self, now: Optional[float] = None):
+        """Registra uma linha de progresso (contagem, percentual, vazão e ETA)."""
+        now = now if now is not None else self._clock()
+        rate = self.rate(now)
+        if self.total:
+            remaining = max(self.total - self.count, 0)
+            eta = _format_duration(remaining / rate) if rate > 0 else "?"
+            self.log.info("%s: %d/%d %s (%.0f%%) - %.1f %s/s - ETA %s", self.label, self.count, self.total,
+                          self.unit, 100.0 * self.count / self.total, rate, self.unit, eta)
+        else:
+            self.log.info("%s: %d %s - %.1f %s/s", self.label, self.count, self.unit, rate, self.unit)
+
+    def close(self):
+        """Registra a linha final (total e duração). Chamado uma única vez."""
+        if self._closed:
+            return
+        self._closed = True
+        now = self._clock()
+        self.log.info("%s: concluído - %d %s em %s (%.1f %s/s)", self.label, self.count, self.unit,
+                      _format_duration(now - self.started_at), self.rate(now), self.unit)
+
+    def __enter__(self) -> "ProgressReporter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _default_interval() -> float:
+    from src.config import get_settings
+    return get_settings().PROGRESS_LOG_INTERVAL
@@ -0,0 +1,244 @@
+"""
+Representação compacta (slots) para as entidades volumosas do ETL: atividades e negócios.
+Cada registro ocupa uma fração da memória de um dicionário equivalente e strings repetidas
+(nome/foto do corretor, tipo da atividade) são internadas. A conversão para dicionário só
+acontece na serialização, lote a lote, dentro do loader.
+"""
+
+import sys
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Sequence
+
+
+class Record:
+    """
+    Base dos registros compactos. Expõe uma interface mínima de dicionário
+    (get, [], in, keys) para ser usada no lugar dos dicts do pipeline.
+    """
+
+    __slots__ = ()
+    _fields: Sequence[str] = ()
+    _interned: frozenset = frozenset()
+    _getter = None
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, Any]) -> "Record":
+        """Cria o registro a partir de um dicionário (chaves extras são ignoradas)."""
+        return cls(*[mapping.get(field) for field in cls._fields])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Converte para dicionário (usado apenas na serialização)."""
+        return dict(zip(self._fields, self._getter(self)))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default) if key in self._fields else default
+
+    def keys(self):
+        return self._fields
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self._fields:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._fields
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Record):
+            return self._fields == other._fields and self._getter(self) == other._getter(other)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __reduce__(self):
+        return (self.__class__, self._getter(self))
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+def make_record_type(name: str, fields: Sequence[str], interned: Iterable[str] = (), module: str = __name__) -> type:
+    """
+    Cria uma classe de registro com __slots__ para os campos informados.
+
+    Args:
+        name: Nome da classe
+        fields: Campos do registro (ordem dos argumentos do construtor)
+        interned: Campos cujas strings devem ser internadas (valores muito repetidos)
+        module: Módulo onde a classe é publicada (necessário para pickle)
+
+    Returns:
+        Subclasse de Record
+    """
+    fields = tuple(fields)
+    interned = frozenset(interned)
+    getter = attrgetter(*fields) if len(fields) > 1 else (lambda obj: (getattr(obj, fields[0]),))
+
+    # __init__ gerado (como no namedtuple): atribuição direta por slot, sem laço por campo
+    arguments = ", ".join(f"{field}=None" for field in fields)
+    body = "\n".join(
+        f"    self.{field} = _intern({field}) if {field}.__class__ is str else {field}"
+        if field in interned else f"    self.{field} = {field}"
+        for field in fields
+    )
+    namespace = {"_intern": sys.intern}
+    exec(f"def __init__(self, {arguments}):\n{body}\n", namespace)
+    init = namespace["__init__"]
+    init.__doc__ = "Valores na ordem dos campos (faltantes ficam None)."
+
+    return type(name, (Record,), {
+        "__slots__": fields,
+        "__module__": module,
+        "__init__": init,
+        "_fields": fields,
+        "_interned": interned,
+        "_getter": staticmethod(getter),
+    })
+
+
+def as_dicts(rows: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Converte registros compactos em dicionários; dicionários passam inalterados."""
+    return [row.to_dict() if isinstance(row, Record) else row for row in rows]
+
+
+# ============================================
+# ATIVIDADES
+# ============================================
+
+# Campos pedidos ao endpoint negocios/atividades
+ACTIVITY_API_FIELDS = (
+    "CodigoAtividade", "Assunto", "Texto", "TipoAtividade", "Status",
+    "AtividadeCreatedAt", "ValorProposta", "TextoProposta",
+    "CodigoCliente", "CodigoImovel", "CodigoCorretor", "Automatico",
+    "EstadoProposta", "Numero", "Pendente", "EtapaAcaoId",
+    "EtapaAcao", "TipoAtividadeId", "MotivoLost", "CodigoEmImovel", "Hora",
+    "AtividadeUpdatedAt", "NumeroAgenda", "DataHora", "DataAtualizacao",
+    "Local", "Inicio", "Final", "Prioridade", "Privado", "AlertaMinutos",
+    "Excluido", "Concluido", "Tarefa", "DataConclusao", "DiaInteiro",
+    "TipoAgenda", "CodigoDev", "IdGoogleCalendar", "StatusVisita",
+    "CodigoImobiliaria", "Icone", "Duracao", "FotoCorretor"
+)
+
+# Campos do registro: AtividadeCreatedAt é gravado como "Data" e NomeCliente/NomeCorretor
+# vêm do negócio pai quando a atividade não os traz
+ACTIVITY_FIELDS = ("CodigoNegocio",) + tuple(
+    "Data" if field == "AtividadeCreatedAt" else field for field in ACTIVITY_API_FIELDS
+) + ("NomeCliente", "NomeCorretor")
+
+ActivityRecord = make_record_type(
+    "ActivityRecord",
+    ACTIVITY_FIELDS,
+    interned=("FotoCorretor", "NomeCorretor", "TipoAtividade", "TipoAtividadeId", "EtapaAcao",
+              "Status", "StatusVisita", "CodigoCorretor", "Icone", "TipoAgenda"),
+)
+
+# Campos que, vazios na atividade, são preenchidos com o valor do negócio pai
+ACTIVITY_DEAL_FALLBACKS = ("CodigoCliente", "CodigoCorretor", "NomeCliente", "NomeCorretor")
+
+
+def pad_columns(data: Dict[str, Any], fields: Sequence[str], length: int, pad: Any = "") -> List[List[Any]]:
+    """
+    Alinha as colunas de uma resposta colunar ao mesmo tamanho, uma única vez por coluna.
+
+    Args:
+        data: Resposta colunar ({campo: [valores]})
+        fields: Campos esperados, na ordem desejada
+        length: Número de linhas
+        pad: Valor usado para campos ausentes ou colunas mais curtas
+
+    Returns:
+        Lista de colunas, todas com `length` itens
+    """
+    columns = []
+    for field in fields:
+        column = data.get(field)
+        if not isinstance(column, list):
+            column = [pad] * length
+        elif len(column) < length:
+            column = column + [pad] * (length - len(column))
+        elif len(column) > length:
+            column = column[:length]
+        columns.append(column)
+    return columns
+
+
+def activity_columns(deal: Any, data: Dict[str, Any], fields: Sequence[str] = ACTIVITY_API_FIELDS) -> Dict[str, List[Any]]:
+    """
+    Monta o lote colunar de atividades de um negócio (na ordem de ACTIVITY_FIELDS),
+    com os fallbacks do negócio aplicados coluna a coluna.
+
+    Args:
+        deal: Negócio pai (dict ou DealRecord)
+        data: Resposta colunar do endpoint negocios/atividades
+        fields: Campos pedidos à API (ordem de ACTIVITY_API_FIELDS)
+
+    Returns:
+        Dicionário coluna -> valores (vazio se não houver atividades)
+    """
+    codes = data.get("CodigoAtividade")
+    if not isinstance(codes, list) or not codes:
+        return {}
+    length = len(codes)
+
+    columns = dict(zip(
+        ("Data" if field == "AtividadeCreatedAt" else field for field in fields),
+        pad_columns(data, fields, length),
+    ))
+    batch = {"CodigoNegocio": [deal.get("Codigo")] * length}
+    batch.update(columns)
+
+    for field in ACTIVITY_DEAL_FALLBACKS:
+        fallback = deal.get(field)
+        column = batch.get(field)
+        if column is None:
+            batch[field] = [fallback or None] * length
+        elif fallback:
+            batch[field] = [value if value else fallback for value in column]
+    return batch
+
+
+def activities_from_columns(deal: Any, data: Dict[str, Any], fields: Sequence[str] = ACTIVITY_API_FIELDS) -> List[Any]:
+    """
+    Transpõe a resposta colunar de negocios/atividades em ActivityRecord (via map, sem laço por campo).
+
+    Args:
+        deal: Negócio pai (dict ou DealRecord)
+        data: Resposta colunar do endpoint negocios/atividades
+        fields: Campos pedidos à API (ordem de ACTIVITY_API_FIELDS)
+
+    Returns:
+        Lista de ActivityRecord
+    """
+    batch = activity_columns(deal, data, fields)
+    if not batch:
+        return []
+    if tuple(batch) == ActivityRecord._fields:
+        return list(map(ActivityRecord, *batch.values()))
+    return [ActivityRecord.from_mapping(dict(zip(batch, row))) for row in zip(*batch.values())]
+
+
+# ============================================
+# NEGÓCIOS
+# ============================================
+
+DEAL_FIELDS = (
+    "Codigo", "NomeNegocio", "ValorNegocio", "ValorLocacao", "NomeEtapa", "EtapaAtual",
+    "DataInicial", "UltimaAtualizacao", "DataFinal", "PrevisaoFechamento", "Status",
+    "CodigoCliente", "FotoCliente", "CodigoCorretor", "VeiculoCaptacao", "CodigoImovel",
+    "ObservacaoPerda", "NomeCliente", "NomeCorretor", "MotivoPerda", "CodigoMotivoPerda",
+    "DataPerda", "DataGanho", "CodigoPipe", "NomePipe", "StatusAtividades", "EmailCliente",
+    "CelularCliente", "TelefoneCliente", "TempoDasEtapasDoNegocio", "EquipeCorretor"
+)
+
+DealRecord = make_record_type(
+    "DealRecord",
+    DEAL_FIELDS,
+    interned=("NomeEtapa", "EtapaAtual", "Status", "CodigoCorretor", "NomeCorretor", "VeiculoCaptacao",
+              "MotivoPerda", "CodigoMotivoPerda", "CodigoPipe", "NomePipe", "StatusAtividades"),
+)
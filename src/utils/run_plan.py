@@ -0,0 +1,344 @@
+"""
+Execução seletiva do ETL (--entities, --pipes, --since/--until, --dry-run).
+
+- RunSelection: quais entidades e pipes extrair e a janela de atualização de cada entidade
+- totais de paginação: cada listagem completa registra páginas e registros por endpoint
+  (e por pipe) em PAGE_TOTALS_FILE, com a latência média da execução
+- --dry-run: estima requisições e duração a partir desses totais, sem chamar a API
+
+Sem --since/--until a extração é completa (o sync_state não é lido). Execuções parciais
+(subconjunto de pipes ou janela de datas fixa) não avançam o sync_state; --since last_run é
+incremental e avança.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.metrics import HTTP_LATENCY
+
+# Ordem de execução (as primeiras sete rodam em paralelo; atividades dependem de negócios)
+ENTITIES = ("imoveis", "clientes", "usuarios", "agencias", "proprietarios", "pipes", "agenda", "negocios", "atividades")
+INDEPENDENT_ENTITIES = ENTITIES[:7]
+DEPENDENCIES = {"atividades": ("negocios",)}
+
+# Endpoint de listagem de cada entidade (parâmetros de URL fixos, como nos extratores)
+EMPRESA_ID = "32622"
+LIST_ENDPOINTS: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "imoveis": ("imoveis/listar", {}),
+    "clientes": ("clientes/listar", {}),
+    "usuarios": ("usuarios/listar", {}),
+    "agencias": ("agencias/listar", {}),
+    "proprietarios": ("proprietarios/listar", {}),
+    "pipes": ("pipes/listar", {"empresa": EMPRESA_ID}),
+    "agenda": ("agenda/listar", {}),
+}
+
+# Campo de atualização usado em --since/--until. Imóveis e agenda filtram na API (>=) e o
+# limite superior no cliente; negocios/listar responde 500 com filtro de data, então a janela
+# é aplicada na listagem e só os negócios dentro dela buscam detalhes e atividades.
+# As demais entidades não têm campo de atualização e são extraídas por completo.
+WINDOW_FIELDS = {"imoveis": "DataAtualizacao", "agenda": "DataHoraAtualizacao", "negocios": "UltimaAtualizacao"}
+
+LAST_RUN = "last_run"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Latência assumida para endpoints ainda sem medição (segundos)
+DEFAULT_LATENCY = 0.5
+
+_RELATIVE_RE = re.compile(r"^(\d+)([hd])$")
+
+
+def parse_when(value: str, end: bool = False) -> str:
+    """
+    Converte a data de --since/--until para "AAAA-MM-DD HH:MM:SS".
+
+    Aceita data ("2025-12-01"; em --until vale até o fim do dia), data e hora, horas/dias
+    atrás ("6h", "2d") e, em --since, "last_run" (marca d'água de cada entidade no sync_state).
+
+    Raises:
+        argparse.ArgumentTypeError: Formato não reconhecido
+    """
+    text = value.strip()
+    if text == LAST_RUN and not end:
+        return LAST_RUN
+    match = _RELATIVE_RE.match(text)
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = timedelta(hours=amount) if unit == "h" else timedelta(days=amount)
+        return (datetime.now() - delta).strftime(DATE_FORMAT)
+    for fmt, date_only in (("%Y-%m-%d", True), ("%Y-%m-%d %H:%M", False), ("%Y-%m-%dT%H:%M", False),
+                           (DATE_FORMAT, False), ("%Y-%m-%dT%H:%M:%S", False)):
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if date_only and end:
+            parsed = parsed.replace(hour=23, minute=59, second=59)
+        return parsed.strftime(DATE_FORMAT)
+    raise argparse.ArgumentTypeError(f"data inválida: {value!r} (use AAAA-MM-DD[ HH:MM[:SS]], 6h, 2d ou last_run)")
+
+
+def _parse_until(value: str) -> str:
+    return parse_when(value, end=True)
+
+
+def in_window(value: Any, since: Optional[str], until: Optional[str]) -> bool:
+    """Data do registro dentro da janela (sem janela, sempre; sem data, nunca)."""
+    if not since and not until:
+        return True
+    if not value:
+        return False
+    # Datas do Vista ("AAAA-MM-DD HH:MM:SS" ou "AAAA-MM-DD") comparam como texto
+    text = str(value).replace("T", " ")[:19]
+    return (not since or text >= since) and (not until or text <= until)
+
+
+def filter_window(records: Iterable[Any], field: str, since: Optional[str], until: Optional[str]) -> List[Any]:
+    if not since and not until:
+        return list(records)
+    return [record for record in records if in_window(record.get(field), since, until)]
+
+
+class RunSelection:
+    """Entidades, pipes e janela de datas de uma execução (padrão: tudo, como o ETL completo)."""
+
+    def __init__(self, entities: Optional[Sequence[str]] = None, pipes: Optional[Sequence[str]] = None,
+                 since: Optional[str] = None, until: Optional[str] = None):
+        """
+        Args:
+            entities: Entidades a extrair (padrão: todas; só negócios/atividades se houver pipes)
+            pipes: Códigos dos pipes de negócios (padrão: todos)
+            since: Início da janela ("AAAA-MM-DD HH:MM:SS" ou "last_run")
+            until: Fim da janela ("AAAA-MM-DD HH:MM:SS"); sem since/until, extração completa
+        """
+        unknown = set(entities or ()) - set(ENTITIES)
+        if unknown:
+            raise ValueError(f"entidades desconhecidas: {', '.join(sorted(unknown))}")
+        if entities:
+            selected = set(entities)
+        elif pipes:
+            selected = {"negocios", "atividades"}
+        else:
+            selected = set(ENTITIES)
+        for entity, required in DEPENDENCIES.items():
+            if entity in selected:
+                selected.update(required)
+        self.entities = [entity for entity in ENTITIES if entity in selected]
+        self.pipes = [str(pipe) for pipe in pipes] if pipes else None
+        self.since = since
+        self.until = until
+        # Marcas d'água do sync_state por entidade (--since last_run)
+        self.watermarks: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def from_args(cls, args) -> "RunSelection":
+        return cls(entities=args.entities, pipes=args.pipes, since=args.since, until=args.until)
+
+    def includes(self, entity: str) -> bool:
+        return entity in self.entities
+
+    @property
+    def partial(self) -> bool:
+        """Subconjunto de pipes ou janela fixa: o sync_state não avança (--since last_run avança)."""
+        return bool(self.pipes or self.until or (self.since and self.since != LAST_RUN))
+
+    def resolve_last_run(self, fetch: Callable[[str], Optional[str]]):
+        """Busca a marca d'água de cada entidade com janela (--since last_run)."""
+        if self.since == LAST_RUN:
+            self.watermarks = {entity: fetch(entity) for entity in WINDOW_FIELDS if self.includes(entity)}
+
+    def window(self, entity: str) -> Tuple[Optional[str], Optional[str]]:
+        """(since, until) da entidade; (None, None) se ela não tiver campo de atualização."""
+        if entity not in WINDOW_FIELDS:
+            return None, None
+        since = self.watermarks.get(entity) if self.since == LAST_RUN else self.since
+        return since, self.until
+
+    def describe(self) -> str:
+        parts = [", ".join(self.entities)]
+        if self.pipes:
+            parts.append(f"pipes {', '.join(self.pipes)}")
+        if self.since or self.until:
+            parts.append(f"janela {self.since or '-'} .. {self.until or '-'}")
+        else:
+            parts.append("carga completa")
+        return "; ".join(parts)
+
+
+def comma_list(text: str) -> List[str]:
+    return [item.strip() for item in text.split(",") if item.strip()]
+
+
+def add_selection_arguments(parser):
+    """Opções de execução seletiva de src.main."""
+    parser.add_argument("--entities", type=comma_list, default=None,
+                        help=f"Entidades separadas por vírgula ({', '.join(ENTITIES)}); atividades incluem negócios")
+    parser.add_argument("--pipes", type=comma_list, default=None,
+                        help="Códigos dos pipes de negócios (sem --entities: só negócios e atividades)")
+    parser.add_argument("--since", type=parse_when, default=None,
+                        help="Início da janela de atualização: AAAA-MM-DD[ HH:MM[:SS]], 6h, 2d ou last_run "
+                             "(padrão: extração completa)")
+    parser.add_argument("--until", type=_parse_until, default=None, help="Fim da janela de atualização")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Mostra as requisições planejadas e a duração estimada (totais da última execução)")
+
+
+# --- Totais de paginação ---------------------------------------------------------------
+
+_page_totals: Dict[str, Dict[str, Any]] = {}
+
+
+def totals_key(endpoint: str, url_params: Optional[Dict[str, Any]] = None) -> str:
+    if not url_params:
+        return endpoint
+    return endpoint + "?" + "&".join(f"{name}={url_params[name]}" for name in sorted(url_params))
+
+
+def record_page_totals(endpoint: str, url_params: Optional[Dict[str, Any]], pages: int, records: int,
+                       page_size: int):
+    """Registra o tamanho de uma listagem completa (chamado por get_vista_data_async)."""
+    _page_totals[totals_key(endpoint, url_params)] = {
+        "pages": pages,
+        "records": records,
+        "page_size": page_size,
+        "updated_at": datetime.now().strftime(DATE_FORMAT),
+    }
+
+
+def _default_path() -> str:
+    from src.config import get_settings
+    return get_settings().PAGE_TOTALS_FILE
+
+
+def load_page_totals(path: Optional[str] = None) -> Dict[str, Any]:
+    """Totais gravados ({"endpoints": {...}, "latency_s": {...}}); vazio se o arquivo não existir."""
+    path = path or _default_path()
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {"endpoints": {}, "latency_s": {}}
+    data.setdefault("endpoints", {})
+    data.setdefault("latency_s", {})
+    return data
+
+
+def save_page_totals(path: Optional[str] = None) -> Optional[str]:
+    """Mescla os totais e latências médias desta execução no arquivo (nada a gravar: None)."""
+    latencies = {
+        endpoint: HTTP_LATENCY.mean(endpoint=endpoint)
+        for endpoint in {key.split("?", 1)[0] for key in _page_totals} | {"negocios/detalhes", "negocios/atividades"}
+    }
+    latencies = {endpoint: round(value, 4) for endpoint, value in latencies.items() if value is not None}
+    if not _page_totals and not latencies:
+        return None
+    path = path or _default_path()
+    data = load_page_totals(path)
+    data["endpoints"].update(_page_totals)
+    data["latency_s"].update(latencies)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+# --- Dry-run ---------------------------------------------------------------------------
+
+def _estimate(requests: int, latency: float, concurrency: int) -> float:
+    # Primeira página sozinha (descobre o total) e o resto em paralelo até o limite de concorrência
+    if requests <= 0:
+        return 0.0
+    return latency + math.ceil((requests - 1) / concurrency) * latency
+
+
+def plan_requests(selection: RunSelection, totals: Dict[str, Any], concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Requisições planejadas por entidade a partir dos totais da última listagem completa.
+
+    Returns:
+        Linhas com entity, requests (None se não houver totais), estimate_s e note
+    """
+    endpoints = totals.get("endpoints", {})
+    latency = totals.get("latency_s", {})
+    rows = []
+
+    def add(entity: str, requests: Optional[int], seconds: float, note: str = ""):
+        rows.append({"entity": entity, "requests": requests, "estimate_s": round(seconds, 1), "note": note})
+
+    for entity in INDEPENDENT_ENTITIES:
+        if not selection.includes(entity):
+            continue
+        endpoint, url_params = LIST_ENDPOINTS[entity]
+        entry = endpoints.get(totals_key(endpoint, url_params))
+        if entry is None:
+            add(entity, None, 0.0, "sem totais em cache")
+            continue
+        windowed = entity in WINDOW_FIELDS and bool(selection.since or selection.until)
+        note = "máximo (janela filtrada na API)" if windowed else ""
+        add(entity, entry["pages"], _estimate(entry["pages"], latency.get(endpoint, DEFAULT_LATENCY), concurrency),
+            note)
+
+    if selection.includes("negocios"):
+        prefix = totals_key("negocios/listar", {"codigo_pipe": ""})
+        pipes = {key[len(prefix):]: entry for key, entry in endpoints.items() if key.startswith(prefix)}
+        missing = [pipe for pipe in selection.pipes or () if pipe not in pipes]
+        if selection.pipes:
+            pipes = {pipe: entry for pipe, entry in pipes.items() if pipe in selection.pipes}
+        list_latency = latency.get("negocios/listar", DEFAULT_LATENCY)
+        details_latency = latency.get("negocios/detalhes", DEFAULT_LATENCY)
+        windowed = bool(selection.since or selection.until)
+        notes = []
+        if missing:
+            notes.append(f"pipes sem totais: {', '.join(missing)}")
+        if windowed:
+            notes.append("máximo (detalhes só dos negócios na janela)")
+        if not pipes:
+            add("negocios", None, 0.0, "; ".join(notes) or "sem totais em cache")
+            if selection.includes("atividades"):
+                add("atividades", None, 0.0, "sem totais de negócios")
+        else:
+            deals = sum(entry["records"] for entry in pipes.values())
+            pages = sum(entry["pages"] for entry in pipes.values())
+            # pipes/listar + listagem de cada pipe (em sequência) + um detalhe por negócio
+            seconds = list_latency + sum(_estimate(entry["pages"], list_latency, concurrency)
+                                         for entry in pipes.values())
+            seconds += deals * details_latency / concurrency
+            add("negocios", 1 + pages + deals, seconds, "; ".join(notes))
+            if selection.includes("atividades"):
+                add("atividades", deals,
+                    deals * latency.get("negocios/atividades", DEFAULT_LATENCY) / concurrency,
+                    "máximo (só negócios na janela)" if windowed else "")
+    return rows
+
+
+def format_plan(selection: RunSelection, rows: List[Dict[str, Any]], totals_path: str) -> str:
+    lines = [f"Plano: {selection.describe()}",
+             f"{'entidade':<15} {'requisições':>12} {'estimativa':>11}  observação"]
+    for row in rows:
+        requests = "?" if row["requests"] is None else str(row["requests"])
+        lines.append(f"{row['entity']:<15} {requests:>12} {row['estimate_s']:>10.1f}s  {row['note']}")
+    known = [row for row in rows if row["requests"] is not None]
+    lines.append(f"{'total':<15} {sum(row['requests'] for row in known):>12} "
+                 f"{sum(row['estimate_s'] for row in known):>10.1f}s")
+    if len(known) < len(rows):
+        lines.append(f"Entidades sem totais em {totals_path}: rode uma execução completa para estimá-las.")
+    if selection.partial:
+        lines.append("Execução parcial: o sync_state não será atualizado.")
+    return "\n".join(lines)
+
+
+def dry_run(selection: RunSelection, path: Optional[str] = None, concurrency: Optional[int] = None) -> str:
+    """Plano da execução (requisições e duração estimada) sem chamar a API nem o Supabase."""
+    if concurrency is None:
+        from src.utils.async_api_client import CONCURRENCY_LIMIT
+        concurrency = CONCURRENCY_LIMIT
+    path = path or _default_path()
+    return format_plan(selection, plan_requests(selection, load_page_totals(path), concurrency), path)
@@ -4,8 +4,13 @@ Compliance: LGPD - evita exposição de dados pessoais em logs.
 """
 
 import re
+import sys
+import atexit
+import queue
 import logging
-from typing import Any
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
 from datetime import datetime
 
 
@@ -35,6 +40,13 @@ class SecureLogger:
         (r'(password|senha|secret|token)\s*[=:]\s*[^\s,;]+', r'\1=[REDACTED]'),
     ]
     
+    # Todos os padrões em uma única alternação pré-compilada (um grupo nomeado por padrão),
+    # aplicada em uma só passada; a ordem da alternação preserva a prioridade acima
+    _COMBINED_PATTERN = re.compile(
+        "|".join(f"(?P<p{i}>{pattern})" for i, (pattern, _) in enumerate(SENSITIVE_PATTERNS)),
+        flags=re.IGNORECASE,
+    )
+    
     def __init__(self, name: str = __name__, level: int = logging.INFO):
         """
         Inicializa o logger seguro.
@@ -46,15 +58,17 @@ class SecureLogger:
         self.logger = logging.getLogger(name)
         self.logger.setLevel(level)
         
-        # Configurar handler se ainda não tiver
+        # Configurar handler se ainda não tiver: com o pipeline ativo (get_queue_handler /
+        # capture_stdout), registros vão para a fila e são formatados/sanitizados/escritos na
+        # thread do QueueListener; antes disso, são escritos direto
         if not self.logger.handlers:
-            handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            handler.setFormatter(formatter)
-            self.logger.addHandler(handler)
+            self.logger.addHandler(_get_handler())
+    
+    @staticmethod
+    def _redact(match: "re.Match") -> str:
+        group = match.lastgroup
+        replacement = _REPLACEMENTS[group]
+        return match.expand(replacement) if _HAS_BACKREFERENCE[group] else replacement
     
     @staticmethod
     def sanitize(message: str) -> str:
@@ -70,70 +84,360 @@ class SecureLogger:
         if not isinstance(message, str):
             message = str(message)
         
-        sanitized = message
-        for pattern, replacement in SecureLogger.SENSITIVE_PATTERNS:
-            sanitized = re.sub(pattern, replacement, sanitized, flags=re.IGNORECASE)
-        
-        return sanitized
+        if _allowed_pattern is not None and _allowed_pattern.search(message):
+            # Identificadores liberados (allow_identifier) ficam nos índices ímpares do split
+            parts = _allowed_pattern.split(message)
+            return "".join(part if i % 2 else _pattern_for(part).sub(SecureLogger._redact, part)
+                           for i, part in enumerate(parts))
+        return _pattern_for(message).sub(SecureLogger._redact, message)
+    
+    def _log(self, level: int, message: str, args: tuple, kwargs: dict):
+        # Nível desabilitado: nada é formatado nem sanitizado
+        if not self.logger.isEnabledFor(level):
+            return
+        # Formatação e sanitização ficam para quem emitir o registro (a thread do listener)
+        self.logger.log(level, RedactedMessage(message, args), **kwargs)
+    
+    def isEnabledFor(self, level: int) -> bool:
+        """Indica se mensagens desse nível serão emitidas."""
+        return self.logger.isEnabledFor(level)
     
     def debug(self, message: str, *args, **kwargs):
-        """Log DEBUG sanitizado."""
-        self.logger.debug(self.sanitize(message), *args, **kwargs)
+        """Log DEBUG sanitizado (use argumentos % para formatação preguiçosa)."""
+        self._log(logging.DEBUG, message, args, kwargs)
     
     def info(self, message: str, *args, **kwargs):
         """Log INFO sanitizado."""
-        self.logger.info(self.sanitize(message), *args, **kwargs)
+        self._log(logging.INFO, message, args, kwargs)
     
     def warning(self, message: str, *args, **kwargs):
         """Log WARNING sanitizado."""
-        self.logger.warning(self.sanitize(message), *args, **kwargs)
+        self._log(logging.WARNING, message, args, kwargs)
     
     def error(self, message: str, *args, **kwargs):
         """Log ERROR sanitizado."""
-        self.logger.error(self.sanitize(message), *args, **kwargs)
+        self._log(logging.ERROR, message, args, kwargs)
     
     def critical(self, message: str, *args, **kwargs):
         """Log CRITICAL sanitizado."""
-        self.logger.critical(self.sanitize(message), *args, **kwargs)
+        self._log(logging.CRITICAL, message, args, kwargs)
     
     def exception(self, message: str, *args, **kwargs):
         """Log EXCEPTION sanitizado."""
-        self.logger.exception(self.sanitize(message), *args, **kwargs)
+        kwargs.setdefault("exc_info", True)
+        self._log(logging.ERROR, message, args, kwargs)
+
+
+# Substituição de cada grupo nomeado da alternação combinada. Referências a grupos
+# (\1) são renumeradas para o grupo correspondente dentro da alternação.
+def _build_replacements():
+    replacements, has_backreference = {}, {}
+    pattern_groups = SecureLogger._COMBINED_PATTERN.groupindex
+    for i, (pattern, replacement) in enumerate(SecureLogger.SENSITIVE_PATTERNS):
+        name = f"p{i}"
+        offset = pattern_groups[name]
+        renumbered = re.sub(r"\\(\d+)", lambda m: f"\\g<{offset + int(m.group(1))}>", replacement)
+        replacements[name] = renumbered
+        has_backreference[name] = renumbered != replacement
+    return replacements, has_backreference
+
+
+_REPLACEMENTS, _HAS_BACKREFERENCE = _build_replacements()
+
+# Pré-filtros baratos: um padrão só entra na alternação se a mensagem tiver o
+# necessário para ele casar (dígitos, "@", palavra-chave de segredo). Tirar da
+# alternação um padrão que não pode casar não muda o resultado da substituição.
+_HAS_DIGIT = re.compile(r'\d').search
+_SECRET_KEYWORDS = ('password', 'senha', 'secret', 'token')
+_DIGIT_PATTERNS = (0, 1, 3)     # CPF, CNPJ, telefone
+_EMAIL_PATTERN = 2
+_SECRET_PATTERN = 5
+_patterns_by_subset = {}
+
+
+def _pattern_for(message: str) -> "re.Pattern":
+    has_digit = _HAS_DIGIT(message) is not None
+    has_at = '@' in message
+    folded = message.casefold()
+    has_secret = any(keyword in folded for keyword in _SECRET_KEYWORDS)
+    key = (has_digit, has_at, has_secret)
+    pattern = _patterns_by_subset.get(key)
+    if pattern is None:
+        active = [
+            (i, source) for i, (source, _) in enumerate(SecureLogger.SENSITIVE_PATTERNS)
+            if (has_digit or i not in _DIGIT_PATTERNS)
+            and (has_at or i != _EMAIL_PATTERN)
+            and (has_secret or i != _SECRET_PATTERN)
+        ]
+        # Grupos sem padrão ativo ficam como alternativas impossíveis para manter a numeração
+        alternatives = {i: f"(?P<p{i}>{source})" for i, source in active}
+        pattern = re.compile(
+            "|".join(alternatives.get(i, f"(?P<p{i}>(?!)(?:{source}))")
+                     for i, (source, _) in enumerate(SecureLogger.SENSITIVE_PATTERNS)),
+            flags=re.IGNORECASE,
+        )
+        _patterns_by_subset[key] = pattern
+    return pattern
+
+
+# Identificadores conhecidos e não sensíveis com formato de documento/telefone
+_allowed_identifiers = set()
+_allowed_pattern: Optional["re.Pattern"] = None
+
+
+def allow_identifier(value: Any):
+    """
+    Libera da redação um identificador conhecido e não sensível que tem formato de documento
+    ou telefone (ex.: o id numérico de 11 dígitos da execução no GitHub Actions, que seria
+    redatado como CPF). Só vale para o valor inteiro, não como parte de um número maior.
+
+    Args:
+        value: Identificador exato a preservar nos logs
+    """
+    global _allowed_pattern
+    value = str(value)
+    if not value or value in _allowed_identifiers:
+        return
+    _allowed_identifiers.add(value)
+    alternatives = "|".join(map(re.escape, sorted(_allowed_identifiers, key=len, reverse=True)))
+    _allowed_pattern = re.compile(f"(?<![0-9])({alternatives})(?![0-9])")
+
+
+class RedactedMessage:
+    """
+    Mensagem de log formatada (%) e sanitizada somente quando convertida para texto,
+    o que acontece no handler que a emite. Qualquer handler (fila, caplog, root) recebe
+    o texto já redatado.
+    """
+    
+    __slots__ = ("message", "args", "_text")
+    
+    def __init__(self, message: Any, args: tuple = ()):
+        if len(args) == 1 and isinstance(args[0], dict) and args[0]:
+            args = args[0]
+        self.message = message
+        self.args = args
+        self._text: Optional[str] = None
+    
+    def __str__(self) -> str:
+        if self._text is None:
+            text = str(self.message)
+            if self.args:
+                text = text % self.args
+            self._text = SecureLogger.sanitize(text)
+        return self._text
+
+
+# ============================================
+# PIPELINE DE LOG NÃO BLOQUEANTE
+# ============================================
+# Os loggers só enfileiram registros; um QueueListener em thread própria formata,
+# sanitiza e escreve em stdout/stderr. Um stdout lento (ex.: GitHub Actions) não
+# bloqueia mais o event loop com milhares de requisições em andamento.
+
+STDOUT_LOGGER = 'vista_etl.stdout'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler que não formata na thread de quem loga (o listener formata)."""
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+    
+    def emit(self, record: logging.LogRecord):
+        if _listener is None:
+            # Pipeline encerrado (ex.: logs durante o atexit): escreve direto
+            _listener_handle(record)
+        else:
+            super().emit(record)
+
+
+class _StdoutToLog:
+    """
+    Substituto de sys.stdout que envia cada linha escrita (print) ao pipeline de log,
+    mantendo a ordem em relação aos demais logs e redatando dados sensíveis.
+    """
+    
+    def __init__(self, logger: logging.Logger, original):
+        self._logger = logger
+        self._original = original
+        self._buffer = ''
+        self._lock = threading.Lock()
+    
+    @property
+    def encoding(self):
+        return getattr(self._original, 'encoding', 'utf-8')
+    
+    def isatty(self) -> bool:
+        return False
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._buffer += text
+            if '\n' not in self._buffer:
+                return len(text)
+            *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._logger.info(RedactedMessage(line))
+        return len(text)
+    
+    def flush(self):
+        with self._lock:
+            line, self._buffer = self._buffer, ''
+        if line:
+            self._logger.info(RedactedMessage(line))
+
+
+# Fila, handler e listener criados sob demanda: importar o módulo não inicia threads
+_log_queue: Optional["queue.SimpleQueue"] = None
+_queue_handler: Optional[_DeferredQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_pipeline_lock = threading.Lock()
+# Processo filho do pool (reset_after_fork): escreve direto, sem listener
+_direct_output = False
+
+# Handlers de saída (usados pelo listener): logs no stderr, como o StreamHandler padrão,
+# e prints capturados no stdout original, sem prefixo
+_log_handler = logging.StreamHandler(sys.stderr)
+_log_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+_log_handler.addFilter(lambda record: record.name != STDOUT_LOGGER)
+_print_handler = logging.StreamHandler(sys.stdout)
+_print_handler.setFormatter(logging.Formatter('%(message)s'))
+_print_handler.addFilter(lambda record: record.name == STDOUT_LOGGER)
+
+
+def _listener_handle(record: logging.LogRecord):
+    for handler in (_log_handler, _print_handler):
+        if record.levelno >= handler.level:
+            handler.handle(record)
+
+
+def _get_handler() -> QueueHandler:
+    """Handler compartilhado da fila de log (sem iniciar o listener: sem ele, escreve direto)."""
+    global _log_queue, _queue_handler
+    with _pipeline_lock:
+        if _queue_handler is None:
+            _log_queue = queue.SimpleQueue()
+            _queue_handler = _DeferredQueueHandler(_log_queue)
+    return _queue_handler
+
+
+def get_queue_handler() -> QueueHandler:
+    """Retorna o handler compartilhado da fila de log, iniciando o listener se necessário."""
+    global _listener
+    handler = _get_handler()
+    with _pipeline_lock:
+        if _listener is None and not _direct_output:
+            _listener = QueueListener(_log_queue, _log_handler, _print_handler, respect_handler_level=True)
+            _listener.start()
+    return handler
+
+
+def capture_stdout():
+    """
+    Redireciona print/sys.stdout para o pipeline de log (não bloqueante e redatado).
+    Deve ser chamado no início dos scripts de ETL; desfeito em shutdown_logging.
+    """
+    if isinstance(sys.stdout, _StdoutToLog):
+        return
+    stdout_logger = logging.getLogger(STDOUT_LOGGER)
+    stdout_logger.setLevel(logging.INFO)
+    stdout_logger.propagate = False
+    handler = get_queue_handler()
+    if not stdout_logger.handlers:
+        stdout_logger.addHandler(handler)
+    # Atribuição direta: setStream faria flush do stream anterior, que pode já estar fechado
+    _print_handler.stream = sys.stdout
+    sys.stdout = _StdoutToLog(stdout_logger, sys.stdout)
+
+
+def reset_after_fork():
+    """
+    Prepara o pipeline de log em um processo filho criado por fork (workers do pool de
+    src.utils.parallel). A thread do listener não sobrevive ao fork: registros enfileirados
+    no filho ficariam numa fila que ninguém esvazia. No filho, logs e prints (ainda redatados)
+    são escritos direto pelos handlers de saída, sem fila.
+    """
+    global _listener, _pipeline_lock, _direct_output
+    _direct_output = True
+    _listener = None
+    _pipeline_lock = threading.Lock()
+    if isinstance(sys.stdout, _StdoutToLog):
+        # Novo wrapper: o lock do herdado pode ter sido copiado travado por outra thread
+        sys.stdout = _StdoutToLog(sys.stdout._logger, sys.stdout._original)
+
+
+def shutdown_logging():
+    """
+    Restaura o stdout e esvazia a fila de log (bloqueia até tudo ser escrito).
+    Registrado no atexit; pode ser chamado explicitamente ao fim do ETL.
+    """
+    global _listener
+    if isinstance(sys.stdout, _StdoutToLog):
+        sys.stdout.flush()
+        sys.stdout = sys.stdout._original
+    with _pipeline_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+# Logger global seguro (criado no primeiro uso)
+_secure_logger: Optional[SecureLogger] = None
+
+
+def get_secure_logger() -> SecureLogger:
+    """Retorna o logger global 'vista_etl'."""
+    global _secure_logger
+    if _secure_logger is None:
+        _secure_logger = SecureLogger('vista_etl')
+    return _secure_logger
 
 
-# Logger global seguro
-secure_logger = SecureLogger('vista_etl')
+def __getattr__(name: str) -> Any:
+    # Compatibilidade: src.utils.secure_logger.secure_logger
+    if name == "secure_logger":
+        return get_secure_logger()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Funções de conveniência
 def debug(message: str):
     """Log DEBUG."""
-    secure_logger.debug(message)
+    get_secure_logger().debug(message)
 
 
 def info(message: str):
     """Log INFO."""
-    secure_logger.info(message)
+    get_secure_logger().info(message)
 
 
 def warning(message: str):
     """Log WARNING."""
-    secure_logger.warning(message)
+    get_secure_logger().warning(message)
 
 
 def error(message: str):
     """Log ERROR."""
-    secure_logger.error(message)
+    get_secure_logger().error(message)
 
 
 def critical(message: str):
     """Log CRITICAL."""
-    secure_logger.critical(message)
+    get_secure_logger().critical(message)
 
 
 def exception(message: str):
     """Log EXCEPTION com stack trace."""
-    secure_logger.exception(message)
+    get_secure_logger().exception(message)
 
 
 # Exemplo de uso:
@@ -0,0 +1,193 @@
+"""
+Crawl de atividades em shards: cada worker (processo local ou runner de uma matriz do
+GitHub Actions) pega uma partição determinística dos negócios por hash do código e grava as
+próprias atividades. A coordenação é feita no sync_state com leases (migrations/004_sync_leases.sql):
+uma linha 'atividades:<run_id>:<i>/<N>' por shard, renovada enquanto o worker vive. Lease
+expirado ou shard que ninguém pegou pode ser assumido por outro worker da mesma execução.
+"""
+
+import asyncio
+import os
+import socket
+import zlib
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from src.utils.records import ACTIVITY_DEAL_FALLBACKS
+from src.utils.secure_logger import SecureLogger
+
+logger = SecureLogger('sharding')
+
+# Segundos de validade do lease; renovado a cada terço desse tempo
+DEFAULT_LEASE_TTL = 300
+
+# Negócios lidos por página ao carregar do Supabase (fetch_deals_for_activities)
+DEALS_PAGE_SIZE = 1000
+
+
+def shard_of(deal_id: Any, shards: int) -> int:
+    """
+    Shard de um negócio (crc32 do código): estável entre processos e máquinas,
+    ao contrário de hash(), que varia com PYTHONHASHSEED.
+    """
+    return zlib.crc32(str(deal_id).encode("utf-8")) % shards
+
+
+def partition(deals: Iterable[Any], shards: int, index: int) -> List[Any]:
+    """Negócios do shard `index` (0-based) entre `shards`."""
+    if not 0 <= index < shards:
+        raise ValueError(f"Shard {index} fora do intervalo 0..{shards - 1}")
+    return [deal for deal in deals if shard_of(deal.get("Codigo"), shards) == index]
+
+
+def claim_order(preferred: int, shards: int) -> List[int]:
+    """Ordem de tentativa: o shard preferido primeiro, depois os seguintes (circular)."""
+    return [(preferred + offset) % shards for offset in range(shards)]
+
+
+def default_run_id() -> str:
+    """
+    Identificador da execução compartilhado pelos workers: GITHUB_RUN_ID nos jobs de uma matriz
+    (um re-run reaproveita os shards já concluídos) ou a hora UTC atual fora do Actions.
+    """
+    return os.environ.get("GITHUB_RUN_ID") or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+def shard_entity(run_id: str, index: int, shards: int) -> str:
+    """Linha do sync_state do shard (exibido 1-based: 'atividades:<run_id>:1/4')."""
+    return f"atividades:{run_id}:{index + 1}/{shards}"
+
+
+def lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ShardLease:
+    """
+    Lease de uma linha do sync_state, via RPCs acquire/complete/release_sync_lease.
+
+    Uso:
+        lease = ShardLease(supabase, shard_entity(run_id, 0, 4))
+        if lease.acquire():
+            async with lease.renewing():
+                ...
+            lease.complete({"activities": total})
+    """
+
+    def __init__(self, client, entity: str, ttl: int = DEFAULT_LEASE_TTL, owner: Optional[str] = None):
+        self.client = client
+        self.entity = entity
+        self.ttl = ttl
+        self.owner = owner or lease_owner()
+        self.lost = False
+
+    def _rpc(self, name: str, **params) -> bool:
+        response = self.client.rpc(name, {"p_entity": self.entity, "p_owner": self.owner, **params}).execute()
+        return bool(response.data)
+
+    def acquire(self) -> bool:
+        """Adquire ou renova o lease. False se o shard já foi concluído ou tem outro dono ativo."""
+        return self._rpc("acquire_sync_lease", p_ttl_seconds=self.ttl)
+
+    def complete(self, details: Dict[str, Any]) -> bool:
+        """Marca o shard como concluído. False se o lease foi perdido para outro worker."""
+        return self._rpc("complete_sync_lease", p_details=details)
+
+    def release(self, details: Optional[Dict[str, Any]] = None) -> bool:
+        """Libera o lease após falha (status 'failed'): outro worker pode reprocessar o shard."""
+        return self._rpc("release_sync_lease", p_details=details or {})
+
+    async def _keep_alive(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                renewed = await asyncio.to_thread(self.acquire)
+            except Exception as e:
+                # Falha transitória: tenta de novo no próximo intervalo, antes de o lease expirar
+                logger.warning("Falha ao renovar lease %s: %s", self.entity, e)
+                continue
+            if not renewed:
+                self.lost = True
+                logger.warning("Lease %s perdido para outro worker", self.entity)
+                return
+
+    @asynccontextmanager
+    async def renewing(self):
+        """
+        Renova o lease em segundo plano durante o bloco. Se o bloco falhar, libera o lease
+        (com o erro em details) e propaga a exceção.
+        """
+        task = asyncio.create_task(self._keep_alive())
+        try:
+            yield self
+        except BaseException as e:
+            try:
+                await asyncio.to_thread(self.release, {"error": type(e).__name__, "owner": self.owner})
+            except Exception as release_error:
+                logger.warning("Falha ao liberar lease %s: %s", self.entity, release_error)
+            raise
+        finally:
+            task.cancel()
+
+
+def fetch_deals_for_activities(client, page_size: int = DEALS_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Negócios já gravados no Supabase (código + cliente/corretor usados como fallback nas
+    atividades). Workers de shard leem daqui em vez de extrair os negócios da API de novo.
+    """
+    columns = ", ".join(("Codigo",) + ACTIVITY_DEAL_FALLBACKS)
+    deals = []
+    start = 0
+    while True:
+        response = (client.table("negocios").select(columns).order("Codigo")
+                    .range(start, start + page_size - 1).execute())
+        rows = response.data or []
+        deals.extend(rows)
+        if len(rows) < page_size:
+            return deals
+        start += page_size
+
+
+def fetch_shard_rows(client, run_id: str) -> List[Dict[str, Any]]:
+    """Linhas do sync_state dos shards de uma execução."""
+    response = (client.table("sync_state").select("entity, status, lease_owner, lease_expires_at, details")
+                .like("entity", f"atividades:{run_id}:%").execute())
+    return response.data or []
+
+
+def summarize_shards(rows: Sequence[Dict[str, Any]], shards: int, run_id: str) -> Dict[str, Any]:
+    """
+    Consolida as linhas do sync_state de uma execução.
+
+    Returns:
+        {"done": [...], "pending": {índice: status}, "complete": bool, "deals": int, "activities": int}
+    """
+    by_entity = {row.get("entity"): row for row in rows}
+    summary = {"done": [], "pending": {}, "deals": 0, "activities": 0}
+    for index in range(shards):
+        row = by_entity.get(shard_entity(run_id, index, shards))
+        status = (row or {}).get("status") or "not_started"
+        if status == "done":
+            details = row.get("details") or {}
+            summary["done"].append(index)
+            summary["deals"] += int(details.get("deals") or 0)
+            summary["activities"] += int(details.get("activities") or 0)
+        else:
+            owner = (row or {}).get("lease_owner")
+            summary["pending"][index] = f"{status} ({owner})" if owner else status
+    summary["complete"] = not summary["pending"]
+    return summary
+
+
+def format_shard_report(summary: Dict[str, Any], shards: int, run_id: str) -> str:
+    """Relatório consolidado dos shards de uma execução."""
+    lines = [
+        f"Execução {run_id}: {len(summary['done'])}/{shards} shards concluídos, "
+        f"{summary['deals']} negócios, {summary['activities']} atividades"
+    ]
+    for index, status in sorted(summary["pending"].items()):
+        lines.append(f"  shard {index + 1}/{shards}: {status}")
+    if summary["complete"]:
+        lines.append("Todos os shards concluídos")
+    return "\n".join(lines)
@@ -0,0 +1,344 @@
+"""
+Staging local em Parquet: cópia normalizada de tudo o que o ETL grava no Supabase, particionada
+por entidade e execução, para recarregar uma execução sem chamar a API do Vista
+(python -m src.load) e para análises locais.
+
+Layout (partições no estilo Hive, legíveis direto por DuckDB/pyarrow.dataset):
+    <STAGING_DIR>/entity=<tabela>/run_id=<execução>/part-00000.parquet
+    <STAGING_DIR>/entity=<tabela>/run_id=<execução>/_manifest.json
+
+Vários processos podem gravar na mesma execução (workers de atividades em shards) usando um
+writer_id próprio: part-<writer_id>-00000.parquet e _manifest-<writer_id>.json; a leitura junta
+todos os manifests da partição.
+
+Cada página recebida por save_to_supabase é anexada ao arquivo aberto da entidade (escrita em
+streaming, sem acumular a execução em memória). Os valores são gravados como texto, como o
+Vista os devolve; colunas com valores não textuais (listas, dicts, números) são gravadas em
+JSON e decodificadas na leitura, então a recarga envia ao loader exatamente os mesmos registros.
+Só as partes fechadas entram no manifest: uma execução interrompida ainda pode ser recarregada
+até a última parte fechada.
+
+O run_id pode ser uma data/hora, o GITHUB_RUN_ID ou um id escolhido pelo operador, então a ordem
+cronológica das execuções vem do "written_at" dos manifests (UTC, atualizado a cada gravação),
+nunca da ordem alfabética do run_id.
+
+Requer pyarrow (importado apenas quando o staging é usado).
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.utils.records import as_dicts
+from src.utils.secure_logger import SecureLogger
+
+logger = SecureLogger('staging')
+
+MANIFEST = "_manifest.json"
+FORMAT_VERSION = 1
+RUN_ID_FORMAT = "%Y-%m-%dT%H-%M-%S"
+# Registros por arquivo Parquet: fecha a parte (e atualiza o manifest) ao atingir o limite
+DEFAULT_PART_ROWS = 200_000
+# Chave dos metadados do schema com as colunas gravadas em JSON
+_JSON_COLUMNS_KEY = b"staging.json_columns"
+
+_pa = None
+
+
+def _pyarrow():
+    global _pa
+    if _pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet  # noqa: F401 - registra pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("O staging em Parquet requer pyarrow (pip install pyarrow)") from e
+        _pa = pyarrow
+    return _pa
+
+
+def new_run_id() -> str:
+    """Identificador de execução (data/hora local, sem ':' para caber em nomes de diretório)."""
+    return datetime.now().strftime(RUN_ID_FORMAT)
+
+
+def partition_dir(root: str, entity: str, run_id: str) -> str:
+    return os.path.join(root, f"entity={entity}", f"run_id={run_id}")
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ============================================
+# CODIFICAÇÃO DAS PÁGINAS
+# ============================================
+
+def encode_page(rows: Iterable[Any]) -> Tuple[Dict[str, List[Optional[str]]], List[str]]:
+    """
+    Converte uma página de registros em colunas de texto.
+
+    Returns:
+        (colunas na ordem em que aparecem, colunas gravadas em JSON)
+    """
+    rows = as_dicts(rows)
+    names: Dict[str, None] = {}
+    for row in rows:
+        for key in row:
+            names.setdefault(key, None)
+    columns = {}
+    json_columns = []
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if any(value is not None and value.__class__ is not str for value in values):
+            json_columns.append(name)
+            values = [None if value is None else json.dumps(value, ensure_ascii=False, default=str)
+                      for value in values]
+        columns[name] = values
+    return columns, json_columns
+
+
+def decode_rows(columns: Dict[str, Sequence[Optional[str]]], json_columns: Sequence[str]) -> List[Dict[str, Any]]:
+    """Inverso de encode_page: colunas de texto -> registros (colunas JSON decodificadas)."""
+    decoded = {
+        name: [None if value is None else json.loads(value) for value in values] if name in json_columns else values
+        for name, values in columns.items()
+    }
+    names = list(decoded)
+    return [dict(zip(names, values)) for values in zip(*(decoded[name] for name in names))]
+
+
+# ============================================
+# ESCRITA
+# ============================================
+
+class _EntityStage:
+    """Arquivo aberto e manifest de uma entidade na execução."""
+
+    def __init__(self, directory: str, entity: str, run_id: str, unique_key: Optional[str],
+                 writer_id: Optional[str] = None):
+        self.directory = directory
+        self.prefix = f"part-{writer_id}-" if writer_id else "part-"
+        self.manifest_name = f"_manifest-{writer_id}.json" if writer_id else MANIFEST
+        self.manifest = {"format": FORMAT_VERSION, "entity": entity, "run_id": run_id,
+                         "unique_key": unique_key, "rows": 0, "parts": [], "complete": False}
+        self.writer = None
+        self.layout = None
+        self.part_rows = 0
+
+    def close_part(self):
+        if self.writer is None:
+            return
+        self.writer.close()
+        self.manifest["parts"][-1]["rows"] = self.part_rows
+        self.manifest["rows"] += self.part_rows
+        self.writer = None
+        self.layout = None
+        self.part_rows = 0
+        self.write_manifest()
+
+    def write_manifest(self):
+        self.manifest["written_at"] = _utc_now()
+        path = os.path.join(self.directory, self.manifest_name)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**self.manifest, "parts": [p for p in self.manifest["parts"] if "rows" in p]}, f, indent=2)
+        os.replace(tmp, path)
+
+
+class StagingWriter:
+    """
+    Grava as páginas de uma execução em Parquet, uma sequência de arquivos por entidade.
+
+    Seguro entre threads (save_to_supabase roda em threads em src.main); feche com close()
+    para fechar os arquivos abertos e marcar os manifests como completos.
+    """
+
+    def __init__(self, root: str, run_id: Optional[str] = None, part_rows: int = DEFAULT_PART_ROWS,
+                 compression: str = "zstd", writer_id: Optional[str] = None):
+        """
+        Args:
+            root: Diretório de staging (STAGING_DIR)
+            run_id: Identificador da execução (padrão: data/hora atual)
+            part_rows: Registros por arquivo antes de abrir a parte seguinte
+            compression: Codec do Parquet
+            writer_id: Identifica o processo quando vários gravam na mesma execução
+        """
+        _pyarrow()
+        self.root = root
+        self.run_id = run_id or new_run_id()
+        self.part_rows = part_rows
+        self.compression = compression
+        self.writer_id = writer_id
+        self._entities: Dict[str, _EntityStage] = {}
+        self._lock = Lock()
+
+    def write(self, entity: str, rows: Sequence[Any], unique_key: Optional[str] = "Codigo") -> int:
+        """Anexa uma página à entidade. Returns: registros gravados."""
+        if not rows:
+            return 0
+        pa = _pyarrow()
+        columns, json_columns = encode_page(rows)
+        with self._lock:
+            stage = self._entities.get(entity)
+            if stage is None:
+                directory = partition_dir(self.root, entity, self.run_id)
+                os.makedirs(directory, exist_ok=True)
+                stage = self._entities[entity] = _EntityStage(directory, entity, self.run_id, unique_key,
+                                                                  self.writer_id)
+            layout = (tuple(columns), tuple(json_columns))
+            # Colunas diferentes (ex.: campo que passou a vir em JSON) vão para uma parte nova:
+            # cada arquivo tem um schema fixo
+            if stage.writer is not None and (layout != stage.layout or stage.part_rows >= self.part_rows):
+                stage.close_part()
+            if stage.writer is None:
+                schema = pa.schema([(name, pa.string()) for name in columns],
+                                   metadata={_JSON_COLUMNS_KEY: json.dumps(json_columns).encode()})
+                name = f"{stage.prefix}{len(stage.manifest['parts']):05d}.parquet"
+                stage.writer = pa.parquet.ParquetWriter(os.path.join(stage.directory, name), schema,
+                                                        compression=self.compression)
+                stage.manifest["parts"].append({"file": name, "json_columns": json_columns})
+                stage.layout = layout
+            table = pa.Table.from_pydict(columns, schema=stage.writer.schema)
+            stage.writer.write_table(table)
+            stage.part_rows += table.num_rows
+        return table.num_rows
+
+    def close(self) -> Dict[str, int]:
+        """Fecha os arquivos e marca os manifests como completos. Returns: registros por entidade."""
+        with self._lock:
+            for stage in self._entities.values():
+                stage.close_part()
+                stage.manifest["complete"] = True
+                stage.write_manifest()
+            return {entity: stage.manifest["rows"] for entity, stage in self._entities.items()}
+
+
+_writer: Optional[StagingWriter] = None
+
+
+def start_staging(run_id: Optional[str] = None, root: Optional[str] = None,
+                  writer_id: Optional[str] = None) -> StagingWriter:
+    """Liga o staging da execução: a partir daqui save_to_supabase grava cada página também em Parquet."""
+    global _writer
+    if root is None:
+        from src.config import get_settings
+        root = get_settings().STAGING_DIR
+    _writer = StagingWriter(root, run_id, writer_id=writer_id)
+    print(f"Staging em Parquet: {partition_dir(root, '<entidade>', _writer.run_id)}")
+    return _writer
+
+
+def stop_staging() -> Optional[Dict[str, int]]:
+    """Fecha o staging da execução (se ligado). Returns: registros por entidade."""
+    global _writer
+    if _writer is None:
+        return None
+    writer, _writer = _writer, None
+    counts = writer.close()
+    if counts:
+        summary = ", ".join(f"{entity}={rows}" for entity, rows in counts.items())
+        print(f"Staging {writer.run_id} concluído: {summary}")
+    return counts
+
+
+def stage_rows(entity: str, rows: Sequence[Any], unique_key: Optional[str]):
+    """Grava a página no staging da execução, se ligado. Falhas do staging não interrompem a carga."""
+    if _writer is None:
+        return
+    try:
+        _writer.write(entity, rows, unique_key)
+    except Exception as e:
+        logger.error("Falha ao gravar %s no staging: %s", entity, e)
+
+
+def add_staging_arguments(parser):
+    """Opções --stage/--stage-run-id (src.main e scripts/sync_activities.py)."""
+    parser.add_argument("--stage", action="store_true",
+                        help="Grava também uma cópia em Parquet (STAGING_DIR) recarregável com python -m src.load")
+    parser.add_argument("--stage-run-id", default=None,
+                        help="Identificador da execução no staging (padrão: data/hora atual)")
+
+
+def get_staging_writer() -> Optional[StagingWriter]:
+    return _writer
+
+
+def configure_staging_from_args(args, writer_id: Optional[str] = None) -> Optional[StagingWriter]:
+    """Liga o staging com --stage ou STAGING_ENABLED=True."""
+    from src.config import get_settings
+    if args.stage or get_settings().STAGING_ENABLED:
+        return start_staging(args.stage_run_id, writer_id=writer_id)
+    return None
+
+
+# ============================================
+# LEITURA
+# ============================================
+
+def read_manifest(root: str, entity: str, run_id: str) -> Dict[str, Any]:
+    """
+    Manifest de uma entidade/execução (juntando os de cada writer_id).
+
+    Raises:
+        FileNotFoundError: Nenhuma parte fechada na partição
+    """
+    directory = partition_dir(root, entity, run_id)
+    names = sorted(name for name in os.listdir(directory) if name.startswith("_manifest") and name.endswith(".json"))
+    if not names:
+        raise FileNotFoundError(f"Sem manifest em {directory}")
+    manifests = []
+    for name in names:
+        path = os.path.join(directory, name)
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if not manifest.get("written_at"):
+            # Manifest anterior ao campo: hora da última gravação do arquivo
+            manifest["written_at"] = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).isoformat()
+        manifests.append(manifest)
+    merged = dict(manifests[0])
+    merged["rows"] = sum(m["rows"] for m in manifests)
+    merged["parts"] = [part for m in manifests for part in m["parts"]]
+    merged["complete"] = all(m["complete"] for m in manifests)
+    merged["written_at"] = max(m["written_at"] for m in manifests)
+    return merged
+
+
+def run_written_at(manifests: Dict[str, Dict[str, Any]]) -> str:
+    """Última gravação de uma execução (entre todas as entidades), em ISO 8601 UTC."""
+    return max(manifest["written_at"] for manifest in manifests.values())
+
+
+def list_runs(root: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    Execuções no staging: {run_id: {entidade: manifest}}, em ordem cronológica da última
+    gravação (written_at dos manifests), a mais recente por último.
+    """
+    runs: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    if not os.path.isdir(root):
+        return runs
+    for entity_dir in sorted(os.listdir(root)):
+        if not entity_dir.startswith("entity="):
+            continue
+        for run_dir in os.listdir(os.path.join(root, entity_dir)):
+            if not run_dir.startswith("run_id="):
+                continue
+            entity, run_id = entity_dir[len("entity="):], run_dir[len("run_id="):]
+            try:
+                runs.setdefault(run_id, {})[entity] = read_manifest(root, entity, run_id)
+            except (OSError, ValueError):
+                continue  # Execução sem nenhuma parte fechada
+    return dict(sorted(runs.items(), key=lambda item: (run_written_at(item[1]), item[0])))
+
+
+def iter_staged(root: str, entity: str, run_id: str, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+    """Registros de uma entidade/execução, em lotes de até batch_size, lidos parte a parte."""
+    pa = _pyarrow()
+    manifest = read_manifest(root, entity, run_id)
+    directory = partition_dir(root, entity, run_id)
+    for part in manifest["parts"]:
+        parquet_file = pa.parquet.ParquetFile(os.path.join(directory, part["file"]))
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield decode_rows(batch.to_pydict(), part["json_columns"])
@@ -1,18 +1,28 @@
 import os
 from datetime import datetime
-from supabase import create_client, Client
-from src.config import SUPABASE_URL, SUPABASE_KEY, ENABLE_DATA_VALIDATION, ENABLE_AUDIT_LOGGING
+from src.config import get_settings
 from src.utils.secure_logger import SecureLogger
+from collections import Counter
+from src.utils.transformers import transform_batch
+from src.utils.parallel import MIN_PARALLEL_ITEMS, default_workers, imap_ordered
+from src.utils.progress import ProgressReporter
+from src.utils.metrics import LOAD_BATCH_LATENCY, ROWS_FAILED, ROWS_LOADED
+from src.utils.records import as_dicts
+from src.utils.staging import stage_rows
+from src.utils.enrichment import enrich_rows
 
 # Logger seguro
 logger = SecureLogger('supabase_client')
 
 def get_supabase_client():
     """Retorna cliente Supabase autenticado."""
-    if not all([SUPABASE_URL, SUPABASE_KEY]):
+    settings = get_settings()
+    if not all([settings.SUPABASE_URL, settings.SUPABASE_KEY]):
         logger.error("Credenciais do Supabase (URL e KEY) incompletas")
         raise ValueError("SUPABASE_URL e SUPABASE_KEY são obrigatórios")
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    # Importado aqui: o supabase-py (httpx, pydantic, ...) pesa no startup de quem não grava
+    from supabase import create_client
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
 
 def get_last_run_from_supabase(entity_name):
     """
@@ -32,7 +42,7 @@ def get_last_run_from_supabase(entity_name):
             return None
         return None
     except Exception as e:
-        logger.error(f"Erro ao buscar last_run para {entity_name}: {e}")
+        logger.error("Erro ao buscar last_run para %s: %s", entity_name, e)
         return None
 
 def update_last_run_in_supabase(entity_name, timestamp=None):
@@ -53,76 +63,104 @@ def update_last_run_in_supabase(entity_name, timestamp=None):
             "details": {"updated_at": datetime.now().isoformat()}
         }
         supabase.table("sync_state").upsert(data).execute()
-        logger.info(f"Sync state atualizado para {entity_name}")
+        logger.info("Sync state atualizado para %s", entity_name)
     except Exception as e:
-        logger.error(f"Erro ao atualizar sync state para {entity_name}: {e}")
+        logger.error("Erro ao atualizar sync state para %s: %s", entity_name, e)
 
-def save_to_supabase(data, table_name, unique_key="Codigo", validator_func=None):
+def save_to_supabase(data, table_name, unique_key="Codigo", validator_func=None, workers=None, progress=None,
+                     batch_size=1000, stage=True):
     """
     Salva os dados de uma lista de dicionários em uma tabela do Supabase usando a biblioteca client oficial.
     Realiza UPSERT automaticamente.
     
     Args:
-        data: Lista de dicionários com dados
+        data: Lista de dicionários (ou registros compactos de src.utils.records) com dados
         table_name: Nome da tabela
         unique_key: Chave única para upsert
         validator_func: Função de validação (opcional)
+        workers: Processos para validação/transformação (padrão: PARALLEL_WORKERS)
+        progress: ProgressReporter compartilhado entre chamadas (ex.: carga em blocos);
+            sem ele, cada chamada tem o próprio relatório de progresso
+        batch_size: Registros por upsert
+        stage: Grava também no staging em Parquet, se ligado (False na recarga de python -m src.load)
     """
     if not data:
-        logger.info(f"Sem dados para salvar na tabela {table_name}")
+        logger.info("Sem dados para salvar na tabela %s", table_name)
         return
 
-    supabase = get_supabase_client()
-    
+    # Equipe/nomes preenchidos pelo índice da execução antes da validação e do staging
+    enrich_rows(table_name, data)
+
     # Validar dados se habilitado e função fornecida
-    if ENABLE_DATA_VALIDATION and validator_func:
+    if get_settings().ENABLE_DATA_VALIDATION and validator_func:
         from src.utils.validators import validate_batch
-        data = validate_batch(data, validator_func)
-        logger.info(f"Dados validados: {len(data)} registros válidos")
+        data = validate_batch(as_dicts(data), validator_func, workers=workers)
+        logger.info("Dados validados: %d registros válidos", len(data))
+
+    if stage:
+        # Depois da validação (a recarga de python -m src.load não valida de novo) e antes do
+        # upsert: se a gravação no Supabase falhar, a página pode ser recarregada sem a API
+        stage_rows(table_name, data, unique_key)
+
+    supabase = get_supabase_client()
 
     # Inicializar audit logger se habilitado
     audit_logger = None
-    if ENABLE_AUDIT_LOGGING:
-        from src.utils.audit_logger import AuditLogger
-        audit_logger = AuditLogger(supabase)
+    if get_settings().ENABLE_AUDIT_LOGGING:
+        # Buffer compartilhado da execução: um insert em lote no fim, não um por tabela
+        from src.utils.audit_logger import get_audit_logger
+        audit_logger = get_audit_logger()
     
     import time
     start_time = time.time()
     records_saved = 0
     records_failed = 0
     
+    # Carga em blocos (progresso compartilhado): início/fim de cada chamada só em DEBUG
+    summary_log = logger.debug if progress is not None else logger.info
+    if progress is None:
+        progress = ProgressReporter(f"upsert {table_name}", total=len(data), unit="registros")
+    
     try:
-        logger.info(f"Iniciando UPSERT de {len(data)} registros para {table_name}")
+        summary_log("Iniciando UPSERT de %d registros para %s", len(data), table_name)
         
-        batch_size = 1000
         total_records = len(data)
+        invalid_counts = Counter()
         
-        for i in range(0, total_records, batch_size):
-            batch = data[i:i + batch_size]
-            
-            # Sanitização: Converter strings vazias "" e datas inválidas para None (NULL)
-            for item in batch:
-                for key, value in item.items():
-                    if value == "":
-                        item[key] = None
-                    elif isinstance(value, str) and (value.startswith("0000-00-00") or value == "0000-00-00 00:00:00"):
-                        item[key] = None
+        # Lotes grandes são preparados (dict + limpezas/coerções) no pool de processos,
+        # alguns lotes à frente, enquanto o upsert do lote atual aguarda a rede
+        if workers is None:
+            workers = default_workers()
+        if total_records < MIN_PARALLEL_ITEMS:
+            workers = 1
+        batches = ((table_name, data[i:i + batch_size]) for i in range(0, total_records, batch_size))
+        
+        for batch_number, (batch, batch_invalid) in enumerate(imap_ordered(transform_batch, batches, workers=workers), 1):
+            invalid_counts.update(batch_invalid)
             
             try:
-                if unique_key:
-                    response = supabase.table(table_name).upsert(batch, on_conflict=unique_key).execute()
-                else:
-                    response = supabase.table(table_name).upsert(batch).execute()
+                with LOAD_BATCH_LATENCY.time(table=table_name):
+                    if unique_key:
+                        response = supabase.table(table_name).upsert(batch, on_conflict=unique_key).execute()
+                    else:
+                        response = supabase.table(table_name).upsert(batch).execute()
                 
                 records_saved += len(batch)
-                logger.info(f"Lote {i//batch_size + 1} processado ({len(batch)} registros)")
+                ROWS_LOADED.inc(len(batch), table=table_name)
+                progress.update(len(batch), "lote %d processado (%d registros)", batch_number, len(batch))
                 
             except Exception as batch_err:
                 records_failed += len(batch)
-                logger.error(f"Erro no lote {i//batch_size + 1}: {batch_err}")
+                ROWS_FAILED.inc(len(batch), table=table_name)
+                logger.error("Erro no lote %d: %s", batch_number, batch_err)
 
         execution_time_ms = int((time.time() - start_time) * 1000)
-        logger.info(f"Operação concluída para {table_name}: {records_saved} salvos")
+        summary_log("Operação concluída para %s: %d salvos", table_name, records_saved)
+
+        # Valores que não passaram na coerção de tipo foram gravados como NULL
+        invalid_values = dict(invalid_counts)
+        if invalid_values:
+            logger.warning("Valores inválidos convertidos para NULL em %s: %s", table_name, invalid_values)
         
         # Registrar audit log
         if audit_logger:
@@ -132,11 +170,12 @@ def save_to_supabase(data, table_name, unique_key="Codigo", validator_func=None)
                 status=status,
                 records_processed=records_saved,
                 records_failed=records_failed,
+                metadata={"invalid_values": invalid_values} if invalid_values else None,
                 execution_time_ms=execution_time_ms
             )
 
     except Exception as e:
-        logger.error(f"Erro crítico ao salvar em {table_name}: {e}")
+        logger.error("Erro crítico ao salvar em %s: %s", table_name, e)
         if audit_logger:
             audit_logger.log_etl_run(
                 entity=table_name,
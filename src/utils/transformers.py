@@ -0,0 +1,375 @@
+"""
+Camada de transformação colunar dos dados extraídos do Vista.
+Cada tabela tem uma especificação de colunas (coluna -> limpezas/coerções) que é
+compilada uma única vez e reutilizada por todos os extratores e pelo loader do Supabase.
+"""
+
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Datas inválidas que o Vista devolve no lugar de NULL
+INVALID_DATE_PREFIX = "0000-00-00"
+
+
+def nullify(value: Any) -> Any:
+    """Converte strings vazias e datas zeradas (0000-00-00...) para None."""
+    if value.__class__ is str and (not value or value.startswith(INVALID_DATE_PREFIX)):
+        return None
+    return value
+
+
+def strip_id_prefix(value: Any) -> Any:
+    """Remove o prefixo "ID:" de nomes de corretor ("123: Fulano" -> "Fulano")."""
+    if value.__class__ is str and ":" in value:
+        return value.split(":", 1)[1].strip()
+    return value
+
+
+def _strip_id_prefix_series(series):
+    has_prefix = series.str.contains(":", regex=False, na=False)
+    stripped = series.str.split(":", n=1).str[1].str.strip()
+    return series.where(~has_prefix, stripped)
+
+
+# Versões vetorizadas (pandas) das limpezas, usadas em transform_frame
+strip_id_prefix.series = _strip_id_prefix_series
+
+
+# ============================================
+# COERÇÕES TIPADAS
+# ============================================
+# O Vista devolve números, booleanos e datas como strings. As coerções abaixo
+# convertem para o tipo da coluna e levantam ValueError para valores inválidos,
+# que o ColumnTransformer converte em NULL e contabiliza.
+
+_TRUE_VALUES = frozenset(["sim", "s", "true", "t", "1", "yes", "y"])
+_FALSE_VALUES = frozenset(["nao", "não", "n", "false", "f", "0", "no"])
+_DATE_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+
+
+# Milhar sem casas decimais no padrão pt-BR: ponto seguido de exatamente três dígitos ("1.234", "1.234.567")
+_THOUSANDS_PATTERN = r"[+-]?\d{1,3}(?:\.\d{3})+"
+_THOUSANDS = re.compile(_THOUSANDS_PATTERN)
+
+
+def _to_number(text: str, value: Any) -> Any:
+    number = float(text)
+    if number != number or number in (float("inf"), float("-inf")):
+        raise ValueError(f"número inválido: {value}")
+    return int(number) if number.is_integer() else number
+
+
+def to_numeric(value: Any) -> Any:
+    """
+    Converte para número no padrão pt-BR do Vista: "1.234,56" -> 1234.56 e "1.234" -> 1234
+    (ponto seguido de exatamente três dígitos é milhar); "1234.56" segue com ponto decimal.
+    Inteiros exatos viram int.
+    """
+    if value.__class__ is int or value.__class__ is float:
+        return value
+    if isinstance(value, bool):
+        raise ValueError(f"booleano em coluna numérica: {value}")
+    text = str(value).strip()
+    if "," in text or _THOUSANDS.fullmatch(text):
+        text = text.replace(".", "").replace(",", ".")
+    return _to_number(text, value)
+
+
+def to_decimal(value: Any) -> Any:
+    """Converte para número com ponto decimal (coordenadas: "-23.550" -> -23.55); "-23,55" também aceito."""
+    if value.__class__ is int or value.__class__ is float:
+        return value
+    if isinstance(value, bool):
+        raise ValueError(f"booleano em coluna numérica: {value}")
+    text = str(value).strip()
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    return _to_number(text, value)
+
+
+def to_integer(value: Any) -> int:
+    """Converte para inteiro; valores com parte decimal são inválidos."""
+    number = to_numeric(value)
+    if isinstance(number, float):
+        raise ValueError(f"inteiro inválido: {value}")
+    return number
+
+
+def _parse_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {value}")
+
+
+def to_timestamp(value: Any) -> str:
+    """Normaliza data/hora para "YYYY-MM-DD HH:MM:SS" (ISO, aceito pelo Postgres)."""
+    return _parse_datetime(value).isoformat(sep=" ")
+
+
+def to_date(value: Any) -> str:
+    """Normaliza data para "YYYY-MM-DD"."""
+    return _parse_datetime(value).date().isoformat()
+
+
+def to_boolean(value: Any) -> bool:
+    """Converte "Sim"/"Nao" (e variações 1/0, true/false) para bool."""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"booleano inválido: {value}")
+
+
+def to_category(value: Any) -> Any:
+    """Enum como categoria: strings repetidas (status, tipos) são internadas e compartilhadas."""
+    if value.__class__ is str:
+        value = value.strip()
+        return sys.intern(value) if value else None
+    return value
+
+
+def _to_number_series(series, thousands: bool):
+    import pandas as pd
+
+    text = series.astype("string").str.strip()
+    pt_br = text.str.contains(",", regex=False, na=False)
+    if thousands:
+        pt_br |= text.str.fullmatch(_THOUSANDS_PATTERN, na=False)
+    text = text.where(~pt_br, text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    return pd.to_numeric(text, errors="coerce").astype(object).where(series.notna(), None)
+
+
+def _to_numeric_series(series):
+    return _to_number_series(series, thousands=True)
+
+
+def _to_decimal_series(series):
+    return _to_number_series(series, thousands=False)
+
+
+def _to_timestamp_series(series):
+    import pandas as pd
+
+    parsed = pd.to_datetime(series, errors="coerce", format="mixed")
+    return parsed.dt.strftime("%Y-%m-%d %H:%M:%S").astype(object).where(parsed.notna(), None)
+
+
+to_numeric.series = _to_numeric_series
+to_decimal.series = _to_decimal_series
+to_timestamp.series = _to_timestamp_series
+
+
+def _typed(coercer: Callable[[Any], Any], *columns: str) -> Dict[str, List[Callable[[Any], Any]]]:
+    return {column: [coercer] for column in columns}
+
+
+# Especificação de colunas por tabela (alinhada ao schema.sql / migrations/003_typed_columns.sql).
+# A nulificação é aplicada em todas as colunas; aqui ficam as limpezas e coerções específicas.
+TABLE_SPECS: Dict[str, Dict[str, Sequence[Callable[[Any], Any]]]] = {
+    "imoveis": {
+        "CorretorNome": [strip_id_prefix],
+        **_typed(to_numeric, "ValorVenda", "ValorLocacao", "AreaTotal", "AreaPrivativa",
+                 "ValorCondominio", "ValorIptu"),
+        **_typed(to_decimal, "Latitude", "Longitude"),
+        **_typed(to_integer, "Dormitorios", "Suites", "Vagas", "AnoConstrucao"),
+        **_typed(to_timestamp, "DataCadastro", "DataAtualizacao"),
+        **_typed(to_boolean, "AceitaPermuta", "AceitaFinanciamento", "Mobiliado", "Piscina",
+                 "Churrasqueira", "ArCondicionado", "Lareira", "Sacada", "SuiteMaster",
+                 "Elevador", "SalaoFestas", "Portaria24Hrs", "SalaFitness"),
+        **_typed(to_category, "Categoria", "Status", "Situacao", "UF", "Cidade", "Bairro"),
+    },
+    "clientes": {
+        **_typed(to_date, "DataNascimento"),
+        **_typed(to_timestamp, "DataCadastro", "DataAtualizacao"),
+        **_typed(to_category, "Sexo", "EstadoCivil", "Status", "UFResidencial"),
+    },
+    "negocios": {
+        "NomeCorretor": [strip_id_prefix],
+        **_typed(to_numeric, "ValorNegocio", "ValorLocacao"),
+        **_typed(to_timestamp, "DataInicial", "UltimaAtualizacao", "DataFinal", "DataPerda", "DataGanho"),
+        **_typed(to_date, "PrevisaoFechamento"),
+        **_typed(to_category, "Status", "NomeEtapa", "NomePipe", "MotivoPerda", "VeiculoCaptacao"),
+    },
+    "atividades": {
+        **_typed(to_numeric, "ValorProposta"),
+        **_typed(to_timestamp, "Data", "AtividadeUpdatedAt", "DataHora", "DataAtualizacao", "DataConclusao"),
+        **_typed(to_boolean, "Automatico", "Pendente", "Privado", "Excluido", "Concluido", "DiaInteiro"),
+        **_typed(to_category, "TipoAtividade", "EtapaAcao", "Status", "StatusVisita",
+                 "EstadoProposta", "TipoAgenda"),
+    },
+    "agenda": {
+        **_typed(to_timestamp, "DataHoraInicio", "DataHoraFinal", "DataHora", "DataHoraAtualizacao"),
+        **_typed(to_boolean, "Concluido", "DiaInteiro", "Particular"),
+        **_typed(to_category, "Status", "Tipo", "TipoAtividade", "Prioridade"),
+    },
+}
+
+
+def _compose(steps: Sequence[Callable[[Any], Any]]) -> Callable[[Any], Any]:
+    if len(steps) == 1:
+        return steps[0]
+
+    def composed(value):
+        for step in steps:
+            value = step(value)
+        return value
+
+    return composed
+
+
+class ColumnTransformer:
+    """
+    Transformador compilado a partir da especificação de colunas de uma tabela.
+
+    Todas as colunas passam pela nulificação; colunas com limpezas específicas
+    recebem a composição das funções declaradas, compilada na construção.
+    """
+
+    def __init__(self, spec: Optional[Dict[str, Sequence[Callable[[Any], Any]]]] = None):
+        """
+        Args:
+            spec: Mapeamento coluna -> lista de funções aplicadas ao valor (já nulificado)
+        """
+        self.spec = dict(spec or {})
+        self._cleaners = {column: _compose(steps) for column, steps in self.spec.items() if steps}
+        # Valores inválidos (convertidos para NULL) por coluna
+        self.invalid_counts: Counter = Counter()
+
+    def pop_invalid_counts(self) -> Dict[str, int]:
+        """Retorna e zera a contagem de valores inválidos por coluna."""
+        counts = dict(self.invalid_counts)
+        self.invalid_counts.clear()
+        return counts
+
+    def transform_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Aplica as transformações em uma lista de dicionários (in place).
+
+        Args:
+            rows: Registros no formato linha (lista de dicionários)
+
+        Returns:
+            A mesma lista, com os valores transformados
+        """
+        get_cleaner = self._cleaners.get
+        invalid = self.invalid_counts
+        prefix = INVALID_DATE_PREFIX
+        for row in rows:
+            for key, value in row.items():
+                # Checagem do primeiro caractere evita o startswith na maioria das strings
+                if value.__class__ is str and (not value or (value[0] == "0" and value.startswith(prefix))):
+                    row[key] = None
+                elif value is not None:
+                    cleaner = get_cleaner(key)
+                    if cleaner is not None:
+                        try:
+                            row[key] = cleaner(value)
+                        except (ValueError, TypeError):
+                            row[key] = None
+                            invalid[key] += 1
+        return rows
+
+    def transform_columns(self, columns: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """
+        Aplica as transformações em um lote colunar ({coluna: [valores]}), coluna a coluna.
+
+        Args:
+            columns: Dicionário coluna -> lista de valores
+
+        Returns:
+            O mesmo dicionário, com as listas substituídas pelas transformadas
+        """
+        for column, values in columns.items():
+            values = [
+                None if (v.__class__ is str and (not v or (v[0] == "0" and v.startswith(INVALID_DATE_PREFIX)))) else v
+                for v in values
+            ]
+            cleaner = self._cleaners.get(column)
+            if cleaner is not None:
+                values = [None if v is None else self._apply(cleaner, column, v) for v in values]
+            columns[column] = values
+        return columns
+
+    def _apply(self, cleaner: Callable[[Any], Any], column: str, value: Any) -> Any:
+        try:
+            return cleaner(value)
+        except (ValueError, TypeError):
+            self.invalid_counts[column] += 1
+            return None
+
+    def transform_frame(self, frame):
+        """
+        Aplica as transformações em um DataFrame pandas usando operações vetorizadas.
+
+        Args:
+            frame: pandas.DataFrame
+
+        Returns:
+            Novo DataFrame transformado
+        """
+        frame = frame.copy()
+        for column in frame.columns:
+            series = frame[column]
+            if series.dtype == object:
+                text = series.where(series.map(type) == str)
+                null_mask = text.eq("") | text.str.startswith(INVALID_DATE_PREFIX, na=False)
+                series = series.mask(null_mask, None)
+            for step in self.spec.get(column, ()):
+                vectorized = getattr(step, "series", None)
+                if vectorized is not None:
+                    present = series.notna()
+                    series = vectorized(series)
+                    invalid = int((present & series.isna()).sum())
+                    if invalid:
+                        self.invalid_counts[column] += invalid
+                else:
+                    series = series.map(lambda v, step=step: None if v is None or v != v else self._apply(step, column, v))
+            frame[column] = series
+        return frame
+
+
+_transformers: Dict[str, ColumnTransformer] = {}
+
+
+def get_transformer(table_name: str) -> ColumnTransformer:
+    """Retorna o transformador compilado da tabela (construído uma única vez)."""
+    transformer = _transformers.get(table_name)
+    if transformer is None:
+        transformer = ColumnTransformer(TABLE_SPECS.get(table_name))
+        _transformers[table_name] = transformer
+    return transformer
+
+
+def transform_batch(table_name: str, rows: Sequence[Any]) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Converte um lote (dicts ou registros compactos) em dicionários transformados.
+    Função de módulo para poder rodar em um worker do pool de processos.
+
+    Args:
+        table_name: Tabela de destino (define as limpezas/coerções)
+        rows: Registros do lote
+
+    Returns:
+        (lote transformado, valores inválidos por coluna neste lote)
+    """
+    from src.utils.records import as_dicts
+
+    transformer = get_transformer(table_name)
+    batch = transformer.transform_rows(as_dicts(rows))
+    return batch, transformer.pop_invalid_counts()
@@ -5,15 +5,59 @@ Compliance: LGPD, prevenção de XSS e SQL Injection.
 """
 
 import re
-from typing import Any, Dict, Optional, List
+from operator import mul
+from typing import Any, Dict, Optional, List, Sequence, Tuple
 from datetime import datetime
 
+from src.utils.cache import memoize, register_cache
+
+# NumPy só é importado no primeiro lote grande de CPF/CNPJ (~50 ms a menos no startup)
+_np: Any = None
+
+
+def _numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:  # pragma: no cover - numpy vem com o pandas do requirements
+            _np = False
+    return _np or None
+
+
+# Padrões pré-compilados (usados por célula, então não recompilamos a cada chamada)
+_NON_DIGITS_RE = re.compile(r'[^0-9]')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_ISO_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2})?\Z', re.ASCII)
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+# Tags HTML e caracteres de controle em uma única passada
+_HTML_OR_CONTROL_RE = re.compile(r'<[^>]*>|[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+_SQL_DANGEROUS_RES = [
+    re.compile(r"(\bDROP\b|\bDELETE\b|\bTRUNCATE\b|\bALTER\b|\bEXEC\b|\bEXECUTE\b)", re.IGNORECASE),
+    re.compile(r"(--|#|\/\*|\*\/|;)", re.IGNORECASE),
+    re.compile(r"('(\s|%20)OR(\s|%20)'|'(\s|%20)AND(\s|%20)')", re.IGNORECASE),
+]
+
+# Pesos dos dígitos verificadores
+_CPF_WEIGHTS_1 = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+_CPF_WEIGHTS_2 = (11, 10, 9, 8, 7, 6, 5, 4, 3, 2)
+_CNPJ_WEIGHTS_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_CNPJ_WEIGHTS_2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def _only_digits(value: str) -> str:
+    if value.isascii() and value.isdigit():
+        return value
+    return _NON_DIGITS_RE.sub('', value)
+
 
 class ValidationError(Exception):
     """Exceção para erros de validação."""
     pass
 
 
+@memoize("validate_cpf")
 def validate_cpf(cpf: str) -> bool:
     """
     Valida CPF brasileiro.
@@ -28,7 +72,7 @@ def validate_cpf(cpf: str) -> bool:
         return False
     
     # Remove caracteres não numéricos
-    cpf = re.sub(r'[^0-9]', '', cpf)
+    cpf = _only_digits(cpf)
     
     # Verifica tamanho
     if len(cpf) != 11:
@@ -38,23 +82,26 @@ def validate_cpf(cpf: str) -> bool:
     if cpf == cpf[0] * 11:
         return False
     
+    digits = [ord(c) - 48 for c in cpf]
+    
     # Valida primeiro dígito verificador
-    sum_1 = sum(int(cpf[i]) * (10 - i) for i in range(9))
+    sum_1 = sum(map(mul, digits, _CPF_WEIGHTS_1))
     digit_1 = (sum_1 * 10 % 11) % 10
     
-    if int(cpf[9]) != digit_1:
+    if digits[9] != digit_1:
         return False
     
     # Valida segundo dígito verificador
-    sum_2 = sum(int(cpf[i]) * (11 - i) for i in range(10))
+    sum_2 = sum(map(mul, digits, _CPF_WEIGHTS_2))
     digit_2 = (sum_2 * 10 % 11) % 10
     
-    if int(cpf[10]) != digit_2:
+    if digits[10] != digit_2:
         return False
     
     return True
 
 
+@memoize("validate_cnpj")
 def validate_cnpj(cnpj: str) -> bool:
     """
     Valida CNPJ brasileiro.
@@ -69,7 +116,7 @@ def validate_cnpj(cnpj: str) -> bool:
         return False
     
     # Remove caracteres não numéricos
-    cnpj = re.sub(r'[^0-9]', '', cnpj)
+    cnpj = _only_digits(cnpj)
     
     # Verifica tamanho
     if len(cnpj) != 14:
@@ -79,19 +126,19 @@ def validate_cnpj(cnpj: str) -> bool:
     if cnpj == cnpj[0] * 14:
         return False
     
+    digits = [ord(c) - 48 for c in cnpj]
+    
     # Validação dos dígitos verificadores
-    weights_1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    sum_1 = sum(int(cnpj[i]) * weights_1[i] for i in range(12))
+    sum_1 = sum(map(mul, digits, _CNPJ_WEIGHTS_1))
     digit_1 = 0 if sum_1 % 11 < 2 else 11 - (sum_1 % 11)
     
-    if int(cnpj[12]) != digit_1:
+    if digits[12] != digit_1:
         return False
     
-    weights_2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    sum_2 = sum(int(cnpj[i]) * weights_2[i] for i in range(13))
+    sum_2 = sum(map(mul, digits, _CNPJ_WEIGHTS_2))
     digit_2 = 0 if sum_2 % 11 < 2 else 11 - (sum_2 % 11)
     
-    if int(cnpj[13]) != digit_2:
+    if digits[13] != digit_2:
         return False
     
     return True
@@ -110,10 +157,10 @@ def validate_email(email: str) -> bool:
     if not email:
         return False
     
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return _EMAIL_RE.match(email) is not None
 
 
+@memoize("validate_phone")
 def validate_phone(phone: str) -> bool:
     """
     Valida telefone brasileiro.
@@ -129,7 +176,7 @@ def validate_phone(phone: str) -> bool:
         return False
     
     # Remove caracteres não numéricos
-    phone = re.sub(r'[^0-9]', '', phone)
+    phone = _only_digits(phone)
     
     # Aceita 10 ou 11 dígitos (com ou sem 9 no celular)
     return len(phone) in [10, 11]
@@ -150,12 +197,11 @@ def sanitize_text(text: str, max_length: int = 5000, allow_html: bool = False) -
     if not text or text.strip() == '':
         return None
     
-    # Remove HTML/scripts se não permitido
+    # Remove HTML/scripts se não permitido e caracteres de controle perigosos
     if not allow_html:
-        text = re.sub(r'<[^>]*>', '', text)
-    
-    # Remove caracteres de controle perigosos
-    text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
+        text = _HTML_OR_CONTROL_RE.sub('', text)
+    else:
+        text = _CONTROL_CHARS_RE.sub('', text)
     
     # Limita tamanho
     text = text[:max_length].strip()
@@ -178,18 +224,13 @@ def sanitize_sql_string(text: str) -> Optional[str]:
         return None
     
     # Remove caracteres perigosos comuns em SQL injection
-    dangerous_patterns = [
-        r"(\bDROP\b|\bDELETE\b|\bTRUNCATE\b|\bALTER\b|\bEXEC\b|\bEXECUTE\b)",
-        r"(--|#|\/\*|\*\/|;)",
-        r"('(\s|%20)OR(\s|%20)'|'(\s|%20)AND(\s|%20)')",
-    ]
-    
-    for pattern in dangerous_patterns:
-        text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    for pattern in _SQL_DANGEROUS_RES:
+        text = pattern.sub('', text)
     
     return sanitize_text(text)
 
 
+@memoize("validate_date")
 def validate_date(date_str: str) -> bool:
     """
     Valida formato de data.
@@ -237,7 +278,7 @@ def validate_cliente(data: Dict[str, Any]) -> Dict[str, Any]:
     
     # Validar CPF/CNPJ se presente
     if 'CPFCNPJ' in data and data['CPFCNPJ']:
-        cpf_cnpj = re.sub(r'[^0-9]', '', data['CPFCNPJ'])
+        cpf_cnpj = _only_digits(data['CPFCNPJ'])
         
         is_valid = False
         if len(cpf_cnpj) == 11:
@@ -331,17 +372,302 @@ def validate_atividade(data: Dict[str, Any]) -> Dict[str, Any]:
     return data
 
 
-def validate_batch(data: List[Dict[str, Any]], validator_func) -> List[Dict[str, Any]]:
+# ============================================
+# VALIDAÇÃO EM LOTE (COLUNAS INTEIRAS)
+# ============================================
+# As funções *_batch recebem uma coluna (lista de valores) e devolvem
+# (máscara de validade, valores limpos). Valores vazios/None são inválidos
+# na máscara e None nos valores limpos.
+
+# Cache dos documentos validados em lote (valor original -> dígitos se válido, None se inválido)
+_DOCUMENT_CACHE = register_cache("cpf_cnpj_batch")
+_UNKNOWN = object()
+
+
+def _digits_matrix(np, values: Sequence[str], width: int):
+    """Matriz (n, width) de dígitos a partir de strings só com dígitos e tamanho fixo."""
+    raw = "".join(values).encode("ascii")
+    return np.frombuffer(raw, dtype=np.uint8).reshape(len(values), width).astype(np.int64) - 48
+
+
+def _check_digits_cpf(values: List[str]) -> List[bool]:
+    np = _numpy() if len(values) >= 32 else None
+    if np is None:
+        return [validate_cpf(v) for v in values]
+    digits = _digits_matrix(np, values, 11)
+    all_same = (digits == digits[:, :1]).all(axis=1)
+    digit_1 = (digits[:, :9] @ np.array(_CPF_WEIGHTS_1) * 10 % 11) % 10
+    digit_2 = (digits[:, :10] @ np.array(_CPF_WEIGHTS_2) * 10 % 11) % 10
+    valid = ~all_same & (digits[:, 9] == digit_1) & (digits[:, 10] == digit_2)
+    return valid.tolist()
+
+
+def _check_digits_cnpj(values: List[str]) -> List[bool]:
+    np = _numpy() if len(values) >= 32 else None
+    if np is None:
+        return [validate_cnpj(v) for v in values]
+    digits = _digits_matrix(np, values, 14)
+    all_same = (digits == digits[:, :1]).all(axis=1)
+    rest_1 = digits[:, :12] @ np.array(_CNPJ_WEIGHTS_1) % 11
+    digit_1 = np.where(rest_1 < 2, 0, 11 - rest_1)
+    rest_2 = digits[:, :13] @ np.array(_CNPJ_WEIGHTS_2) % 11
+    digit_2 = np.where(rest_2 < 2, 0, 11 - rest_2)
+    valid = ~all_same & (digits[:, 12] == digit_1) & (digits[:, 13] == digit_2)
+    return valid.tolist()
+
+
+def validate_cpf_cnpj_batch(values: Sequence[Any]) -> Tuple[List[bool], List[Optional[str]]]:
     """
-    Valida um lote de registros.
+    Valida uma coluna de CPF/CNPJ (decide pelo número de dígitos).
+    Os dígitos verificadores são calculados de forma vetorizada (NumPy) quando disponível.
     
     Args:
-        data: Lista de dicionários
-        validator_func: Função de validação a aplicar
+        values: Coluna com CPFs/CNPJs (com ou sem pontuação)
     
     Returns:
-        Lista de registros validados (remove registros inválidos)
+        (máscara de validade, valores limpos só com dígitos ou None)
+    """
+    n = len(values)
+    mask = [False] * n
+    cleaned: List[Optional[str]] = [None] * n
+    # Valores distintos ainda não validados -> posições na coluna
+    pending: Dict[str, List[int]] = {}
+    cache = _DOCUMENT_CACHE
+    
+    for index, value in enumerate(values):
+        if not value or not isinstance(value, str):
+            continue
+        positions = pending.get(value)
+        if positions is not None:
+            positions.append(index)
+            continue
+        # Documento já visto (clientes se repetem entre negócios e lotes da execução)
+        known = cache.get(value, _UNKNOWN)
+        if known is _UNKNOWN:
+            pending[value] = [index]
+        elif known is not None:
+            mask[index] = True
+            cleaned[index] = known
+    
+    by_width: Dict[int, Tuple[List[str], List[str]]] = {11: ([], []), 14: ([], [])}
+    for value in pending:
+        digits = _only_digits(value)
+        group = by_width.get(len(digits))
+        if group is None:
+            cache.put(value, None)
+        else:
+            group[0].append(value)
+            group[1].append(digits)
+    
+    for width, check in ((11, _check_digits_cpf), (14, _check_digits_cnpj)):
+        raw_values, digits = by_width[width]
+        if not raw_values:
+            continue
+        for value, document, valid in zip(raw_values, digits, check(digits)):
+            cache.put(value, document if valid else None)
+            if valid:
+                for index in pending[value]:
+                    mask[index] = True
+                    cleaned[index] = document
+    
+    return mask, cleaned
+
+
+def validate_cpf_batch(values: Sequence[Any]) -> Tuple[List[bool], List[Optional[str]]]:
+    """Valida uma coluna de CPFs. Retorna (máscara, dígitos limpos ou None)."""
+    mask, cleaned = validate_cpf_cnpj_batch(values)
+    for index, value in enumerate(cleaned):
+        if value is not None and len(value) != 11:
+            mask[index], cleaned[index] = False, None
+    return mask, cleaned
+
+
+def validate_cnpj_batch(values: Sequence[Any]) -> Tuple[List[bool], List[Optional[str]]]:
+    """Valida uma coluna de CNPJs. Retorna (máscara, dígitos limpos ou None)."""
+    mask, cleaned = validate_cpf_cnpj_batch(values)
+    for index, value in enumerate(cleaned):
+        if value is not None and len(value) != 14:
+            mask[index], cleaned[index] = False, None
+    return mask, cleaned
+
+
+def _map_distinct(func, values: Sequence[Any]) -> List[Any]:
+    """Aplica func uma vez por valor distinto da coluna (valores repetidos reutilizam o resultado)."""
+    memo: Dict[Any, Any] = {}
+    get = memo.get
+    result = []
+    append = result.append
+    for value in values:
+        if value.__class__ is not str:
+            append(func(value))
+            continue
+        output = get(value, _UNKNOWN)
+        if output is _UNKNOWN:
+            memo[value] = output = func(value)
+        append(output)
+    return result
+
+
+def _email_or_none(value: Any) -> Optional[str]:
+    return value if value and isinstance(value, str) and _EMAIL_RE.match(value) else None
+
+
+def _phone_digits_or_none(value: Any) -> Optional[str]:
+    if not value or not isinstance(value, str):
+        return None
+    digits = _only_digits(value)
+    return digits if len(digits) in (10, 11) else None
+
+
+def validate_email_batch(values: Sequence[Any]) -> Tuple[List[bool], List[Optional[str]]]:
+    """Valida uma coluna de emails. Retorna (máscara, email ou None)."""
+    cleaned = _map_distinct(_email_or_none, values)
+    return [c is not None for c in cleaned], cleaned
+
+
+def validate_phone_batch(values: Sequence[Any]) -> Tuple[List[bool], List[Optional[str]]]:
+    """Valida uma coluna de telefones. Retorna (máscara, dígitos limpos ou None)."""
+    cleaned = _map_distinct(_phone_digits_or_none, values)
+    return [c is not None for c in cleaned], cleaned
+
+
+def sanitize_text_batch(values: Sequence[Any], max_length: int = 5000, allow_html: bool = False) -> List[Optional[str]]:
+    """
+    Sanitiza uma coluna de textos (mesmas regras de sanitize_text, padrões pré-compilados).
+    Textos repetidos na coluna são sanitizados uma única vez.
+    
+    Returns:
+        Lista de textos sanitizados (None para vazios)
     """
+    sub = (_CONTROL_CHARS_RE if allow_html else _HTML_OR_CONTROL_RE).sub
+    
+    def sanitize(text):
+        if not text or text.strip() == '':
+            return None
+        text = sub('', text)[:max_length].strip()
+        return text if text else None
+    
+    return _map_distinct(sanitize, values)
+
+
+def _is_valid_date(value: Any) -> bool:
+    # Formato canônico do Vista validado com fromisoformat (bem mais rápido que strptime);
+    # demais formatos seguem pela validação individual
+    if value.__class__ is str and _ISO_DATE_RE.match(value):
+        try:
+            datetime.fromisoformat(value)
+            return True
+        except ValueError:
+            return False
+    return validate_date(value)
+
+
+def _validate_date_batch(values: Sequence[Any]) -> List[bool]:
+    return _map_distinct(_is_valid_date, values)
+
+
+def _sanitize_columns(data: List[Dict[str, Any]], fields: Sequence[str], max_length: int):
+    for field in fields:
+        rows = [row for row in data if row.get(field)]
+        if rows:
+            for row, value in zip(rows, sanitize_text_batch([row[field] for row in rows], max_length=max_length)):
+                row[field] = value
+
+
+def validate_cliente_batch(data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """
+    Versão em lote de validate_cliente: valida coluna a coluna.
+    
+    Args:
+        data: Lista de clientes
+    
+    Returns:
+        (clientes válidos, (índice, mensagem) dos registros descartados)
+    """
+    errors = [(idx, "Código do cliente é obrigatório") for idx, r in enumerate(data) if not r.get('Codigo')]
+    data = [r for r in data if r.get('Codigo')]
+    
+    # CPF/CNPJ inválido vira None para investigação (sem logar o documento - LGPD)
+    rows = [r for r in data if r.get('CPFCNPJ')]
+    if rows:
+        mask, _ = validate_cpf_cnpj_batch([r['CPFCNPJ'] for r in rows])
+        invalid = [r for r, ok in zip(rows, mask) if not ok]
+        for row in invalid:
+            row['CPFCNPJ'] = None
+        if invalid:
+            print(f"AVISO: {len(invalid)} clientes com CPF/CNPJ inválido")
+    
+    for email_field in ['EmailResidencial', 'EmailComercial']:
+        rows = [r for r in data if r.get(email_field)]
+        if rows:
+            mask, _ = validate_email_batch([r[email_field] for r in rows])
+            invalid = [r for r, ok in zip(rows, mask) if not ok]
+            for row in invalid:
+                row[email_field] = None
+            if invalid:
+                print(f"AVISO: {len(invalid)} clientes com {email_field} inválido")
+    
+    for phone_field in ['FonePrincipal', 'Celular', 'FoneComercial']:
+        rows = [r for r in data if r.get(phone_field)]
+        if rows:
+            mask, _ = validate_phone_batch([r[phone_field] for r in rows])
+            invalid = mask.count(False)
+            if invalid:
+                # Mantém o valor original, pois pode ser formato internacional
+                print(f"AVISO: {invalid} clientes com {phone_field} fora do padrão")
+    
+    _sanitize_columns(data, ['Nome', 'Observacoes', 'EnderecoResidencial', 'EnderecoComplemento',
+                             'BairroResidencial', 'CidadeResidencial', 'Profissao'], max_length=5000)
+    
+    for field in ['DataNascimento', 'DataCadastro', 'DataAtualizacao']:
+        rows = [r for r in data if r.get(field)]
+        for row, ok in zip(rows, _validate_date_batch([r[field] for r in rows])):
+            if not ok:
+                row[field] = None
+    
+    return data, errors
+
+
+def validate_negocio_batch(data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """Versão em lote de validate_negocio."""
+    errors = [(idx, "Código do negócio é obrigatório") for idx, r in enumerate(data) if not r.get('Codigo')]
+    data = [r for r in data if r.get('Codigo')]
+    
+    _sanitize_columns(data, ['NomeNegocio', 'ObservacaoPerda', 'MotivoPerda'], max_length=1000)
+    
+    for field in ['ValorNegocio', 'ValorLocacao']:
+        for row in data:
+            if row.get(field):
+                try:
+                    float(row[field])
+                except (ValueError, TypeError):
+                    row[field] = None
+    
+    return data, errors
+
+
+def validate_atividade_batch(data: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+    """Versão em lote de validate_atividade."""
+    _sanitize_columns(data, ['Assunto', 'Texto', 'TextoProposta', 'Local'], max_length=2000)
+    return data, []
+
+
+# Validadores por registro que têm versão em lote equivalente
+BATCH_VALIDATORS = {
+    validate_cliente: validate_cliente_batch,
+    validate_negocio: validate_negocio_batch,
+    validate_atividade: validate_atividade_batch,
+}
+
+
+def _validate_chunk(data: List[Dict[str, Any]], validator_func) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]], int]:
+    """Valida um bloco (executado no pool de processos em lotes grandes)."""
+    batch_validator = BATCH_VALIDATORS.get(validator_func)
+    if batch_validator is not None:
+        # Validação coluna a coluna (padrões pré-compilados, checksums vetorizados)
+        validated, errors = batch_validator(data)
+        return validated, errors, len(data)
+    
     validated = []
     errors = []
     
@@ -350,9 +676,36 @@ def validate_batch(data: List[Dict[str, Any]], validator_func) -> List[Dict[str,
             validated_record = validator_func(record)
             validated.append(validated_record)
         except ValidationError as e:
-            errors.append(f"Registro {idx}: {str(e)}")
+            errors.append((idx, str(e)))
         except Exception as e:
-            errors.append(f"Registro {idx}: Erro inesperado - {str(e)}")
+            errors.append((idx, f"Erro inesperado - {str(e)}"))
+    
+    return validated, errors, len(data)
+
+
+def validate_batch(data: List[Dict[str, Any]], validator_func, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Valida um lote de registros.
+    Lotes grandes são divididos em blocos validados em paralelo no pool de processos;
+    a ordem dos registros é preservada.
+    
+    Args:
+        data: Lista de dicionários
+        validator_func: Função de validação a aplicar (função de módulo)
+        workers: Número de processos (padrão: PARALLEL_WORKERS; 1 valida no próprio processo)
+    
+    Returns:
+        Lista de registros validados (remove registros inválidos)
+    """
+    from src.utils.parallel import map_chunks
+    
+    validated = []
+    errors = []
+    offset = 0
+    for chunk_validated, chunk_errors, size in map_chunks(_validate_chunk, data, validator_func, workers=workers):
+        validated.extend(chunk_validated)
+        errors.extend(f"Registro {offset + idx}: {message}" for idx, message in chunk_errors)
+        offset += size
     
     if errors:
         print(f"AVISOS DE VALIDAÇÃO: {len(errors)} registros com problemas")
@@ -0,0 +1,73 @@
+"""
+Testes das consultas locais (DuckDB) sobre o staging em Parquet.
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("duckdb")
+pytest.importorskip("pyarrow")
+
+from src import analytics  # noqa: E402
+from src.utils.staging import StagingWriter  # noqa: E402
+
+
+def _stage(root, run_id, negocios, atividades=()):
+    writer = StagingWriter(str(root), run_id=run_id)
+    writer.write("negocios", negocios)
+    if atividades:
+        writer.write("atividades", list(atividades), unique_key="CodigoNegocio,CodigoAtividade")
+    writer.close()
+
+
+class TestAnalytics:
+    """Testes das views do staging e da consulta lost_clients."""
+
+    def test_lost_clients_uses_latest_version(self, tmp_path):
+        """Testa o relatório com a versão mais recente de cada negócio entre execuções."""
+        _stage(tmp_path, "2026-10-01T09-00-00",
+               [{"Codigo": "1", "Status": "Aberto", "CodigoCliente": "10", "NomeCliente": "Ana"},
+                {"Codigo": "2", "Status": "Perdido", "CodigoCliente": "20", "NomeCliente": "Bruno"},
+                {"Codigo": "3", "Status": "Perdido", "CodigoCliente": "30", "NomeCliente": "Carla"}],
+               [{"CodigoNegocio": "1", "CodigoAtividade": "a", "EtapaAcao": "Visita", "TipoAtividade": None},
+                {"CodigoNegocio": "2", "CodigoAtividade": "b", "EtapaAcao": None, "TipoAtividade": "PROPOSTA"},
+                {"CodigoNegocio": "3", "CodigoAtividade": "c", "EtapaAcao": "Ligação", "TipoAtividade": "Email"}])
+        # Execução incremental: negócio 1 foi perdido depois
+        _stage(tmp_path, "2026-10-02T09-00-00",
+               [{"Codigo": "1", "Status": "Perdido", "CodigoCliente": "10", "NomeCliente": "Ana"}])
+
+        connection = analytics.connect(root=str(tmp_path))
+        columns, rows = analytics.run_query(connection, analytics.QUERIES["lost_clients"][1])
+        assert columns[:2] == ["CodigoCliente", "NomeCliente"]
+        assert [row[:3] for row in rows] == [("10", "Ana", 1), ("20", "Bruno", 1)]
+
+        # Só a primeira execução: o negócio 1 ainda estava aberto
+        first = analytics.connect(root=str(tmp_path), run_id="2026-10-01T09-00-00")
+        assert [row[0] for row in analytics.run_query(first, analytics.QUERIES["lost_clients"][1])[1]] == ["20"]
+        with pytest.raises(ValueError):
+            analytics.connect(root=str(tmp_path), run_id="inexistente")
+
+    def test_cli_sql_json(self, tmp_path, monkeypatch, capsys):
+        """Testa SQL ad hoc pela linha de comando com saída JSON."""
+        _stage(tmp_path, "r1", [{"Codigo": "1", "Status": "Ganho"}, {"Codigo": "2", "Status": "Ganho"}])
+        monkeypatch.setenv("STAGING_DIR", str(tmp_path))
+        monkeypatch.setattr("src.config._settings", None)
+        code = analytics.main(["--sql", 'SELECT "Status", count(*) AS total FROM negocios GROUP BY 1', "--format", "json"])
+        assert code == 0
+        assert json.loads(capsys.readouterr().out) == [{"Status": "Ganho", "total": 2}]
+
+    def test_latest_follows_written_at_not_run_id(self, tmp_path, monkeypatch):
+        """Testa que a execução mais recente é a última gravada, mesmo com run_id numérico (Actions)."""
+        from src.utils import staging
+        clock = iter(f"2026-10-19T09:00:{second:02d}+00:00" for second in range(60))
+        monkeypatch.setattr(staging, "_utc_now", lambda: next(clock))
+        _stage(tmp_path, "2026-10-19T08-00-00",
+               [{"Codigo": "1", "Status": "Aberto", "CodigoCliente": "10", "NomeCliente": "Ana"}],
+               [{"CodigoNegocio": "1", "CodigoAtividade": "a", "EtapaAcao": "Visita", "TipoAtividade": None}])
+        _stage(tmp_path, "12345678901",
+               [{"Codigo": "1", "Status": "Perdido", "CodigoCliente": "10", "NomeCliente": "Ana"}])
+
+        assert list(staging.list_runs(str(tmp_path))) == ["2026-10-19T08-00-00", "12345678901"]
+        connection = analytics.connect(root=str(tmp_path))
+        assert [row[0] for row in analytics.run_query(connection, analytics.QUERIES["lost_clients"][1])[1]] == ["10"]
@@ -0,0 +1,82 @@
+"""
+Testes do AuditLogger com buffer e insert em lote.
+"""
+
+import json
+import threading
+from src.utils.audit_logger import AuditLogger
+
+
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+    
+    def insert(self, records):
+        self.client.inserts.append(records)
+        return self
+    
+    def execute(self):
+        if self.client.fail:
+            raise ConnectionError("supabase indisponível")
+
+
+class FakeSupabase:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.inserts = []
+    
+    def table(self, name):
+        assert name == 'audit_logs'
+        return FakeTable(self)
+
+
+class TestAuditLogger:
+    """Testes do buffer de auditoria."""
+    
+    def test_single_insert_per_flush(self):
+        """Testa que vários registros viram um único insert no flush."""
+        supabase = FakeSupabase()
+        audit = AuditLogger(supabase, flush_every=100)
+        for entity in ('imoveis', 'clientes', 'negocios'):
+            audit.log_etl_run(entity=entity, status='SUCCESS', records_processed=10)
+        assert supabase.inserts == []
+        assert audit.flush() == 3
+        assert len(supabase.inserts) == 1
+        assert [r['entity'] for r in supabase.inserts[0]] == ['imoveis', 'clientes', 'negocios']
+        assert audit.flush() == 0
+    
+    def test_flush_every_n_records(self):
+        """Testa o flush automático a cada N registros."""
+        supabase = FakeSupabase()
+        audit = AuditLogger(supabase, flush_every=2)
+        for _ in range(5):
+            audit.log_operation(entity='atividades', operation='UPSERT', status='SUCCESS')
+        assert [len(batch) for batch in supabase.inserts] == [2, 2]
+        assert audit.pending() == 1
+    
+    def test_fallback_file_on_failure(self, tmp_path):
+        """Testa que registros não gravados vão para o arquivo JSONL local."""
+        path = tmp_path / 'audit.jsonl'
+        audit = AuditLogger(FakeSupabase(fail=True), fallback_path=str(path))
+        audit.log_etl_run(entity='clientes', status='ERROR', errors=['timeout'])
+        audit.flush()
+        lines = path.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line)['entity'] for line in lines] == ['clientes']
+        assert audit.pending() == 0
+    
+    def test_thread_safe_buffer(self):
+        """Testa que registros de várias threads não se perdem."""
+        supabase = FakeSupabase()
+        audit = AuditLogger(supabase, flush_every=7)
+        
+        def worker():
+            for _ in range(100):
+                audit.log_operation(entity='atividades', operation='UPSERT', status='SUCCESS')
+        
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        audit.flush()
+        assert sum(len(batch) for batch in supabase.inserts) == 400
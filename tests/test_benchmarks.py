@@ -0,0 +1,27 @@
+"""
+Teste de fumaça dos benchmarks: todo módulo de benchmarks/ importa sem erro
+(pega nomes removidos ou movidos em src/ que os benchmarks ainda usam).
+"""
+
+import importlib
+import pkgutil
+
+import pytest
+
+import benchmarks
+
+MODULES = sorted(info.name for info in pkgutil.iter_modules(benchmarks.__path__))
+
+
+class TestBenchmarkImports:
+    """Importação dos módulos de benchmark."""
+
+    def test_modules_found(self):
+        """Testa que a descoberta encontrou os benchmarks."""
+        assert "bench_validators" in MODULES
+
+    @pytest.mark.parametrize("name", MODULES)
+    def test_import(self, name):
+        """Testa a importação do módulo (sem executar o benchmark)."""
+        module = importlib.import_module(f"benchmarks.{name}")
+        assert callable(getattr(module, "main", None))
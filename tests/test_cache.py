@@ -0,0 +1,56 @@
+"""
+Testes dos caches de validação (LRU em memória).
+"""
+
+import pytest
+from src.utils import validators
+from src.utils.cache import LRUCache, cache_stats, clear_caches, memoize
+
+
+@pytest.fixture(autouse=True)
+def _clean_caches():
+    clear_caches()
+    yield
+    clear_caches()
+
+
+class TestLRUCache:
+    """Testes do cache LRU."""
+    
+    def test_eviction_and_counters(self):
+        """Testa descarte do menos usado e contadores de acerto/falta."""
+        cache = LRUCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1      # 'a' passa a ser o mais recente
+        cache.put('c', 3)               # descarta 'b'
+        assert cache.get('b') is None
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'size': 2, 'maxsize': 2}
+    
+    def test_memoize(self):
+        """Testa que a função memoizada só é chamada uma vez por argumento."""
+        calls = []
+        
+        @memoize('test_memoize')
+        def double(value):
+            calls.append(value)
+            return value * 2
+        
+        assert [double(1), double(1), double(2)] == [2, 2, 4]
+        assert calls == [1, 2]
+        assert cache_stats()['test_memoize']['hits'] == 1
+    
+    def test_validators_are_memoized(self):
+        """Testa que validações repetidas de CPF acertam o cache."""
+        assert validators.validate_cpf('123.456.789-09')
+        assert validators.validate_cpf('123.456.789-09')
+        assert cache_stats()['validate_cpf']['hits'] == 1
+    
+    def test_batch_document_cache(self):
+        """Testa que documentos repetidos entre lotes não são recalculados."""
+        values = ['123.456.789-09', '123.456.789-00']
+        first = validators.validate_cpf_cnpj_batch(values)
+        second = validators.validate_cpf_cnpj_batch(values)
+        assert first == second == ([True, False], ['12345678909', None])
+        assert cache_stats()['cpf_cnpj_batch']['hits'] == 2
+
@@ -0,0 +1,83 @@
+"""
+Testes da configuração sob demanda e do tempo de startup (sem credenciais).
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.config import Settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CREDENTIALS = ("VISTA_API_URL", "VISTA_API_KEY", "SUPABASE_URL", "SUPABASE_KEY")
+# Orçamento do import de src.main (segundos, tempo cumulativo do -X importtime)
+IMPORT_BUDGET_S = 0.5
+HEAVY_MODULES = ("pandas", "supabase", "numpy")
+
+
+def run_python(args, cwd):
+    env = {k: v for k, v in os.environ.items() if k not in CREDENTIALS}
+    env["PYTHONPATH"] = ROOT
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env, capture_output=True, text=True, timeout=60)
+
+
+class TestSettings:
+    """Testes de Settings."""
+
+    def test_reads_environment(self):
+        """Testa a leitura das opções e o prefixo https da URL do Vista."""
+        settings = Settings({"VISTA_API_URL": "exemplo.vistahost.com.br", "MEMORY_BUDGET_MB": "512",
+                             "ENABLE_AUDIT_LOGGING": "False", "CSV_OUTPUT_DIR": "/tmp/etl"})
+        assert settings.VISTA_API_URL == "https://exemplo.vistahost.com.br"
+        assert settings.MEMORY_BUDGET_MB == 512
+        assert settings.ENABLE_AUDIT_LOGGING is False
+        assert settings.METRICS_DIR == os.path.join("/tmp/etl", "metrics")
+
+    def test_credentials_required_on_demand(self):
+        """Testa que as credenciais só são exigidas por require_*."""
+        settings = Settings({"VISTA_API_URL": "https://x", "VISTA_API_KEY": "k"})
+        settings.require_vista()
+        with pytest.raises(ValueError, match="SUPABASE_URL"):
+            settings.require_supabase()
+
+
+class TestStartup:
+    """Testes do import e da CLI sem credenciais."""
+
+    def test_import_has_no_side_effects(self, tmp_path):
+        """Testa que importar src.config não lê credenciais, não imprime e não cria diretórios."""
+        result = run_python(["-c", "import src.config"], cwd=str(tmp_path))
+        assert result.returncode == 0, result.stderr
+        assert result.stdout == ""
+        assert list(tmp_path.iterdir()) == []
+
+    def test_import_starts_no_threads(self, tmp_path):
+        """Testa que os imports não criam o pipeline de log nem iniciam a thread do listener."""
+        code = ("import threading; from src.utils import secure_logger as s; "
+                "assert s._queue_handler is None and s._secure_logger is None; "
+                "import src.main; assert s._listener is None; assert threading.active_count() == 1")
+        result = run_python(["-c", code], cwd=str(tmp_path))
+        assert result.returncode == 0, result.stderr
+
+    def test_import_time_budget(self, tmp_path):
+        """Testa o orçamento de import de src.main e a ausência de pandas/supabase/numpy."""
+        result = run_python(["-X", "importtime", "-c", "import src.main"], cwd=str(tmp_path))
+        assert result.returncode == 0, result.stderr
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if line.startswith("import time:") and "|" in line:
+                _, total, name = line[len("import time:"):].split("|")
+                if total.strip().isdigit():
+                    cumulative[name.strip()] = int(total) / 1e6
+        assert not [name for name in cumulative if name.split(".")[0] in HEAVY_MODULES]
+        assert cumulative["src.main"] < IMPORT_BUDGET_S
+
+    @pytest.mark.parametrize("args", [["-m", "src.main", "--help"],
+                                      [os.path.join(ROOT, "scripts", "sync_activities.py"), "--help"]])
+    def test_cli_help_without_credentials(self, tmp_path, args):
+        """Testa que as CLIs iniciam sem credenciais."""
+        result = run_python(args, cwd=str(tmp_path))
+        assert result.returncode == 0, result.stderr
+        assert "--profile" in result.stdout
@@ -0,0 +1,86 @@
+"""
+Testes do enriquecimento em memória (equipe e nomes preenchidos antes da gravação).
+"""
+
+from src.utils import enrichment
+from src.utils.enrichment import EnrichmentIndex, enrich_rows, start_enrichment, stop_enrichment
+from src.utils.records import ActivityRecord, DealRecord
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _TableClient:
+    """Cliente mínimo: responde select/order/range com as linhas da tabela e registra as páginas."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = []
+
+    def table(self, name):
+        self._table = name
+        return self
+
+    def select(self, columns):
+        self._columns = columns
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self.calls.append((self._table, self._columns, start, end))
+        self._rows = self.tables[self._table][start:end + 1]
+        return self
+
+    def execute(self):
+        return _Response(self._rows)
+
+
+class TestEnrichmentIndex:
+    """Testes de EnrichmentIndex."""
+
+    def test_enrich_dicts_and_records(self):
+        """Testa equipe em imóveis/negócios e nomes em atividades, sem sobrescrever com vazio."""
+        index = EnrichmentIndex()
+        index.learn("corretores", [{"Codigo": 7, "Equipe": "Norte"}, {"Codigo": "8", "Equipe": ""}])
+        index.learn("usuarios", [{"Codigo": "7", "Nome": "Ana"}])
+        index.learn("clientes", [{"Codigo": "3", "Nome": "Cliente"}])
+
+        imoveis = [{"Codigo": "1", "CodigoCorretor": "7"}, {"Codigo": "2", "CodigoCorretor": "8"}]
+        assert index.enrich("imoveis", imoveis) == 1
+        assert imoveis[0]["EquipeCorretor"] == "Norte" and "EquipeCorretor" not in imoveis[1]
+
+        deal = DealRecord.from_mapping({"Codigo": "5", "CodigoCorretor": "7", "EquipeCorretor": "Norte"})
+        assert index.enrich("negocios", [deal]) == 0
+
+        activity = ActivityRecord.from_mapping({"CodigoNegocio": "5", "CodigoCorretor": "7",
+                                                "CodigoCliente": "3", "NomeCliente": "3: antigo"})
+        assert index.enrich("atividades", [activity]) == 2
+        assert (activity.NomeCorretor, activity.NomeCliente) == ("Ana", "Cliente")
+        assert index.enrich("agenda", [{"CodigoCorretor": "7"}]) == 0
+
+    def test_from_supabase_pages(self):
+        """Testa a leitura paginada só das colunas usadas."""
+        client = _TableClient({"corretores": [{"Codigo": str(i), "Equipe": f"E{i}"} for i in range(5)]})
+        index = EnrichmentIndex.from_supabase(client, ["corretores"], page_size=2)
+        assert len(index.teams) == 5 and index.teams["4"] == "E4"
+        assert [call[2] for call in client.calls] == [0, 2, 4]
+        assert client.calls[0][1] == "Codigo, Equipe"
+
+    def test_enrich_rows_learns_from_writes(self, monkeypatch):
+        """Testa o índice ativo alimentado pelos usuários gravados na execução e desligado no stop."""
+        monkeypatch.setattr(enrichment, "_index", None)
+        start_enrichment(EnrichmentIndex())
+        try:
+            enrich_rows("usuarios", [{"Codigo": "7", "Nome": "Ana"}])
+            rows = [{"CodigoCorretor": "7"}]
+            enrich_rows("atividades", rows)
+            assert rows[0]["NomeCorretor"] == "Ana"
+        finally:
+            stop_enrichment()
+        rows = [{"CodigoCorretor": "7"}]
+        enrich_rows("atividades", rows)
+        assert rows == [{"CodigoCorretor": "7"}]
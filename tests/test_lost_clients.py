@@ -0,0 +1,45 @@
+"""
+Testes da leitura paginada do relatório de clientes perdidos (RPC get_lost_clients).
+"""
+
+from query_lost_clients import fetch_lost_clients
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _RpcClient:
+    """Cliente mínimo: pagina uma lista de clientes com p_limit/p_offset e registra as chamadas."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        self._page = self.rows[params["p_offset"]:params["p_offset"] + params["p_limit"]]
+        return self
+
+    def execute(self):
+        return _Response(self._page)
+
+
+class TestFetchLostClients:
+    """Testes de fetch_lost_clients."""
+
+    def test_pages_until_short_page(self):
+        """Testa uma chamada por página, parando na página incompleta."""
+        client = _RpcClient([{"CodigoCliente": str(i)} for i in range(5)])
+        rows = list(fetch_lost_clients(client, page_size=2))
+        assert [row["CodigoCliente"] for row in rows] == ["0", "1", "2", "3", "4"]
+        assert [params["p_offset"] for _, params in client.calls] == [0, 2, 4]
+        assert {name for name, _ in client.calls} == {"get_lost_clients"}
+
+    def test_limit(self):
+        """Testa o limite de clientes encurtando a última página pedida."""
+        client = _RpcClient([{"CodigoCliente": str(i)} for i in range(10)])
+        assert len(list(fetch_lost_clients(client, page_size=4, limit=6))) == 6
+        assert [params for _, params in client.calls] == [{"p_limit": 4, "p_offset": 0},
+                                                          {"p_limit": 2, "p_offset": 4}]
@@ -0,0 +1,73 @@
+"""
+Testes do acompanhamento de memória por etapa e do orçamento de memória.
+"""
+
+import json
+import tracemalloc
+
+import pytest
+
+from src.utils.memory import MB, MemoryBudgetExceeded, MemoryMonitor, current_rss
+
+
+class TestMemoryMonitor:
+    """Testes de MemoryMonitor."""
+
+    def test_track_records_stage(self, tmp_path):
+        """Testa o registro de RSS da etapa e o relatório JSON."""
+        monitor = MemoryMonitor()
+        with monitor.track("extracao"):
+            data = [str(i) for i in range(1000)]
+        assert data
+        entry = monitor.stages["extracao"]
+        assert entry["rss_before_mb"] > 0 and entry["process_peak_mb"] >= entry["rss_after_mb"] > 0
+        assert "top_sites" not in entry
+
+        path = monitor.write_report("teste", directory=str(tmp_path))
+        report = json.loads(open(path, encoding="utf-8").read())
+        assert report["budget_mb"] is None
+        assert "extracao" in report["stages"]
+
+    def test_trace_lists_allocation_sites(self):
+        """Testa o pico do tracemalloc e os pontos de alocação com o rastreamento ligado."""
+        monitor = MemoryMonitor(trace=True)
+        try:
+            with monitor.track("carga"):
+                blob = [bytearray(1024) for _ in range(4096)]
+        finally:
+            # Não deixa o tracemalloc ligado (e lento) para os testes seguintes
+            tracemalloc.stop()
+        entry = monitor.stages["carga"]
+        assert entry["traced_peak_mb"] >= 4
+        assert any("test_memory.py" in site["site"] for site in entry["top_sites"])
+        del blob
+
+    def test_budget_exceeded_raises_with_report(self):
+        """Testa a falha antecipada quando o RSS passa do orçamento."""
+        monitor = MemoryMonitor(budget_mb=1)
+        with pytest.raises(MemoryBudgetExceeded) as exc:
+            with monitor.track("negocios"):
+                pass
+        assert "negocios" in str(exc.value)
+        assert "MEMORY_BUDGET_MB=1" in str(exc.value)
+
+    def test_under_pressure_uses_soft_limit(self):
+        """Testa o limite suave: o modo em blocos entra antes do orçamento estourar."""
+        rss_mb = current_rss() / MB
+        assert not MemoryMonitor().under_pressure()
+        assert MemoryMonitor(budget_mb=rss_mb * 1.1, soft_limit=0.8).under_pressure()
+        assert not MemoryMonitor(budget_mb=rss_mb * 10, soft_limit=0.8).under_pressure()
+
+    def test_check_budget_is_rate_limited(self):
+        """Testa que laços quentes só leem o RSS uma vez por intervalo."""
+        monitor = MemoryMonitor(budget_mb=rss_mb_plenty())
+        monitor.check_budget("loop")
+        monitor.budget = 1
+        # Dentro do intervalo: não relê o RSS
+        monitor.check_budget("loop")
+        with pytest.raises(MemoryBudgetExceeded):
+            monitor.check_budget("loop", force=True)
+
+
+def rss_mb_plenty() -> float:
+    return current_rss() / MB * 10
@@ -0,0 +1,74 @@
+"""
+Testes do registro de métricas e da exportação (textfile do Prometheus e JSON).
+"""
+
+import json
+
+from src.utils.metrics import MetricsRegistry, write_metrics, REGISTRY, stage, STAGE_SECONDS
+
+
+class TestMetricsRegistry:
+    """Testes de contadores, gauges e histogramas."""
+
+    def test_counter_by_labels(self):
+        """Testa que o contador soma por conjunto de labels."""
+        registry = MetricsRegistry()
+        requests = registry.counter("http_requests_total", "Requisições")
+        requests.inc(endpoint="imoveis/listar", status=200)
+        requests.inc(endpoint="imoveis/listar", status=200)
+        requests.inc(endpoint="imoveis/listar", status=429)
+
+        assert requests.value(endpoint="imoveis/listar", status=200) == 2
+        assert requests.value(status=429, endpoint="imoveis/listar") == 1
+        assert registry.counter("http_requests_total", "Requisições") is requests
+
+    def test_histogram_quantiles(self):
+        """Testa a estimativa de p50/p99 pelos buckets."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("latency_seconds", "Latência", buckets=(0.1, 1.0))
+        for _ in range(99):
+            latency.observe(0.05, endpoint="clientes/listar")
+        latency.observe(0.5, endpoint="clientes/listar")
+
+        assert latency.quantile(0.5, endpoint="clientes/listar") < 0.1
+        summary = registry.summary()["latency_seconds"]['{endpoint="clientes/listar"}']
+        assert summary["count"] == 100
+        assert summary["p99"] <= 0.1
+
+    def test_prometheus_text_format(self):
+        """Testa a exposição no formato texto (buckets cumulativos, sum e count)."""
+        registry = MetricsRegistry()
+        latency = registry.histogram("load_batch_seconds", "Latência do lote", buckets=(0.5, 1.0))
+        latency.observe(0.2, table="imoveis")
+        latency.observe(2.0, table="imoveis")
+        registry.counter("rows_loaded_total", "Linhas").inc(1000, table="imoveis")
+
+        text = registry.to_prometheus()
+        assert "# TYPE vista_etl_load_batch_seconds histogram" in text
+        assert 'vista_etl_load_batch_seconds_bucket{table="imoveis",le="0.5"} 1' in text
+        assert 'vista_etl_load_batch_seconds_bucket{table="imoveis",le="+Inf"} 2' in text
+        assert 'vista_etl_load_batch_seconds_count{table="imoveis"} 2' in text
+        assert 'vista_etl_rows_loaded_total{table="imoveis"} 1000' in text
+
+    def test_label_values_are_escaped(self):
+        """Testa o escape de aspas e barras nos valores de label."""
+        registry = MetricsRegistry()
+        registry.counter("errors_total", "Erros").inc(reason='valor "inválido"\\')
+        assert 'reason="valor \\"inválido\\"\\\\"' in registry.to_prometheus()
+
+
+class TestMetricsExport:
+    """Testes da gravação dos arquivos da execução."""
+
+    def test_write_metrics_files(self, tmp_path):
+        """Testa que o .prom e o .json são gravados com o resumo das etapas."""
+        REGISTRY.reset()
+        with stage("extracao_paralela"):
+            pass
+        summary = write_metrics(str(tmp_path), job="teste")
+
+        assert STAGE_SECONDS.value(stage="extracao_paralela") >= 0
+        assert 'vista_etl_stage_seconds{stage="extracao_paralela"}' in (tmp_path / "teste.prom").read_text(encoding="utf-8")
+        assert json.loads((tmp_path / "teste.json").read_text(encoding="utf-8")) == summary
+        assert '{stage="extracao_paralela"}' in summary["stage_seconds"]
+        REGISTRY.reset()
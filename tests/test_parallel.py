@@ -0,0 +1,79 @@
+"""
+Testes do pool de processos para etapas CPU-bound.
+"""
+
+import pytest
+from src.utils.secure_logger import capture_stdout, shutdown_logging
+from src.utils.parallel import imap_ordered, map_chunks, shutdown_process_pool, split_chunks
+from src.utils.transformers import transform_batch
+from src.utils.validators import validate_batch, validate_cliente
+
+
+def _square_chunk(chunk, offset):
+    return [value * value + offset for value in chunk]
+
+
+def _print_chunk(chunk):
+    print(f"AVISO: bloco com {len(chunk)} itens")
+    return len(chunk)
+
+
+@pytest.fixture(autouse=True)
+def _shutdown_pool():
+    yield
+    shutdown_process_pool()
+
+
+class TestMapChunks:
+    """Testes da execução em blocos no pool."""
+    
+    def test_split_chunks(self):
+        """Testa que os blocos cobrem a sequência inteira, em ordem."""
+        chunks = split_chunks(list(range(10)), workers=2)
+        assert [item for chunk in chunks for item in chunk] == list(range(10))
+        assert len(chunks) == 5  # 4 blocos por worker, arredondando o tamanho para cima
+    
+    def test_results_in_order(self):
+        """Testa que os resultados voltam na ordem original, com e sem pool."""
+        items = list(range(1000))
+        expected = [[value * value + 1 for value in items]]
+        parallel = map_chunks(_square_chunk, items, 1, workers=2, min_items=0)
+        assert [value for chunk in parallel for value in chunk] == expected[0]
+        assert map_chunks(_square_chunk, items, 1, workers=1) == expected
+    
+    def test_worker_prints_reach_stdout(self, capfd):
+        """Testa que prints dos workers (fork, stdout capturado no pai) não ficam na fila do pai."""
+        capture_stdout()
+        try:
+            assert sum(map_chunks(_print_chunk, list(range(8)), workers=2, chunk_size=4, min_items=0)) == 8
+            shutdown_process_pool()
+        finally:
+            shutdown_logging()
+        assert capfd.readouterr().out.count("AVISO: bloco com 4 itens") == 2
+    
+    def test_imap_ordered(self):
+        """Testa o map preguiçoso com prefetch limitado."""
+        arguments = (([value], 0) for value in range(20))
+        assert list(imap_ordered(_square_chunk, arguments, workers=2, prefetch=3)) == [[v * v] for v in range(20)]
+
+
+class TestParallelStages:
+    """Testes das etapas do ETL executadas no pool."""
+    
+    def test_validate_batch_parallel_matches_serial(self):
+        """Testa que a validação paralela produz o mesmo resultado e numeração de erros."""
+        def make_rows():
+            rows = [{'Codigo': str(i), 'CPFCNPJ': '123.456.789-09', 'Nome': f'<b>{i}</b>'} for i in range(6000)]
+            rows[5500] = {'Nome': 'Sem código'}
+            return rows
+        serial = validate_batch(make_rows(), validate_cliente, workers=1)
+        parallel = validate_batch(make_rows(), validate_cliente, workers=2)
+        assert parallel == serial
+        assert len(parallel) == 5999
+    
+    def test_transform_batch_returns_invalid_counts(self):
+        """Testa que o lote transformado no worker devolve as contagens de inválidos."""
+        rows = [{'ValorNegocio': 'abc', 'DataInicial': '0000-00-00 00:00:00'}]
+        (batch, invalid), = imap_ordered(transform_batch, [('negocios', rows)], workers=2)
+        assert batch == [{'ValorNegocio': None, 'DataInicial': None}]
+        assert invalid == {'ValorNegocio': 1}
@@ -0,0 +1,49 @@
+"""
+Testes do modo de profiling (atribuição por task e monitor de lag do event loop).
+"""
+
+import asyncio
+import json
+import pstats
+import time
+
+from src.utils.profiling import run_profiled
+
+
+async def fetch_page():
+    await asyncio.sleep(0.01)
+    # Trabalho síncrono que segura o event loop
+    time.sleep(0.3)
+
+
+async def extract_imoveis():
+    await asyncio.gather(fetch_page(), fetch_page())
+
+
+async def main():
+    await asyncio.gather(extract_imoveis(), asyncio.sleep(0.05))
+    return "ok"
+
+
+class TestProfiling:
+    """Testes de run_profiled."""
+
+    def test_writes_profiles_with_task_attribution(self, tmp_path):
+        """Testa os três arquivos, a raiz por extrator e o registro do bloqueio."""
+        result = run_profiled(main, "teste", output_dir=str(tmp_path), lag_threshold=0.1, interval=0.002)
+        assert result == "ok"
+
+        pstats_file, = tmp_path.glob("teste-*.pstats")
+        folded_file, = tmp_path.glob("teste-*.folded")
+        lag_file, = tmp_path.glob("teste-*-lag.json")
+        assert pstats.Stats(str(pstats_file)).total_calls > 0
+
+        roots = {line.split(";", 1)[0] for line in folded_file.read_text(encoding="utf-8").splitlines()}
+        assert "task:main > extract_imoveis > fetch_page" in roots
+
+        stalls = json.loads(lag_file.read_text(encoding="utf-8"))["stalls"]
+        # As duas fetch_page acordam no mesmo ciclo do loop: um único bloqueio de ~0.6 s
+        assert stalls
+        assert stalls[0]["duration_s"] >= 0.25
+        assert "fetch_page" in stalls[0]["location"]
+        assert stalls[0]["task"].endswith("fetch_page")
@@ -0,0 +1,46 @@
+"""
+Testes do relatório de progresso amostrado.
+"""
+
+from src.utils.progress import ProgressReporter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestProgressReporter:
+    """Testes do ProgressReporter."""
+    
+    def test_emits_once_per_interval(self, caplog):
+        """Testa que milhares de atualizações geram uma linha por intervalo, com vazão e ETA."""
+        clock = FakeClock()
+        progress = ProgressReporter("negocios", total=1024, unit="negócios", interval=5, clock=clock)
+        with caplog.at_level('INFO', logger='progress'):
+            for _ in range(1024):
+                clock.now += 1 / 64        # 16 s no total, 64 negócios/s
+                progress.update(1, "negócio processado")
+            progress.close()
+        
+        assert len(caplog.messages) == 3 + 1   # t=5s, 10s, 15s e a linha final
+        assert caplog.messages[0] == "negocios: 320/1024 negócios (31%) - 64.0 negócios/s - ETA 11s"
+        assert caplog.messages[-1] == "negocios: concluído - 1024 negócios em 16s (64.0 negócios/s)"
+    
+    def test_detail_only_in_debug(self, caplog):
+        """Testa que o detalhe por item só aparece em DEBUG."""
+        progress = ProgressReporter("paginas", unit="páginas", interval=60, clock=FakeClock())
+        with caplog.at_level('DEBUG', logger='progress'):
+            progress.update(1, "página %d recebida", 7)
+        assert caplog.messages == ["paginas: página 7 recebida"]
+    
+    def test_close_is_idempotent(self, caplog):
+        """Testa que a linha final é registrada uma única vez (context manager + close)."""
+        with caplog.at_level('INFO', logger='progress'):
+            with ProgressReporter("lotes", interval=60, clock=FakeClock()) as progress:
+                progress.update(3)
+            progress.close()
+        assert len(caplog.messages) == 1
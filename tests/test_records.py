@@ -0,0 +1,96 @@
+"""
+Testes dos registros compactos (slots) de atividades e negócios.
+"""
+
+import pickle
+
+import pytest
+
+from src.utils.records import (
+    ACTIVITY_FIELDS, ActivityRecord, DealRecord, activities_from_columns, as_dicts, make_record_type
+)
+
+
+class TestRecords:
+    """Testes da representação compacta."""
+
+    def test_dict_interface(self):
+        """Registros se comportam como dicionários no pipeline."""
+        deal = DealRecord.from_mapping({"Codigo": "10", "NomeCliente": "Ana", "Extra": "ignorado"})
+        assert deal.get("Codigo") == "10"
+        assert deal["NomeCliente"] == "Ana"
+        assert deal.get("CodigoCorretor") is None
+        assert deal.get("Inexistente", "x") == "x"
+        assert "Extra" not in deal
+        with pytest.raises(KeyError):
+            deal["Extra"] = 1
+
+    def test_no_instance_dict(self):
+        """Slots: nenhum __dict__ por instância."""
+        activity = ActivityRecord("1", "2")
+        assert not hasattr(activity, "__dict__")
+        with pytest.raises(AttributeError):
+            activity.CampoNovo = 1
+
+    def test_interned_strings(self):
+        """Strings repetidas dos campos internados são compartilhadas."""
+        first = ActivityRecord.from_mapping({"TipoAtividade": "".join(["Vis", "ita"])})
+        second = ActivityRecord.from_mapping({"TipoAtividade": "".join(["Vi", "sita"])})
+        assert first.TipoAtividade is second.TipoAtividade
+
+    def test_serialization(self):
+        """Conversão para dict só na serialização; dicts passam inalterados."""
+        activity = ActivityRecord("N1", "A1")
+        plain = {"Codigo": "1"}
+        rows = as_dicts([activity, plain])
+        assert list(rows[0]) == list(ACTIVITY_FIELDS)
+        assert rows[0]["CodigoNegocio"] == "N1"
+        assert rows[0]["CodigoAtividade"] == "A1"
+        assert "AtividadeCreatedAt" not in rows[0] and "Data" in rows[0]
+        assert rows[1] is plain
+
+    def test_pickle(self):
+        """Registros podem ser enviados a outros processos."""
+        Point = make_record_type("Point", ("x", "y"), module=__name__)
+        globals()["Point"] = Point
+        assert pickle.loads(pickle.dumps(Point(1, 2))) == Point(1, 2)
+        deal = DealRecord.from_mapping({"Codigo": "7"})
+        assert pickle.loads(pickle.dumps(deal)) == deal
+
+
+class TestActivityTransposition:
+    """Testes da transposição colunar da resposta de negocios/atividades."""
+
+    deal = DealRecord.from_mapping({
+        "Codigo": "N1", "CodigoCliente": "C1", "CodigoCorretor": "B1",
+        "NomeCliente": "Ana", "NomeCorretor": "Bia",
+    })
+
+    def test_ragged_columns_are_padded(self):
+        """Campos ausentes e colunas curtas viram string vazia."""
+        data = {"CodigoAtividade": ["1", "2", "3"], "Assunto": ["a", "b"], "AtividadeCreatedAt": ["d1", "d2", "d3"]}
+        activities = activities_from_columns(self.deal, data)
+        assert [a.CodigoAtividade for a in activities] == ["1", "2", "3"]
+        assert [a.Assunto for a in activities] == ["a", "b", ""]
+        assert [a.Data for a in activities] == ["d1", "d2", "d3"]
+        assert activities[0].Texto == ""
+        assert all(a.CodigoNegocio == "N1" for a in activities)
+
+    def test_deal_fallbacks(self):
+        """Dados vazios da atividade são preenchidos com os do negócio."""
+        data = {"CodigoAtividade": ["1", "2"], "CodigoCliente": ["", "C9"], "CodigoCorretor": ["B2", ""]}
+        first, second = activities_from_columns(self.deal, data)
+        assert (first.CodigoCliente, second.CodigoCliente) == ("C1", "C9")
+        assert (first.CodigoCorretor, second.CodigoCorretor) == ("B2", "B1")
+        assert first.NomeCliente == "Ana" and second.NomeCorretor == "Bia"
+
+    def test_without_fallback(self):
+        """Sem dados no negócio, nomes ficam None."""
+        activity, = activities_from_columns({"Codigo": "N2"}, {"CodigoAtividade": ["1"]})
+        assert activity.NomeCliente is None and activity.CodigoCliente == ""
+
+    def test_empty_payload(self):
+        """Respostas sem CodigoAtividade não geram atividades."""
+        assert activities_from_columns(self.deal, {}) == []
+        assert activities_from_columns(self.deal, {"CodigoAtividade": []}) == []
+        assert activities_from_columns(self.deal, {"CodigoAtividade": "erro"}) == []
@@ -0,0 +1,73 @@
+"""
+Testes da execução seletiva (RunSelection, janelas de datas e estimativa do --dry-run).
+"""
+
+import argparse
+import json
+
+import pytest
+
+from src.utils import run_plan
+from src.utils.run_plan import RunSelection, dry_run, filter_window, parse_when, plan_requests
+
+
+class TestRunSelection:
+    """Testes de RunSelection e das datas de --since/--until."""
+
+    def test_defaults_and_dependencies(self):
+        """Testa o padrão (tudo), pipes sem entidades e atividades puxando negócios."""
+        assert RunSelection().entities == list(run_plan.ENTITIES)
+        assert not RunSelection().partial
+        assert RunSelection(pipes=["3"]).entities == ["negocios", "atividades"]
+        assert RunSelection(entities=["atividades", "agenda"]).entities == ["agenda", "negocios", "atividades"]
+        with pytest.raises(ValueError):
+            RunSelection(entities=["imovel"])
+        assert RunSelection().describe().endswith("carga completa")
+        assert RunSelection().window("negocios") == (None, None)
+
+    def test_windows(self):
+        """Testa a janela por entidade, a marca d'água do sync_state e o filtro de registros."""
+        selection = RunSelection(since=parse_when("2025-01-10"), until=parse_when("2025-01-20", end=True))
+        assert selection.partial
+        assert selection.window("negocios") == ("2025-01-10 00:00:00", "2025-01-20 23:59:59")
+        assert selection.window("clientes") == (None, None)
+        records = [{"UltimaAtualizacao": "2025-01-09 23:00:00"}, {"UltimaAtualizacao": "2025-01-20 18:30:00"},
+                   {"UltimaAtualizacao": "2025-01-21"}, {"UltimaAtualizacao": ""}]
+        assert filter_window(records, "UltimaAtualizacao", *selection.window("negocios")) == [records[1]]
+
+        incremental = RunSelection(entities=["negocios"], since="last_run")
+        incremental.resolve_last_run({"negocios": "2025-02-01 08:00:00"}.get)
+        assert incremental.window("negocios") == ("2025-02-01 08:00:00", None)
+        assert not incremental.partial
+
+    def test_parse_when_rejects_invalid(self):
+        """Testa o erro de argparse para datas inválidas."""
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_when("ontem")
+        assert parse_when("2025-03-01T10:15") == "2025-03-01 10:15:00"
+
+
+class TestDryRun:
+    """Testes da estimativa a partir dos totais de paginação."""
+
+    def test_plan_from_recorded_totals(self, tmp_path, monkeypatch):
+        """Testa totais gravados por listagem completa e a estimativa por entidade/pipe."""
+        monkeypatch.setattr(run_plan, "_page_totals", {})
+        run_plan.record_page_totals("imoveis/listar", None, 12, 590, 50)
+        run_plan.record_page_totals("negocios/listar", {"codigo_pipe": "1"}, 2, 80, 50)
+        run_plan.record_page_totals("negocios/listar", {"codigo_pipe": "2"}, 3, 120, 50)
+        path = str(tmp_path / "page_totals.json")
+        assert run_plan.save_page_totals(path) == path
+        totals = json.loads(open(path, encoding="utf-8").read())
+        assert totals["endpoints"]["negocios/listar?codigo_pipe=2"]["records"] == 120
+
+        rows = {row["entity"]: row for row in plan_requests(RunSelection(), totals, concurrency=10)}
+        assert rows["imoveis"]["requests"] == 12
+        assert rows["clientes"]["requests"] is None
+        # pipes/listar + 5 páginas + 200 detalhes; uma requisição de atividades por negócio
+        assert rows["negocios"]["requests"] == 206
+        assert rows["atividades"]["requests"] == 200
+
+        text = dry_run(RunSelection(pipes=["2", "9"]), path=path, concurrency=10)
+        assert "pipes sem totais: 9" in text
+        assert "sync_state não será atualizado" in text
@@ -5,9 +5,11 @@ Testes de segurança para validação, sanitização e logging.
 import pytest
 from src.utils.validators import (
     validate_cpf, validate_cnpj, validate_email, validate_phone,
-    sanitize_text, validate_cliente, validate_negocio, ValidationError
+    sanitize_text, validate_cliente, validate_negocio, ValidationError,
+    validate_cpf_cnpj_batch, validate_email_batch, validate_phone_batch,
+    sanitize_text_batch, validate_batch
 )
-from src.utils.secure_logger import SecureLogger
+from src.utils.secure_logger import SecureLogger, capture_stdout, shutdown_logging
 
 
 class TestCPFValidation:
@@ -194,6 +196,52 @@ class TestClienteValidation:
         assert validated['CPFCNPJ'] is None  # CPF inválido é convertido para None
 
 
+class TestBatchValidation:
+    """Testes da validação em lote (coluna a coluna)."""
+    
+    def test_cpf_cnpj_batch_matches_single(self):
+        """Testa que a máscara em lote é igual à validação individual (inclui caminho vetorizado)."""
+        values = ["123.456.789-09", "111.444.777-35", "123.456.789-00", "000.000.000-00",
+                  "11.222.333/0001-81", "11.222.333/0001-00", "123456789", "", None] * 10
+        mask, cleaned = validate_cpf_cnpj_batch(values)
+        expected = [bool(v) and (validate_cpf(v) or validate_cnpj(v)) for v in values]
+        assert mask == expected
+        assert cleaned[0] == "12345678909"
+        assert cleaned[2] is None
+    
+    def test_email_and_phone_batch(self):
+        """Testa emails e telefones em lote."""
+        mask, cleaned = validate_email_batch(["user@example.com", "invalid", ""])
+        assert mask == [True, False, False]
+        assert cleaned == ["user@example.com", None, None]
+        mask, cleaned = validate_phone_batch(["(11) 98888-8888", "123", None])
+        assert mask == [True, False, False]
+        assert cleaned[0] == "11988888888"
+    
+    def test_sanitize_text_batch(self):
+        """Testa sanitização em lote."""
+        assert sanitize_text_batch(["<b>Oi</b>", "   ", "a" * 10], max_length=5) == ["Oi", None, "aaaaa"]
+    
+    def test_validate_batch_cliente_matches_single(self):
+        """Testa que validate_batch com validate_cliente produz o mesmo resultado registro a registro."""
+        def make_rows():
+            return [
+                {'Codigo': '1', 'CPFCNPJ': '123.456.789-09', 'Nome': '<b>Ana</b>', 'DataNascimento': '1990-01-01'},
+                {'Codigo': '2', 'CPFCNPJ': '000.000.000-00', 'EmailResidencial': 'invalido'},
+                {'Nome': 'Sem código'},
+                {'Codigo': '3', 'EmailComercial': 'ok@example.com', 'DataCadastro': 'ontem'},
+            ]
+        validated = validate_batch(make_rows(), validate_cliente)
+        expected = []
+        for row in make_rows():
+            try:
+                expected.append(validate_cliente(row))
+            except ValidationError:
+                pass
+        assert validated == expected
+        assert validated[1]['CPFCNPJ'] is None
+
+
 class TestSecureLogger:
     """Testes do logger seguro."""
     
@@ -229,6 +277,36 @@ class TestSecureLogger:
         assert '123.456.789-00' not in sanitized
         assert 'joao@example.com' not in sanitized
         assert '98888-8888' not in sanitized
+    
+    def test_password_redaction_keeps_key_name(self):
+        """Testa que a redação de senha mantém o nome do campo."""
+        assert SecureLogger.sanitize("Conectando com senha: abc123, ok") == "Conectando com senha=[REDACTED], ok"
+    
+    def test_lazy_args_are_sanitized(self, caplog):
+        """Testa que argumentos no estilo % são formatados e sanitizados na emissão."""
+        logger = SecureLogger('test_lazy')
+        with caplog.at_level('INFO', logger='test_lazy'):
+            logger.info("Cliente %s - CPF %s", "João", "123.456.789-00")
+        assert caplog.messages == ["Cliente João - CPF [CPF_REDACTED]"]
+    
+    def test_disabled_level_skips_formatting(self):
+        """Testa que mensagens de nível desabilitado não são formatadas."""
+        class Explode:
+            def __str__(self):
+                raise AssertionError("não deveria formatar")
+        
+        logger = SecureLogger('test_disabled')
+        logger.debug("Valor %s", Explode())  # Nível padrão é INFO
+    
+    def test_print_routed_through_log_queue(self, capsys):
+        """Testa que prints capturados passam pela fila, redatados, e são escritos no shutdown."""
+        capture_stdout()
+        try:
+            print("Cliente CPF: 123.456.789-00")
+            print("parcial", end="")
+        finally:
+            shutdown_logging()
+        assert capsys.readouterr().out == "Cliente CPF: [CPF_REDACTED]\nparcial\n"
 
 
 if __name__ == '__main__':
@@ -0,0 +1,156 @@
+"""
+Testes do crawl de atividades em shards (partição por hash, leases e relatório consolidado).
+"""
+
+import asyncio
+import zlib
+
+import pytest
+
+from src.extractors import atividades
+from src.utils.secure_logger import allow_identifier, capture_stdout, shutdown_logging
+from src.utils.sharding import (ShardLease, claim_order, format_shard_report, partition, shard_entity, shard_of,
+                                summarize_shards)
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _RecordingClient:
+    """Cliente mínimo: registra as chamadas RPC e responde `result`."""
+
+    def __init__(self, result=True):
+        self.result = result
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append((name, params))
+        return self
+
+    def execute(self):
+        return _Response(self.result)
+
+
+class TestPartition:
+    """Testes da partição determinística dos negócios."""
+
+    def test_partition_is_stable_and_complete(self):
+        """Testa que cada negócio cai em exatamente um shard, sempre o mesmo (crc32, não hash())."""
+        deals = [{"Codigo": str(code)} for code in range(1, 2001)]
+        parts = [partition(deals, 4, index) for index in range(4)]
+        assert sorted(deal["Codigo"] for part in parts for deal in part) == sorted(d["Codigo"] for d in deals)
+        assert all(300 < len(part) < 700 for part in parts)
+        assert shard_of(12345, 4) == shard_of("12345", 4) == zlib.crc32(b"12345") % 4
+        with pytest.raises(ValueError):
+            partition(deals, 4, 4)
+
+    def test_claim_order_and_entities(self):
+        """Testa a ordem de tentativa (circular) e os nomes das linhas do sync_state."""
+        assert claim_order(2, 4) == [2, 3, 0, 1]
+        assert shard_entity("run", 0, 4) == "atividades:run:1/4"
+
+
+class TestShardLease:
+    """Testes do lease (RPCs do sync_state)."""
+
+    def test_release_on_failure(self):
+        """Testa que um erro dentro de renewing() libera o lease e propaga a exceção."""
+        client = _RecordingClient()
+        lease = ShardLease(client, "atividades:run:1/2", ttl=60, owner="host:1")
+        assert lease.acquire()
+
+        async def crawl():
+            async with lease.renewing():
+                raise RuntimeError("falha no crawl")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(crawl())
+        names = [name for name, _ in client.calls]
+        assert names == ["acquire_sync_lease", "release_sync_lease"]
+        assert client.calls[0][1] == {"p_entity": "atividades:run:1/2", "p_owner": "host:1", "p_ttl_seconds": 60}
+        assert client.calls[1][1]["p_details"]["error"] == "RuntimeError"
+
+    def test_keep_alive_detects_lost_lease(self):
+        """Testa que a renovação recusada marca o lease como perdido."""
+        client = _RecordingClient(result=False)
+        lease = ShardLease(client, "atividades:run:2/2", ttl=0.03, owner="host:2")
+
+        async def crawl():
+            async with lease.renewing():
+                await asyncio.sleep(0.1)
+
+        asyncio.run(crawl())
+        assert lease.lost
+
+
+class TestLoadActivitiesStreaming:
+    """Testes da carga em streaming (fila limitada entre extração e loader)."""
+
+    @pytest.fixture
+    def failing_save(self, monkeypatch):
+        async def batches(session, deals):
+            for deal in deals:
+                yield [{"CodigoNegocio": deal, "CodigoAtividade": i} for i in range(3)]
+
+        def save(rows, table, **kwargs):
+            raise RuntimeError("falha no upsert")
+
+        monkeypatch.setattr(atividades, "iter_activity_batches", batches)
+        monkeypatch.setattr(atividades, "save_to_supabase", save)
+
+    @pytest.mark.parametrize("pressure", [False, True])
+    def test_loader_error_reaches_producer(self, monkeypatch, failing_save, pressure):
+        """Testa que a falha do loader chega à extração (na fila cheia ou no drain), sem travar."""
+        monkeypatch.setattr(atividades, "under_pressure", lambda: pressure)
+
+        async def run():
+            load = atividades.load_activities_streaming(None, list(range(20)), chunk_size=2, max_pending_chunks=1)
+            await asyncio.wait_for(load, timeout=5)
+
+        with pytest.raises(RuntimeError, match="falha no upsert"):
+            asyncio.run(run())
+
+
+class TestShardReport:
+    """Testes do relatório consolidado da execução."""
+
+    def test_summary(self):
+        """Testa contagens dos shards concluídos e pendentes."""
+        rows = [
+            {"entity": shard_entity("r", 0, 3), "status": "done", "details": {"deals": 10, "activities": 40}},
+            {"entity": shard_entity("r", 1, 3), "status": "running", "lease_owner": "host:7"},
+            {"entity": "atividades:outra:1/3", "status": "done", "details": {"deals": 99, "activities": 99}},
+        ]
+        summary = summarize_shards(rows, 3, "r")
+        assert summary["done"] == [0]
+        assert summary["pending"] == {1: "running (host:7)", 2: "not_started"}
+        assert not summary["complete"]
+        text = format_shard_report(summary, 3, "r")
+        assert "1/3 shards concluídos, 10 negócios, 40 atividades" in text
+        assert "shard 3/3: not_started" in text
+
+        rows[1] = {"entity": shard_entity("r", 1, 3), "status": "done", "details": {"deals": 5, "activities": 1}}
+        rows.append({"entity": shard_entity("r", 2, 3), "status": "done", "details": {"deals": 1, "activities": 0}})
+        summary = summarize_shards(rows, 3, "r")
+        assert summary["complete"]
+        assert format_shard_report(summary, 3, "r").endswith("Todos os shards concluídos")
+        assert (summary["deals"], summary["activities"]) == (16, 41)
+
+    def test_report_keeps_actions_run_id_in_captured_output(self, capsys):
+        """Testa que o GITHUB_RUN_ID (11 dígitos) sobrevive à redação dos prints capturados."""
+        run_id = "12345678901"
+        allow_identifier(run_id)
+        summary = summarize_shards([{"entity": shard_entity(run_id, 0, 1), "status": "done"}], 1, run_id)
+        capture_stdout()
+        try:
+            print(format_shard_report(summary, 1, run_id))
+            print(f"lease atividades:{run_id}:1/1, cliente 98765432100 e {run_id}9")
+        finally:
+            shutdown_logging()
+        out = capsys.readouterr().out
+        assert out.startswith(f"Execução {run_id}: 1/1 shards concluídos")
+        assert f"atividades:{run_id}:1/1" in out
+        # Outros números com formato de documento continuam redatados
+        assert "98765432100" not in out and f"{run_id}9" not in out
@@ -0,0 +1,106 @@
+"""
+Testes do staging em Parquet (codificação das páginas, escrita em partes e recarga).
+"""
+
+import asyncio
+
+import pytest
+
+from src.utils.records import DealRecord
+from src.utils.staging import decode_rows, encode_page
+
+
+class TestEncoding:
+    """Testes da conversão página <-> colunas de texto."""
+
+    def test_roundtrip_preserves_values(self):
+        """Testa que textos ficam como estão e listas/números voltam iguais (colunas em JSON)."""
+        rows = [
+            {"Codigo": "1", "CorretoresNegocio": [{"CorretorNegocio": "7", "NomeCorretor": "7: Ana"}], "Valor": 10.5},
+            {"Codigo": "2", "CorretoresNegocio": None, "Valor": "1.200,00", "Extra": "x"},
+        ]
+        columns, json_columns = encode_page(rows)
+        assert list(columns) == ["Codigo", "CorretoresNegocio", "Valor", "Extra"]
+        assert json_columns == ["CorretoresNegocio", "Valor"]
+        assert columns["Codigo"] == ["1", "2"]
+        assert decode_rows(columns, json_columns) == [dict(rows[0], Extra=None), rows[1]]
+
+    def test_compact_records(self):
+        """Testa registros compactos (DealRecord) convertidos na codificação."""
+        deal = DealRecord.from_mapping({"Codigo": "9", "NomeCliente": "Cliente"})
+        columns, json_columns = encode_page([deal])
+        assert json_columns == []
+        assert decode_rows(columns, json_columns) == [deal.to_dict()]
+
+
+class TestStagingWriter:
+    """Testes da escrita em partes e da leitura/recarga (requer pyarrow)."""
+
+    def test_write_list_and_read(self, tmp_path):
+        """Testa partes por layout/limite, writers paralelos na mesma execução e o manifest consolidado."""
+        pytest.importorskip("pyarrow")
+        from src.utils.staging import StagingWriter, iter_staged, list_runs
+
+        writer = StagingWriter(str(tmp_path), run_id="r1", part_rows=3)
+        writer.write("negocios", [{"Codigo": str(i), "Status": "Aberto"} for i in range(4)])
+        writer.write("negocios", [{"Codigo": "10", "Status": None, "Tempo": {"Etapa": 2}}])
+        shard = StagingWriter(str(tmp_path), run_id="r1", writer_id="shard1")
+        shard.write("atividades", [{"CodigoNegocio": "1", "CodigoAtividade": "5"}],
+                    unique_key="CodigoNegocio,CodigoAtividade")
+
+        # Só partes fechadas entram no manifest antes do close()
+        assert list_runs(str(tmp_path))["r1"]["negocios"]["complete"] is False
+        assert writer.close() == {"negocios": 5}
+        shard.close()
+
+        manifests = list_runs(str(tmp_path))["r1"]
+        assert manifests["negocios"]["rows"] == 5 and manifests["negocios"]["complete"]
+        assert len(manifests["negocios"]["parts"]) == 2
+        assert manifests["atividades"]["parts"][0]["file"] == "part-shard1-00000.parquet"
+        rows = [row for batch in iter_staged(str(tmp_path), "negocios", "r1", batch_size=2) for row in batch]
+        assert [row["Codigo"] for row in rows] == ["0", "1", "2", "3", "10"]
+        assert rows[-1] == {"Codigo": "10", "Status": None, "Tempo": {"Etapa": 2}}
+
+    def test_load_run_replays_without_staging_again(self, tmp_path, monkeypatch):
+        """Testa a recarga na ordem do ETL, com a chave única do manifest e sem regravar no staging."""
+        pytest.importorskip("pyarrow")
+        from src import load
+        from src.utils.staging import StagingWriter
+
+        writer = StagingWriter(str(tmp_path), run_id="r2")
+        writer.write("atividades", [{"CodigoNegocio": "1", "CodigoAtividade": "2"}],
+                     unique_key="CodigoNegocio,CodigoAtividade")
+        writer.write("clientes", [{"Codigo": "3"}])
+        writer.close()
+
+        calls = []
+        monkeypatch.setattr(load, "save_to_supabase", lambda rows, table, **kwargs: calls.append((table, rows, kwargs)))
+        loaded = asyncio.run(load.load_run("r2", root=str(tmp_path)))
+        assert loaded == {"clientes": 1, "atividades": 1}
+        assert [table for table, _, _ in calls] == ["clientes", "atividades"]
+        assert calls[1][2]["unique_key"] == "CodigoNegocio,CodigoAtividade"
+        assert calls[1][2]["stage"] is False
+        with pytest.raises(ValueError):
+            asyncio.run(load.load_run("inexistente", root=str(tmp_path)))
+
+    def test_save_stages_only_validated_rows(self, monkeypatch):
+        """Testa que o staging recebe a página já validada (a recarga não valida de novo)."""
+        from src.utils import supabase_client
+        from src.utils.validators import ValidationError
+
+        def validator(record):
+            if record["Codigo"] == "2":
+                raise ValidationError("Codigo inválido")
+            return record
+
+        staged = []
+        monkeypatch.setattr(supabase_client, "stage_rows", lambda table, rows, key: staged.append(list(rows)))
+
+        def no_client():
+            raise ConnectionError("sem Supabase no teste")
+
+        monkeypatch.setattr(supabase_client, "get_supabase_client", no_client)
+        with pytest.raises(ConnectionError):
+            supabase_client.save_to_supabase([{"Codigo": "1"}, {"Codigo": "2"}], "clientes",
+                                             validator_func=validator, workers=1)
+        assert staged == [[{"Codigo": "1"}]]
@@ -0,0 +1,117 @@
+"""
+Testes da camada de transformação colunar.
+"""
+
+import pytest
+
+from src.utils.transformers import (
+    ColumnTransformer, get_transformer, nullify, strip_id_prefix,
+    to_boolean, to_date, to_decimal, to_integer, to_numeric, to_timestamp
+)
+
+
+class TestCleaners:
+    """Testes das funções de limpeza."""
+
+    def test_nullify(self):
+        """Strings vazias e datas zeradas viram None."""
+        assert nullify("") is None
+        assert nullify("0000-00-00") is None
+        assert nullify("0000-00-00 00:00:00") is None
+        assert nullify("2024-01-01") == "2024-01-01"
+        assert nullify(0) == 0
+
+    def test_strip_id_prefix(self):
+        """Remove o prefixo "ID:" dos nomes de corretor."""
+        assert strip_id_prefix("123: Fulano") == "Fulano"
+        assert strip_id_prefix("Fulano") == "Fulano"
+        assert strip_id_prefix(None) is None
+
+
+class TestColumnTransformer:
+    """Testes do transformador compilado por tabela."""
+
+    def test_transform_rows(self):
+        """Nulifica todas as colunas e aplica as limpezas da especificação."""
+        rows = [
+            {"Codigo": "1", "CorretorNome": "12: Maria", "DataCadastro": "0000-00-00 00:00:00"},
+            {"Codigo": "2", "CorretorNome": "", "DataCadastro": "2024-02-01"},
+        ]
+        get_transformer("imoveis").transform_rows(rows)
+        assert rows[0] == {"Codigo": "1", "CorretorNome": "Maria", "DataCadastro": None}
+        assert rows[1] == {"Codigo": "2", "CorretorNome": None, "DataCadastro": "2024-02-01 00:00:00"}
+
+    def test_transform_columns_matches_rows(self):
+        """Formato colunar e formato linha produzem o mesmo resultado."""
+        transformer = ColumnTransformer({"NomeCorretor": [strip_id_prefix]})
+        columns = {"NomeCorretor": ["7: João", "", "Ana"], "Valor": ["10", "0000-00-00", 5]}
+        transformer.transform_columns(columns)
+        assert columns == {"NomeCorretor": ["João", None, "Ana"], "Valor": ["10", None, 5]}
+
+    def test_transformer_is_cached(self):
+        """O transformador de uma tabela é construído uma única vez."""
+        assert get_transformer("negocios") is get_transformer("negocios")
+
+
+class TestTypedCoercion:
+    """Testes da coerção tipada por coluna."""
+
+    def test_numeric(self):
+        """Números em formato americano e brasileiro."""
+        assert to_numeric("350000.00") == 350000
+        assert to_numeric("1.234,56") == 1234.56
+        assert to_integer("3") == 3
+        with pytest.raises(ValueError):
+            to_numeric("abc")
+        with pytest.raises(ValueError):
+            to_integer("2.5")
+
+    def test_numeric_thousands_separator(self):
+        """Ponto seguido de exatamente três dígitos é milhar (pt-BR); nas coordenadas o ponto é decimal."""
+        assert to_numeric("1.234") == 1234
+        assert to_numeric("1.234.567") == 1234567
+        assert to_numeric("-1.500") == -1500
+        assert to_numeric("1.5") == 1.5
+        assert to_numeric("12.3456") == 12.3456
+        assert to_decimal("-23.550") == -23.55
+        assert to_decimal("-46,6333") == -46.6333
+        assert get_transformer("imoveis").spec["Latitude"] == [to_decimal]
+
+    def test_numeric_series_matches_scalar(self):
+        """A versão vetorizada segue a mesma convenção da escalar."""
+        pd = pytest.importorskip("pandas")
+        values = ["1.234", "1.234,56", "350000.00", "1.5", "abc", None]
+        expected = [1234, 1234.56, 350000, 1.5, None, None]
+        converted = to_numeric.series(pd.Series(values, dtype=object))
+        assert [None if pd.isna(v) else v for v in converted] == expected
+        assert list(to_decimal.series(pd.Series(["-23.550", "-23,55"], dtype=object))) == [-23.55, -23.55]
+
+    def test_dates(self):
+        """Datas são normalizadas para ISO."""
+        assert to_timestamp("2024-05-01 10:30:00") == "2024-05-01 10:30:00"
+        assert to_timestamp("01/05/2024") == "2024-05-01 00:00:00"
+        assert to_date("2024-05-01 10:30:00") == "2024-05-01"
+        with pytest.raises(ValueError):
+            to_timestamp("31/02/2024")
+
+    def test_boolean(self):
+        """Sim/Nao viram booleanos."""
+        assert to_boolean("Sim") is True
+        assert to_boolean("Nao") is False
+        assert to_boolean("1") is True
+        with pytest.raises(ValueError):
+            to_boolean("Talvez")
+
+    def test_invalid_values_become_null_and_are_counted(self):
+        """Valores inválidos viram None e são contabilizados por coluna."""
+        transformer = ColumnTransformer({"Valor": [to_numeric], "Piscina": [to_boolean]})
+        rows = [
+            {"Valor": "10,5", "Piscina": "Sim"},
+            {"Valor": "dez", "Piscina": "Talvez"},
+            {"Valor": "", "Piscina": "Nao"},
+        ]
+        transformer.transform_rows(rows)
+        assert [r["Valor"] for r in rows] == [10.5, None, None]
+        assert [r["Piscina"] for r in rows] == [True, None, False]
+        assert transformer.pop_invalid_counts() == {"Valor": 1, "Piscina": 1}
+        assert transformer.pop_invalid_counts() == {}